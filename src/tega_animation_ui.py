@@ -23,10 +23,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from PySide import QtGui # basic GUI stuff
+from PySide import QtGui, QtCore # basic GUI stuff
 from r1d1_msgs.msg import TegaAction # ROS msgs
 from tega_teleop_ros import tega_teleop_ros
-from functools import partial
+from tega_teleop_clock import monotonic
 
 class tega_animation_ui(QtGui.QWidget):
 
@@ -121,31 +121,104 @@ class tega_animation_ui(QtGui.QWidget):
             TegaAction.MOTION_BROW_RAISE_OUT
             ]
 
+    # item data roles: the motion to send, and where the item sorts (recently
+    # used animations first, then everything else in the order listed above)
+    MOTION_ROLE = QtCore.Qt.UserRole
+    ORDER_ROLE = QtCore.Qt.UserRole + 1
+
     def __init__(self, ros_node):
-        """ Make a button for each animation """
+        """ Make a palette of animations: a filter box, plus a view of all the
+        animations that only lays out and paints the ones that are visible.
+        """
         super(tega_animation_ui, self).__init__()
+        started = monotonic()
         # get reference to ros node so we can do callbacks to publish messages
         self.ros_node = ros_node
 
-        # put buttons in a box
+        # put palette in a box that fills whatever room the window gives us
         anim_box = QtGui.QGroupBox(self)
         anim_layout = QtGui.QGridLayout(anim_box)
         anim_box.setTitle("Animations")
+        layout = QtGui.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(anim_box)
+
+        # one item per animation, in the same grid order as the old buttons:
+        # ten per row, with the top left ones green and the top right ones red
+        self.model = QtGui.QStandardItemModel(self)
+        green = QtGui.QBrush(QtGui.QColor("green"))
+        red = QtGui.QBrush(QtGui.QColor("red"))
+        for i, anim in enumerate(self.animations):
+            item = QtGui.QStandardItem(anim.lower().replace("\"", ""))
+            item.setEditable(False)
+            item.setData(anim, self.MOTION_ROLE)
+            item.setData(i, self.ORDER_ROLE)
+            row, col = divmod(i, 10)
+            # if in the top left, make it green
+            if (col < 5 and row < 6):
+                item.setForeground(green)
+            # if in top right, make it red
+            if (col > 4 and row < 2):
+                item.setForeground(red)
+            self.model.appendRow(item)
+        # count clicks so the most recently used animation sorts first
+        self.uses = 0
+
+        # filter the animations by whatever is typed in the filter box
+        self.proxy = QtGui.QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterCaseSensitivity(QtCore.Qt.CaseInsensitive)
+        self.proxy.setSortRole(self.ORDER_ROLE)
+        self.proxy.setDynamicSortFilter(True)
+        self.proxy.sort(0)
+
+        self.filter_box = QtGui.QLineEdit(anim_box)
+        self.filter_box.setPlaceholderText("filter animations...")
+        self.filter_box.textChanged.connect(self.proxy.setFilterFixedString)
+        # pressing enter plays the first animation that matches
+        self.filter_box.returnPressed.connect(self.on_filter_entered)
+        anim_layout.addWidget(self.filter_box, 0, 0)
+
+        # a wrapping grid of same-size cells, so the view can lay items out
+        # without measuring each one
+        self.view = QtGui.QListView(anim_box)
+        self.view.setModel(self.proxy)
+        self.view.setViewMode(QtGui.QListView.ListMode)
+        self.view.setFlow(QtGui.QListView.LeftToRight)
+        self.view.setWrapping(True)
+        self.view.setResizeMode(QtGui.QListView.Adjust)
+        self.view.setUniformItemSizes(True)
+        cell = QtCore.QSize(120, 28)
+        self.view.setGridSize(cell)
+        # big enough to show every animation at once, ten to a row like the
+        # old grid of buttons: the view lays out as if its scroll bar were
+        # showing, and wraps a row that only just fits, hence the extra bits
+        rows = (len(self.animations) + 9) // 10
+        frame = 2 * self.view.frameWidth()
+        scroll_bar = self.view.style().pixelMetric(
+                QtGui.QStyle.PM_ScrollBarExtent)
+        self.view.setMinimumSize(10 * cell.width() + frame + scroll_bar + 1,
+                rows * cell.height() + frame + 1)
+        self.view.setSizePolicy(QtGui.QSizePolicy.Expanding,
+                QtGui.QSizePolicy.Expanding)
+        self.view.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.view.clicked.connect(self.on_animation_clicked)
+        anim_layout.addWidget(self.view, 1, 0)
+
+        # how long building the palette took (see --profile-startup)
+        self.build_time = monotonic() - started
+
+    def on_animation_clicked(self, index):
+        """ Send the animation that was clicked, and move it to the front of
+        the palette.
+        """
+        motion = index.data(self.MOTION_ROLE)
+        self.ros_node.send_motion_message(motion)
+        # negative, so it sorts before the never-used ones, most recent first
+        self.uses += 1
+        self.proxy.setData(index, -self.uses, self.ORDER_ROLE)
 
-        # create animation buttons and add to layout
-        col = 0
-        row = 1
-        for anim in self.animations:
-            button = QtGui.QPushButton(anim.lower().replace("\"", ""), anim_box)
-            button.clicked.connect(partial(self.ros_node.send_motion_message, anim))
-            # if in the top left, make button green
-            if (col < 5 and row < 7):
-                button.setStyleSheet('QPushButton {color: green;}')
-            # if in top right, make button red
-            if (col > 4 and row < 3):
-                button.setStyleSheet('QPushButton {color: red;}')
-            anim_layout.addWidget(button, row, col)
-            col += 1
-            if(col >= 10): # ten animation buttons per row
-                col = 0
-                row += 1
+    def on_filter_entered(self):
+        """ Send the first animation that matches the filter, if any. """
+        if self.proxy.rowCount() > 0:
+            self.on_animation_clicked(self.proxy.index(0, 0))
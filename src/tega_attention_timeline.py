@@ -0,0 +1,208 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading # samples arrive on rospy's threads
+from array import array # compact sample storage
+from tega_teleop_clock import monotonic
+
+class tega_attention_timeline(object):
+    """ Remembers whether the child was attending over the last while, in a
+    fixed-size ring buffer of timestamped samples, so memory stays bounded
+    however long a session runs.
+
+    Along with each sample we keep the total time the child had spent
+    attending up to it. Any stretch of the timeline can then be summarized
+    from the samples at its ends, without looking at the samples in between:
+    the attention ratio over the last few seconds, since the last speech
+    command, or per bar of the sparkline.
+    """
+
+    def __init__(self, capacity=1 << 16, window=10.0):
+        """ Set up the timeline. capacity is how many samples we keep (at 30
+        Hz, the default is about 36 minutes); window is how many seconds the
+        running attention ratio covers.
+        """
+        self.capacity = capacity
+        self.window = window
+        self.lock = threading.Lock()
+        # sample i lives in slot i % capacity; count is how many samples we
+        # have ever added
+        self.times = array("d", [0.0]) * capacity
+        self.values = array("B", [0]) * capacity
+        # total seconds attending before each sample
+        self.attended = array("d", [0.0]) * capacity
+        self.count = 0
+        # the first sample at or after the start of the running window
+        self.window_start = 0
+        # when the child last started or stopped attending
+        self.changed_at = None
+        # when mark() was last called
+        self.marked_at = None
+        # called with (attending, time) after each sample is added, from
+        # whichever thread added it
+        self.listeners = []
+
+    def add(self, attending, when=None):
+        """ Add a sample saying whether the child is attending. """
+        if when is None:
+            when = monotonic()
+        with self.lock:
+            i = self.count
+            attended = 0.0
+            if i > 0:
+                last = (i - 1) % self.capacity
+                # the child was doing whatever the last sample said until now
+                attended = self.attended[last]
+                if self.values[last]:
+                    attended += when - self.times[last]
+                if bool(self.values[last]) != bool(attending):
+                    self.changed_at = when
+            else:
+                self.changed_at = when
+            slot = i % self.capacity
+            self.times[slot] = when
+            self.values[slot] = 1 if attending else 0
+            self.attended[slot] = attended
+            self.count = i + 1
+        for listener in self.listeners:
+            listener(attending, when)
+
+    def oldest(self):
+        """ Return the index of the oldest sample we still have. """
+        return max(self.count - self.capacity, 0)
+
+    def attended_at(self, i, when):
+        """ Return the total seconds attending up to a time at or after
+        sample i (and before the sample after it).
+        """
+        slot = i % self.capacity
+        attended = self.attended[slot]
+        if self.values[slot]:
+            attended += when - self.times[slot]
+        return attended
+
+    def find(self, when):
+        """ Return the index of the last sample at or before a time, or the
+        oldest sample if they are all after it.
+        """
+        low, high = self.oldest(), self.count - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.times[middle % self.capacity] <= when:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def between(self, start, end):
+        """ Return (seconds covered, seconds attending) between two times,
+        counting only the time we have samples for. Call with the lock held.
+        """
+        if self.count == 0:
+            return 0.0, 0.0
+        start = max(start, self.times[self.oldest() % self.capacity])
+        if end <= start:
+            return 0.0, 0.0
+        return end - start, (self.attended_at(self.find(end), end)
+                - self.attended_at(self.find(start), start))
+
+    def ratio(self, now=None):
+        """ Return the fraction of the last window seconds the child was
+        attending, or None if we have no samples.
+        """
+        if now is None:
+            now = monotonic()
+        with self.lock:
+            if self.count == 0:
+                return None
+            start = now - self.window
+            # move the start of the window along; each sample is stepped
+            # over once, so this is O(1) on average
+            i = max(self.window_start, self.oldest())
+            while (i < self.count - 1
+                    and self.times[(i + 1) % self.capacity] <= start):
+                i += 1
+            self.window_start = i
+            start = max(start, self.times[self.oldest() % self.capacity])
+            if now <= start:
+                return None
+            return ((self.attended_at(self.count - 1, now)
+                - self.attended_at(i, start)) / (now - start))
+
+    def state(self, now=None):
+        """ Return whether the child is attending (True if we have no
+        samples) and for how many seconds it has been so.
+        """
+        if now is None:
+            now = monotonic()
+        with self.lock:
+            if self.count == 0:
+                return True, 0.0
+            return (bool(self.values[(self.count - 1) % self.capacity]),
+                    now - self.changed_at)
+
+    def mark(self, now=None):
+        """ Remember this time, e.g., when we send speech, so we can tell how
+        much the child has been attending since then.
+        """
+        self.marked_at = monotonic() if now is None else now
+
+    def summary_since_mark(self, now=None):
+        """ Return a dict saying how many seconds have gone by since the last
+        mark (or since the first sample, if there is no mark), the fraction
+        of them the child was attending (None if we have no samples), whether
+        the child is attending now, and for how long it has been so.
+        """
+        if now is None:
+            now = monotonic()
+        with self.lock:
+            if self.count == 0:
+                return {"seconds": 0.0, "ratio": None, "attending": True,
+                        "for": 0.0}
+            start = self.marked_at
+            if start is None:
+                start = self.times[self.oldest() % self.capacity]
+            seconds, attended = self.between(start, now)
+            return {"seconds": seconds,
+                    "ratio": attended / seconds if seconds > 0 else None,
+                    "attending": bool(
+                        self.values[(self.count - 1) % self.capacity]),
+                    "for": now - self.changed_at}
+
+    def sparkline(self, span=60.0, buckets=30, now=None):
+        """ Return the fraction of time the child was attending in each of
+        buckets equal slices of the last span seconds, oldest first. Slices
+        we have no samples for are None.
+        """
+        if now is None:
+            now = monotonic()
+        step = span / buckets
+        with self.lock:
+            ratios = []
+            for b in range(buckets):
+                start = now - span + b * step
+                seconds, attended = self.between(start, start + step)
+                ratios.append(attended / seconds if seconds > 0 else None)
+            return ratios
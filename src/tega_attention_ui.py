@@ -0,0 +1,69 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from PySide import QtGui, QtCore # basic GUI stuff
+
+class tega_attention_ui(QtGui.QWidget):
+    """ A small sparkline of how much the child has been attending over the
+    last minute, one bar per couple of seconds, followed by the attention
+    ratio over the timeline's running window.
+    """
+
+    def __init__(self, timeline, span=60.0, buckets=30, refresh_interval=500,
+            parent=None):
+        """ Draw the timeline's last span seconds in buckets bars, redrawn
+        every refresh_interval milliseconds.
+        """
+        super(tega_attention_ui, self).__init__(parent)
+        self.timeline = timeline
+        self.span = span
+        self.buckets = buckets
+        self.setFixedSize(3 * buckets + 40, 20)
+        self.setToolTip("Child attention over the last {:.0f} s, and over "
+                "the last {:.0f} s".format(span, timeline.window))
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.update)
+        self.timer.start(refresh_interval)
+
+    def paintEvent(self, event):
+        """ Draw a bar per bucket: taller and greener the more the child was
+        attending, a gray stub if we have no samples for it.
+        """
+        painter = QtGui.QPainter(self)
+        height = self.height()
+        for b, ratio in enumerate(self.timeline.sparkline(self.span,
+                self.buckets)):
+            if ratio is None:
+                painter.fillRect(3 * b, height - 2, 2, 2, QtCore.Qt.lightGray)
+                continue
+            bar = max(int(ratio * height), 1)
+            painter.fillRect(3 * b, height - bar, 2, bar,
+                    QtCore.Qt.darkGreen if ratio >= 0.5 else QtCore.Qt.red)
+        ratio = self.timeline.ratio()
+        painter.drawText(3 * self.buckets + 4, 0, 36, height,
+                QtCore.Qt.AlignVCenter,
+                "-" if ratio is None else "{:.0f}%".format(ratio * 100))
+        painter.end()
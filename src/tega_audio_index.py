@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os # find audio files
+import sys # exit code
+import wave # read wav headers
+import argparse # command line args
+import threading # lock around the index
+from multiprocessing.pool import ThreadPool # read headers in parallel
+from tega_script_compiler import ACTION_SPEECH
+from tega_file_manifest import tega_file_manifest
+
+def read_wav_duration(path):
+    """ Return how long a wav file plays for, in seconds, from its header.
+    Raises IOError/OSError/EOFError/wave.Error if we can't read it.
+    """
+    wav = wave.open(path, "rb")
+    try:
+        return wav.getnframes() / float(wav.getframerate())
+    finally:
+        wav.close()
+
+
+class tega_audio_index(object):
+    """ Knows how long every audio file in the scripts plays for, so we can
+    tell the operator how long a line (and the rest of the session) will take,
+    and notice much sooner when the robot is stuck.
+
+    Durations are read from the wav headers in bulk on a thread pool and kept
+    in a manifest keyed by file modification time, so only new or changed
+    files are read again.
+    """
+
+    # bump this when what we store changes, so old manifests are ignored
+    manifest_version = 1
+
+    def __init__(self, manifest_filename="tega_audio_index.json", threads=8):
+        """ Set up the index, loading any durations already on disk. """
+        self.manifest = tega_file_manifest(manifest_filename,
+                self.manifest_version)
+        self.threads = threads
+        # audio path as written in the compiled script -> seconds; looked up
+        # as each item is sent, so no path handling at lookup time
+        self.lock = threading.Lock()
+        self.durations = {}
+
+    def build(self, paths):
+        """ Read the durations of a list of audio files that we don't already
+        know, in parallel, and save them to disk. Returns how many we know.
+        """
+        with self.lock:
+            paths = sorted(set(path for path in paths
+                if path not in self.durations))
+        if paths:
+            pool = ThreadPool(self.threads)
+            try:
+                durations = pool.map(self.read_duration, paths)
+            finally:
+                pool.close()
+                pool.join()
+            self.manifest.save()
+            with self.lock:
+                for path, duration in zip(paths, durations):
+                    if duration is not None:
+                        self.durations[path] = duration
+        with self.lock:
+            return len(self.durations)
+
+    def build_scripts(self, scripts):
+        """ Read the durations of every audio file in some compiled scripts. """
+        return self.build(action.audio for script in scripts
+                for line in script.lines for option in line
+                for action in option.actions if action.kind == ACTION_SPEECH)
+
+    def read_duration(self, path):
+        """ Return the duration of one file, from the manifest if it hasn't
+        changed, or None if it can't be read.
+        """
+        try:
+            return self.manifest.lookup(os.path.expanduser(path),
+                    read_wav_duration)
+        except (IOError, OSError, EOFError, wave.Error):
+            return None
+
+    def duration(self, path):
+        """ Return how long an audio file plays for, or None if we don't
+        know.
+        """
+        return self.durations.get(path)
+
+    def actions_duration(self, actions):
+        """ Return how long the speech in a list of compiled actions plays
+        for, counting speech we don't know the duration of as nothing.
+        """
+        total = 0.0
+        for action in actions:
+            if action.kind == ACTION_SPEECH:
+                total += self.durations.get(action.audio, 0.0)
+        return total
+
+    def script_remaining(self, script):
+        """ Return a list with how long the rest of a compiled script plays
+        for from each line, assuming the first option is picked on each line
+        (plus a zero for after the last line).
+        """
+        remaining = [0.0] * (len(script.lines) + 1)
+        for i in range(len(script.lines) - 1, -1, -1):
+            line = script.lines[i]
+            remaining[i] = remaining[i + 1] + (
+                    self.actions_duration(line[0].actions) if line else 0.0)
+        return remaining
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='''Index how long every wav file in an audio dir plays
+            for, so the teleop interface can estimate how long lines take and
+            notice a stuck robot sooner. Only new or changed files are read.
+            ''')
+    parser.add_argument("audio_dir", help="Directory of wav files.")
+    parser.add_argument("-i", "--index", default="tega_audio_index.json",
+            help="Where to keep the index.")
+    parser.add_argument("-j", "--threads", type=int, default=8,
+            help="How many files to read at once.")
+    args = parser.parse_args()
+
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(
+            os.path.expanduser(args.audio_dir)):
+        paths.extend(os.path.join(dirpath, filename)
+                for filename in filenames if filename.endswith(".wav"))
+    index = tega_audio_index(args.index, args.threads)
+    known = index.build(paths)
+    print("{} of {} audio files indexed, {:.1f} minutes of audio".format(
+        known, len(paths), sum(index.durations.values()) / 60))
+    sys.exit(0 if known == len(paths) else 1)
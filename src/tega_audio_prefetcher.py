@@ -0,0 +1,150 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os # file access
+import threading # background warming
+from collections import OrderedDict # LRU of warmed files
+from tega_script_compiler import ACTION_SPEECH, VISEME_URI
+
+class tega_audio_prefetcher(object):
+    """ Warms the OS page cache with the audio and viseme files for the next
+    few lines of the script, in the background, so that when the operator
+    clicks, the audio entrainer doesn't have to read them cold off a slow disk
+    or a network mount.
+    """
+
+    # read files in chunks this big when we can't ask the OS to read ahead
+    chunk_size = 1 << 20
+
+    def __init__(self, lookahead=3, max_resident=256):
+        """ Set up the prefetcher. lookahead is how many script lines to warm,
+        starting at the current line; max_resident is how many files we
+        remember having warmed.
+        """
+        self.lookahead = lookahead
+        self.max_resident = max_resident
+        # files we have warmed, least recently used first
+        self.resident = OrderedDict()
+        # the latest files we were asked to warm; newer requests replace
+        # older ones that haven't been handled yet
+        self.condition = threading.Condition()
+        self.wanted = None
+        self.stopping = False
+        # whether files were already warm when they were needed
+        self.hits = 0
+        self.misses = 0
+        self.buffer = bytearray(self.chunk_size)
+        self.worker = threading.Thread(target=self.run,
+                name="tega_audio_prefetcher")
+        self.worker.daemon = True
+
+    def start(self):
+        """ Start the worker thread. """
+        self.worker.start()
+
+    def stop(self):
+        """ Stop the worker thread. """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+
+    def prefetch_lines(self, script, current_line):
+        """ Warm the files for the next lookahead lines of a compiled script,
+        starting at current_line.
+        """
+        paths = []
+        for line in script.lines[current_line:current_line + self.lookahead]:
+            for option in line:
+                for action in option.actions:
+                    if action.kind == ACTION_SPEECH:
+                        paths.append(action.audio)
+                        # visemes in a viseme cache aren't files of their own
+                        if not action.visemes.startswith(VISEME_URI):
+                            paths.append(action.visemes)
+        with self.condition:
+            self.wanted = paths
+            self.condition.notify()
+
+    def check(self, actions):
+        """ Count whether the files for these actions were already warm, e.g.,
+        when they are about to be sent.
+        """
+        with self.condition:
+            for action in actions:
+                if action.kind != ACTION_SPEECH:
+                    continue
+                path = os.path.expanduser(action.audio)
+                if path in self.resident:
+                    self.hits += 1
+                    # mark as recently used
+                    self.resident[path] = self.resident.pop(path)
+                else:
+                    self.misses += 1
+
+    def run(self):
+        """ Worker loop: warm whatever files were most recently asked for. """
+        while True:
+            with self.condition:
+                while self.wanted is None and not self.stopping:
+                    self.condition.wait()
+                if self.stopping:
+                    return
+                paths, self.wanted = self.wanted, None
+            for path in paths:
+                with self.condition:
+                    # give up on this batch if a newer one came in
+                    if self.wanted is not None or self.stopping:
+                        break
+                path = os.path.expanduser(path)
+                with self.condition:
+                    if path in self.resident:
+                        self.resident[path] = self.resident.pop(path)
+                        continue
+                if self.warm(path):
+                    with self.condition:
+                        self.resident[path] = True
+                        while len(self.resident) > self.max_resident:
+                            self.resident.popitem(last=False)
+
+    def warm(self, path):
+        """ Get a file into the page cache. Returns whether we could. """
+        try:
+            with open(path, "rb") as f:
+                if hasattr(os, "posix_fadvise"):
+                    # ask the OS to read the whole file ahead
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+                else:
+                    # otherwise read through it, which has the same effect
+                    while f.readinto(self.buffer):
+                        pass
+            return True
+        except (IOError, OSError):
+            return False
+
+    def stats(self):
+        """ Return the hit and miss counts and how many files are warm. """
+        with self.condition:
+            return {"hits": self.hits, "misses": self.misses,
+                    "resident": len(self.resident)}
@@ -0,0 +1,255 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import heapq # commands waiting to be published, most urgent first
+import itertools # tie breaker, so equal priorities go out in order
+import threading # publishing worker
+from tega_latency_tracker import latency_histogram
+from tega_teleop_clock import monotonic
+
+# priority classes, most urgent first
+SAFETY = 0 # e.g., stopping the robot; never dropped
+REDIRECT = 1 # static script lines, to get a distracted child back
+SCRIPT = 2 # script lines, animations, lookats, tablet commands
+AMBIENT = 3 # settings like volume and fidgets
+
+PRIORITY_NAMES = {SAFETY: "safety", REDIRECT: "redirect", SCRIPT: "script",
+        AMBIENT: "ambient"}
+
+# what to do when the queue is full
+DROP_NEWEST = "drop_newest" # refuse the new command
+DROP_OLDEST = "drop_oldest" # drop the command that has waited longest
+DROP_LOWEST = "drop_lowest" # drop the newest of the least urgent commands
+
+
+class scheduled_command(object):
+    """ A command waiting to be published. """
+    __slots__ = ("priority", "kind", "publish", "queued_at", "cancelled",
+            "on_drop")
+
+    def __init__(self, priority, kind, publish, queued_at, on_drop=None):
+        self.priority = priority
+        # what kind of command this is (e.g., "speech"), for anyone curious
+        self.kind = kind
+        # builds, stamps, and publishes the message
+        self.publish = publish
+        self.queued_at = queued_at
+        self.cancelled = False
+        # called if the command is dropped or cancelled instead of published,
+        # e.g., so the speech sequencer stops waiting for the robot to start
+        self.on_drop = on_drop
+
+
+class tega_command_scheduler(object):
+    """ Sits between the UI and the ROS publishers: commands are queued with
+    a priority class and published by a worker thread, most urgent first, so
+    an urgent redirect doesn't wait behind script lines and ambient settings.
+    Commands not sent yet can be cancelled, or preempted by a more urgent
+    command; settings (AMBIENT) are left alone, since each is the latest
+    value of a slider or menu. The queue holds at most max_depth commands;
+    when it's full, the drop policy says what gives (SAFETY commands are
+    always taken).
+
+    Each command is a function that builds and publishes its message, called
+    on the worker thread, so messages are stamped when they are published
+    rather than when they were queued.
+    """
+
+    def __init__(self, max_depth=32, drop_policy=DROP_LOWEST):
+        """ Set up the scheduler. Call start() to start publishing. """
+        self.max_depth = max_depth
+        self.drop_policy = drop_policy
+        self.condition = threading.Condition()
+        # heap of (priority, sequence number, command)
+        self.queue = []
+        self.sequence = itertools.count()
+        # how many commands in the queue haven't been cancelled
+        self.depth = 0
+        self.stopping = False
+
+        # counters, and how long commands of each priority wait to go out
+        self.published = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.waits = {}
+
+        self.worker = threading.Thread(target=self.run,
+                name="tega_command_scheduler")
+        self.worker.daemon = True
+
+    def start(self):
+        """ Start the worker thread. """
+        self.worker.start()
+
+    def stop(self):
+        """ Stop the worker thread, dropping anything not yet published. """
+        with self.condition:
+            self.stopping = True
+            dropped = [entry[2] for entry in self.queue
+                    if not entry[2].cancelled]
+            for command in dropped:
+                command.cancelled = True
+            self.depth -= len(dropped)
+            self.dropped += len(dropped)
+            self.condition.notify()
+        # so nobody is left waiting for a command that will never go out
+        self.notify_dropped(dropped)
+
+    def submit(self, priority, kind, publish, preempt=False, on_drop=None):
+        """ Queue publish() to be called with the given priority. If preempt
+        is set, cancel everything less urgent that hasn't been published yet
+        (except settings). If the command is dropped or cancelled instead of
+        published, on_drop() is called. Returns the queued command, or None
+        if it was dropped.
+        """
+        command = scheduled_command(priority, kind, publish, monotonic(),
+                on_drop)
+        dropped = []
+        with self.condition:
+            if preempt:
+                dropped = self.cancel_below_locked(priority)
+            if self.depth >= self.max_depth and priority != SAFETY:
+                victim = self.make_room(command)
+                if victim is None:
+                    self.dropped += 1
+                    command.cancelled = True
+                    victim = command
+                dropped.append(victim)
+            if not command.cancelled:
+                heapq.heappush(self.queue,
+                        (priority, next(self.sequence), command))
+                self.depth += 1
+                self.condition.notify()
+        self.notify_dropped(dropped)
+        return None if command.cancelled else command
+
+    def notify_dropped(self, commands):
+        """ Tell whoever sent them that commands were dropped. Call without
+        the lock held.
+        """
+        for command in commands:
+            if command is not None and command.on_drop is not None:
+                command.on_drop()
+
+    def make_room(self, command):
+        """ The queue is full: drop something according to the drop policy.
+        Returns the command dropped to make room, or None if the new command
+        has to be dropped instead.
+        """
+        victims = [entry for entry in self.queue if not entry[2].cancelled
+                and entry[0] != SAFETY]
+        if self.drop_policy == DROP_NEWEST or not victims:
+            return None
+        if self.drop_policy == DROP_OLDEST:
+            victim = min(victims, key=lambda entry: entry[2].queued_at)
+        else:
+            # the least urgent command, newest first; if that's no more
+            # urgent than the new command, drop the new command instead
+            victim = max(victims, key=lambda entry: entry[:2])
+            if victim[0] < command.priority:
+                return None
+        victim[2].cancelled = True
+        self.depth -= 1
+        self.dropped += 1
+        return victim[2]
+
+    def cancel_below(self, priority):
+        """ Cancel every unpublished command less urgent than priority,
+        except settings. Returns how many were cancelled.
+        """
+        with self.condition:
+            cancelled = self.cancel_below_locked(priority)
+        self.notify_dropped(cancelled)
+        return len(cancelled)
+
+    def cancel_below_locked(self, priority):
+        """ cancel_below, with the lock already held. Returns the cancelled
+        commands, so the caller can notify_dropped them once it lets go of
+        the lock.
+        """
+        cancelled = [entry[2] for entry in self.queue if entry[0] > priority
+                and entry[0] != AMBIENT and not entry[2].cancelled]
+        for command in cancelled:
+            command.cancelled = True
+        self.depth -= len(cancelled)
+        self.cancelled += len(cancelled)
+        return cancelled
+
+    def run(self):
+        """ Worker loop: publish the most urgent command waiting. """
+        while True:
+            with self.condition:
+                while not self.queue and not self.stopping:
+                    self.condition.wait()
+                if self.stopping:
+                    return
+                priority, sequence, command = heapq.heappop(self.queue)
+                if command.cancelled:
+                    continue
+                self.depth -= 1
+                publish, command.publish = command.publish, None
+                wait = monotonic() - command.queued_at
+                histogram = self.waits.get(priority)
+                if histogram is None:
+                    histogram = self.waits[priority] = latency_histogram()
+                histogram.add(wait)
+                self.published += 1
+            try:
+                publish()
+            except Exception as e:
+                # this is the only thread publishing, so don't let one bad
+                # command take it down (and every command after it with it)
+                print("Warning: could not publish {} command: {}: {}".format(
+                    command.kind, type(e).__name__, e))
+                with self.condition:
+                    self.failed += 1
+                self.notify_dropped([command])
+
+    def summary(self):
+        """ Return (priority name, count, p50, p95, p99) of how long commands
+        of each priority waited to be published, in seconds.
+        """
+        with self.condition:
+            return [(PRIORITY_NAMES[priority], h.count, h.percentile(50),
+                h.percentile(95), h.percentile(99)) for priority, h in sorted(
+                    self.waits.items())]
+
+    def stats(self):
+        """ Return the scheduler's counters and current queue depth. """
+        with self.condition:
+            return {"depth": self.depth, "published": self.published,
+                    "dropped": self.dropped, "cancelled": self.cancelled,
+                    "failed": self.failed}
+
+    def print_stats(self):
+        """ Print the scheduler's counters and waits (e.g., on exit). """
+        print("Command queue: {published} published, {dropped} dropped, "
+                "{cancelled} cancelled, {failed} failed, {depth} left".format(
+                    **self.stats()))
+        for name, count, p50, p95, p99 in self.summary():
+            print("  {:<14} n={:<5} wait p50={:7.1f} p95={:7.1f} "
+                    "p99={:7.1f} ms".format(name, count, p50 * 1000,
+                        p95 * 1000, p99 * 1000))
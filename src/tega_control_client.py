@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys # exit
+import json # one json request and response per line
+import socket # unix socket
+import argparse # command line args
+from tega_teleop_clock import monotonic
+
+class tega_control_client(object):
+    """ Talks to a tega_control_server over its unix socket. call() sends a
+    request and waits for its response; send() and receive() let a driver
+    send many requests before reading their responses, which come back in
+    order.
+    """
+
+    def __init__(self, socket_path="/tmp/tega_teleop.sock"):
+        """ Connect to the server. """
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path)
+        self.reader = self.socket.makefile("r")
+
+    def send(self, op, **args):
+        """ Send a request without waiting for its response. """
+        args["op"] = op
+        self.socket.sendall(json.dumps(args) + "\n")
+
+    def receive(self):
+        """ Wait for the next response. """
+        line = self.reader.readline()
+        if not line:
+            raise IOError("control server closed the connection")
+        return json.loads(line)
+
+    def call(self, op, **args):
+        """ Send a request and return its response. """
+        self.send(op, **args)
+        return self.receive()
+
+    def close(self):
+        """ Disconnect from the server. """
+        self.reader.close()
+        self.socket.close()
+
+
+def parse_value(text):
+    """ Read a command line value as json if we can (numbers, true/false,
+    lists), or as a string otherwise.
+    """
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='''Send one request to the control server (started with
+            tega_teleop.py --headless, or tega_control_server.py for a stub
+            robot) and print the response, e.g.:
+                tega_control_client.py motion motion=LAUGH
+                tega_control_client.py lookat x=0 y=20 z=40
+                tega_control_client.py option option=0
+                tega_control_client.py state
+            Or, with --bench, time a burst of requests.
+            ''')
+    parser.add_argument("op", nargs="?", default="state",
+            help="What to do (default: state).")
+    parser.add_argument("args", nargs="*", help="key=value arguments.")
+    parser.add_argument("-s", "--socket", default="/tmp/tega_teleop.sock",
+            help="Unix socket the server listens on.")
+    parser.add_argument("--bench", type=int, default=0, metavar="N",
+            help="Send the request N times, pipelined, and report requests "
+            "per second.")
+    args = parser.parse_args()
+
+    request = dict((key, parse_value(value)) for key, value in
+            (arg.split("=", 1) for arg in args.args))
+    client = tega_control_client(args.socket)
+    if args.bench:
+        # keep a window of requests in flight, so neither side blocks on a
+        # full socket buffer
+        window = 64
+        failed = 0
+        started = monotonic()
+        for i in range(args.bench):
+            if i >= window:
+                failed += not client.receive()["ok"]
+            client.send(args.op, id=i, **request)
+        for i in range(min(window, args.bench)):
+            failed += not client.receive()["ok"]
+        elapsed = monotonic() - started
+        print("{} {} requests in {:.3f}s: {:.0f} requests/s, {} failed"
+                .format(args.bench, args.op, elapsed, args.bench / elapsed,
+                    failed))
+    else:
+        print(json.dumps(client.call(args.op, **request), sort_keys=True))
+    client.close()
+    sys.exit(0)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os # remove stale sockets
+import sys # exit
+import stat # is a path a socket
+import json # one json request and response per line
+import socket # check for a server still listening
+import argparse # command line args
+import SocketServer # threaded unix socket server
+from tega_script_compiler import motion_constants
+
+def remove_stale_socket(socket_path):
+    """ Remove a socket left over from a server that didn't shut down
+    cleanly, if there is one. Raises IOError if there is something else at
+    socket_path, or a server is still listening on it.
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except OSError:
+        # nothing there
+        return
+    if not stat.S_ISSOCK(mode):
+        raise IOError("{} is in the way (and isn't a socket)".format(
+            socket_path))
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except socket.error:
+        # nobody is listening on it
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise IOError("another server is listening on " + socket_path)
+
+
+class control_handler(SocketServer.StreamRequestHandler):
+    """ Handles one client connection: reads one json request per line and
+    writes one json response per line, in order, so clients can send many
+    requests before reading the responses.
+    """
+
+    def handle(self):
+        for line in iter(self.rfile.readline, ""):
+            response = self.server.dispatch(line)
+            self.wfile.write(json.dumps(response) + "\n")
+
+
+class tega_control_server(SocketServer.ThreadingMixIn,
+        SocketServer.UnixStreamServer):
+    """ Takes the same commands as the GUI over a local unix socket, so study
+    drivers can run the robot without scripting the GUI. Each request is a
+    json object with an "op" (e.g., {"op": "motion", "motion": "LAUGH"});
+    each response is {"ok": true, ...} or {"ok": false, "error": ...}, with
+    the request's "id" if it had one.
+
+    Requests never wait on the robot: commands are queued (see
+    tega_command_scheduler.py) and script lines are handed to the speech
+    sequencer, so a client can send hundreds of requests a second.
+    """
+
+    # don't keep the process alive for clients that are still connected
+    daemon_threads = True
+
+    def __init__(self, socket_path, robot, player, compiler,
+            make_vector=None):
+        """ Listen on socket_path. robot takes the same calls as
+        tega_teleop_ros (e.g., a tega_teleop_group), player plays scripts
+        (see tega_script_player.py), and compiler says what the motion names
+        used in scripts mean. make_vector(x, y, z) makes lookat points
+        (by default, geometry_msgs Vector3s).
+        """
+        remove_stale_socket(socket_path)
+        SocketServer.UnixStreamServer.__init__(self, socket_path,
+                control_handler)
+        self.socket_path = socket_path
+        self.robot = robot
+        self.player = player
+        self.compiler = compiler
+        self.make_vector = make_vector
+        self.requests = 0
+        # op name -> method handling it; each takes the request and returns
+        # anything to add to the response, or None
+        self.ops = {"motion": self.op_motion, "lookat": self.op_lookat,
+                "speech": self.op_speech, "opal": self.op_opal,
+                "volume": self.op_volume, "fidget": self.op_fidget,
+                "load_script": self.op_load_script,
+                "option": self.op_option,
+                "static_option": self.op_static_option,
+                "forward": self.op_forward, "back": self.op_back,
+                "beginning": self.op_beginning, "end": self.op_end,
+                "pause": self.op_pause, "stop": self.op_stop,
+                "targets": self.op_targets,
+                "state": self.op_state}
+
+    def server_bind(self):
+        """ Bind the socket so that only this user can connect: anyone who
+        can connect can drive the robot.
+        """
+        SocketServer.UnixStreamServer.server_bind(self)
+        os.chmod(self.server_address, 0o600)
+
+    def server_close(self):
+        """ Stop listening and remove the socket. """
+        SocketServer.UnixStreamServer.server_close(self)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def dispatch(self, line):
+        """ Handle one request line, returning the response. """
+        self.requests += 1
+        # tell the client what went wrong rather than dropping the connection
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": "ValueError: {}".format(e)}
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "request is not a json object"}
+        try:
+            op = self.ops.get(request.get("op"))
+            if op is None:
+                response = {"ok": False,
+                        "error": "unknown op {}".format(request.get("op"))}
+            else:
+                response = op(request) or {}
+                response.setdefault("ok", True)
+        except Exception as e:
+            response = {"ok": False, "error": "{}: {}".format(
+                type(e).__name__, e)}
+        # so the client can match the response up with the request, even if
+        # it failed
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def reason(self, reason):
+        """ Turn a player's reason for not doing something into a response. """
+        if reason is None:
+            return None
+        return {"ok": False, "error": reason}
+
+    def op_motion(self, request):
+        motions = self.compiler.motions
+        if motions is None:
+            motions = self.compiler.motions = motion_constants()
+        name = request["motion"]
+        self.robot.send_motion_message(motions.get(name, name))
+
+    def op_lookat(self, request):
+        make_vector = self.make_vector
+        if make_vector is None:
+            from geometry_msgs.msg import Vector3 # lookat coordinates
+            make_vector = self.make_vector = Vector3
+        self.robot.send_lookat_message(make_vector(request["x"],
+            request["y"], request["z"]))
+
+    def op_speech(self, request):
+        self.robot.send_speech_message(request["speech"])
+
+    def op_opal(self, request):
+        command = request["command"]
+        if not isinstance(command, int):
+            # a command's name, e.g., NEXT_PAGE
+            from sar_opal_msgs.msg import OpalCommand # ROS msgs
+            command = getattr(OpalCommand, command)
+        self.robot.send_opal_message(command)
+
+    def op_volume(self, request):
+        self.robot.set_volume(request["volume"])
+
+    def op_fidget(self, request):
+        self.robot.set_fidgets(request["fidgets"])
+
+    def op_load_script(self, request):
+        if request.get("static"):
+            script = self.player.load_static_script(request["path"])
+        else:
+            script = self.player.load_script(request["path"])
+        return {"lines": len(script)}
+
+    def op_option(self, request):
+        return self.reason(self.player.play_option(request.get("option", 0),
+            request.get("age", 5), request.get("entrain", False)))
+
+    def op_static_option(self, request):
+        return self.reason(self.player.play_static_option(request["option"],
+            request.get("age", 5), request.get("entrain", False)))
+
+    def op_forward(self, request):
+        return self.reason(self.player.forward())
+
+    def op_back(self, request):
+        return self.reason(self.player.back())
+
+    def op_beginning(self, request):
+        return self.reason(self.player.beginning())
+
+    def op_end(self, request):
+        return self.reason(self.player.end())
+
+    def op_pause(self, request):
+        return {"paused": self.player.toggle_pause()}
+
+    def op_stop(self, request):
+        jobs, commands = self.player.stop()
+        return {"dropped_lines": jobs, "cancelled_commands": commands}
+
+    def op_targets(self, request):
+        self.robot.set_targets(request["robots"])
+
+    def op_state(self, request):
+        flags = self.robot.flags
+        state = self.player.state()
+        state.update({"playing_sound": flags.tega_is_playing_sound,
+            "doing_motion": flags.tega_is_doing_motion,
+            "child_attending": flags.child_is_attending,
+            "requests": self.requests})
+        scheduler = getattr(self.robot, "scheduler", None)
+        if scheduler is not None:
+            state["queue"] = scheduler.stats()
+        return state
+
+
+if __name__ == '__main__':
+    # only needed to stand in for a robot
+    from tega_teleop_flags import tega_teleop_flags
+    from tega_script_compiler import tega_script_compiler
+    from tega_script_cache import tega_script_cache
+    from tega_speech_sequencer import tega_speech_sequencer
+    from tega_script_player import tega_script_player
+    from tega_sequencer_bench import stub_robot
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='''Run the control server against a stub robot, with no
+            roscore, robot, or tablet, to try out or test control clients
+            (see tega_control_client.py). To control real robots, run
+            tega_teleop.py --headless instead.
+            ''')
+    parser.add_argument("-s", "--socket", default="/tmp/tega_teleop.sock",
+            help="Unix socket to listen on.")
+    parser.add_argument("-d", "--duration", type=float, default=0.05,
+            help="Seconds the stub robot spends on each speech or motion.")
+    args = parser.parse_args()
+
+    flags = tega_teleop_flags()
+    robot = stub_robot(flags, 0.01, args.duration, args.duration)
+    compiler = tega_script_compiler(motions={})
+    sequencer = tega_speech_sequencer(robot, flags, False)
+    sequencer.start()
+    player = tega_script_player(sequencer, tega_script_cache(compiler))
+    try:
+        server = tega_control_server(args.socket, robot, player, compiler,
+                make_vector=lambda x, y, z: (x, y, z))
+    except IOError as e:
+        print("Could not listen on {}: {}".format(args.socket, e))
+        sys.exit(1)
+    print("Listening on " + args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("{} requests, {} commands sent to the stub robot".format(
+            server.requests, robot.sent))
+    sys.exit(0)
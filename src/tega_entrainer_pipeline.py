@@ -0,0 +1,152 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading # the player calls in from several threads
+from collections import OrderedDict # prepared items, in order
+from tega_script_compiler import ACTION_SPEECH
+
+class tega_entrainer_pipeline(object):
+    """ Hands speech to the audio entrainer ahead of time, so it can process
+    the audio while the robot is still playing the current line, instead of
+    starting only when the line is sent.
+
+    Items are prepared on the "rr/entrain_prepare" topic; playback still
+    goes through "rr/entrain_audio" from the speech sequencer, gated on the
+    robot being done, as before. An entrainer that has already prepared the
+    item can start playing it right away. Items we no longer expect to play
+    are cancelled on "rr/entrain_cancel".
+
+    We guess that the next thing played is the first option of the current
+    line. When the operator sends an option, everything prepared for other
+    options is cancelled (so the entrainer works on what was picked), and
+    the option's speech is prepared if it wasn't already; when the script
+    moves to another line (or after a redirect), we prepare the line's first
+    option. Cancelling and preparing again puts what the operator picked
+    ahead of our guess.
+    """
+
+    def __init__(self, ros_node, depth=2):
+        """ Set up the pipeline. depth is how many speech items to prepare
+        ahead of time.
+        """
+        self.ros_node = ros_node
+        self.depth = depth
+        self.lock = threading.Lock()
+        # audio -> (visemes, speaker age, entrain), for items we asked the
+        # entrainer to prepare and haven't sent or cancelled yet
+        self.prepared = OrderedDict()
+        # the settings the operator last sent speech with, which we prepare
+        # upcoming speech with too
+        self.speaker_age = 5
+        self.entrain = False
+        # the speech the operator last sent, which we don't prepare again
+        # (e.g., when the script is paused and stays on the line just sent)
+        self.last_sent = set()
+        # counters
+        self.prepares = 0
+        self.cancels = 0
+        self.hits = 0
+        self.misses = 0
+
+    def speech(self, actions):
+        """ Return the speech actions among some actions, without repeats. """
+        seen = set()
+        speech = []
+        for action in actions:
+            if action.kind == ACTION_SPEECH and action.audio not in seen:
+                seen.add(action.audio)
+                speech.append(action)
+        return speech
+
+    def prepare(self, action, speaker_age, entrain):
+        """ Ask the entrainer to prepare a speech item. Call with the lock
+        held.
+        """
+        self.prepared[action.audio] = (action.visemes, speaker_age, entrain)
+        self.prepares += 1
+        self.ros_node.send_entrain_prepare_message(action.audio,
+                action.visemes, speaker_age, entrain)
+
+    def cancel(self, audio):
+        """ Tell the entrainer we won't play a prepared item. Call with the
+        lock held.
+        """
+        del self.prepared[audio]
+        self.cancels += 1
+        self.ros_node.send_entrain_cancel_message(audio)
+
+    def sending(self, actions, speaker_age, entrain):
+        """ The operator sent these actions: cancel anything prepared for
+        other options, and prepare this option's speech (so later items are
+        ready by the time the earlier ones finish).
+        """
+        speech = self.speech(actions)
+        with self.lock:
+            self.speaker_age = speaker_age
+            self.entrain = entrain
+            wanted = self.last_sent = set(action.audio for action in speech)
+            for audio in list(self.prepared):
+                if audio not in wanted:
+                    self.cancel(audio)
+            for action in speech:
+                if (self.prepared.pop(action.audio, None)
+                        == (action.visemes, speaker_age, entrain)):
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    self.prepare(action, speaker_age, entrain)
+                    # the entrainer plays it once it's sent, so it's no
+                    # longer ours to cancel
+                    del self.prepared[action.audio]
+
+    def expect(self, actions):
+        """ We expect these actions to be sent next: prepare their first few
+        speech items, and cancel anything else we prepared.
+        """
+        with self.lock:
+            speech = [action for action in self.speech(actions)
+                    if action.audio not in self.last_sent][:self.depth]
+            wanted = set(action.audio for action in speech)
+            for audio in list(self.prepared):
+                if audio not in wanted:
+                    self.cancel(audio)
+            for action in speech:
+                if action.audio not in self.prepared:
+                    self.prepare(action, self.speaker_age, self.entrain)
+
+    def stats(self):
+        """ Return how many items we prepared and cancelled, and how many
+        sent items had (or hadn't) been prepared ahead of time.
+        """
+        with self.lock:
+            return {"prepares": self.prepares, "cancels": self.cancels,
+                    "hits": self.hits, "misses": self.misses,
+                    "pending": len(self.prepared)}
+
+    def print_stats(self):
+        """ Print the pipeline's counters (e.g., on exit). """
+        print("Entrainer pipeline: {hits} items prepared ahead of time, "
+                "{misses} not, {prepares} prepares, {cancels} "
+                "cancels".format(**self.stats()))
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys # exit
+import time # processing takes a while
+import argparse # command line args
+import threading # worker thread
+from collections import OrderedDict # items waiting, in order
+from tega_viseme_cache import read_visemes
+from tega_teleop_clock import monotonic
+
+class entrainer_item(object):
+    """ One piece of speech the stand-in entrainer was asked for. """
+    __slots__ = ("audio", "visemes", "age", "entrain", "play", "cancelled")
+
+    def __init__(self, audio, visemes, age, entrain, play=False):
+        self.audio = audio
+        self.visemes = visemes
+        self.age = age
+        self.entrain = entrain
+        # whether to play it as soon as it's processed
+        self.play = play
+        self.cancelled = False
+
+
+class tega_entrainer_sim(object):
+    """ A stand-in for the audio entrainer: processing each piece of speech
+    takes processing_time seconds, one at a time, and then it is handed to
+    play(audio, visemes) (e.g., to send to the robot). Like the real one, it
+    reads the visemes when processing, from a viseme file or a viseme cache
+    (see tega_viseme_cache.py). Speech can be
+    prepared ahead of time and cancelled (see tega_entrainer_pipeline.py),
+    so prepared speech plays as soon as it is asked for.
+
+    This doesn't know about ROS, so it can also stand in for the entrainer
+    in headless benchmarks (see tega_sequencer_bench.py).
+    """
+
+    def __init__(self, play, processing_time=2.0, max_ready=16):
+        """ Set up the stand-in. max_ready is how many prepared items we
+        keep until they are played.
+        """
+        self.play = play
+        self.processing_time = processing_time
+        self.max_ready = max_ready
+        self.condition = threading.Condition()
+        # items to process, in order; items to play go first
+        self.queued = OrderedDict()
+        self.to_play = []
+        # the item being processed, and processed items waiting to be played
+        self.processing = None
+        self.ready = OrderedDict()
+        self.stopping = False
+        # how many items were ready when asked to play them, were still being
+        # processed, or hadn't been prepared
+        self.hits = 0
+        self.partial = 0
+        self.misses = 0
+        self.prepared = 0
+        self.cancelled = 0
+        # how many viseme files we read, how many we couldn't, and how long
+        # reading them took
+        self.visemes_read = 0
+        self.viseme_errors = 0
+        self.viseme_time = 0.0
+        self.worker = threading.Thread(target=self.run,
+                name="tega_entrainer_sim")
+        self.worker.daemon = True
+
+    def start(self):
+        """ Start the worker thread. """
+        self.worker.start()
+
+    def stop(self):
+        """ Stop the worker thread after the item it is processing. """
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+
+    def prepare(self, audio, visemes, age, entrain):
+        """ Process a piece of speech, and keep it until asked to play it. """
+        key = (audio, age, entrain)
+        with self.condition:
+            if (key in self.queued or key in self.ready or (self.processing
+                    is not None and self.key(self.processing) == key)):
+                return
+            self.prepared += 1
+            self.queued[key] = entrainer_item(audio, visemes, age, entrain)
+            self.condition.notify()
+
+    def cancel(self, audio):
+        """ Forget a prepared piece of speech (or all of them, if audio is
+        empty), unless it has been asked for.
+        """
+        with self.condition:
+            items = list(self.queued.values()) + list(self.ready.values())
+            if self.processing is not None:
+                items.append(self.processing)
+            for item in items:
+                if not item.play and (not audio or item.audio == audio):
+                    item.cancelled = True
+                    self.cancelled += 1
+                    self.queued.pop(self.key(item), None)
+                    self.ready.pop(self.key(item), None)
+
+    def entrain_audio(self, audio, visemes, age, entrain):
+        """ Play a piece of speech, as soon as it's processed. """
+        key = (audio, age, entrain)
+        with self.condition:
+            item = self.ready.pop(key, None)
+            if item is not None:
+                self.hits += 1
+            elif (self.processing is not None
+                    and self.key(self.processing) == key):
+                self.partial += 1
+                self.processing.play = True
+                return
+            else:
+                item = self.queued.pop(key, None)
+                if item is not None:
+                    self.partial += 1
+                else:
+                    self.misses += 1
+                    item = entrainer_item(audio, visemes, age, entrain)
+                item.play = True
+                self.to_play.append(item)
+                self.condition.notify()
+                return
+        self.play(item.audio, item.visemes)
+
+    def key(self, item):
+        """ Items are the same if they'd be processed the same way. """
+        return (item.audio, item.age, item.entrain)
+
+    def run(self):
+        """ Worker loop: process one item at a time, those to play first. """
+        while True:
+            with self.condition:
+                while not (self.to_play or self.queued or self.stopping):
+                    self.condition.wait()
+                if self.stopping:
+                    return
+                if self.to_play:
+                    item = self.to_play.pop(0)
+                else:
+                    item = self.queued.popitem(last=False)[1]
+                self.processing = item
+            started = monotonic()
+            try:
+                read_visemes(item.visemes)
+                read = True
+            except (IOError, OSError, KeyError, ValueError):
+                read = False
+            took = monotonic() - started
+            time.sleep(max(self.processing_time - took, 0))
+            with self.condition:
+                self.visemes_read += read
+                self.viseme_errors += not read
+                self.viseme_time += took
+                self.processing = None
+                if not item.play:
+                    if not item.cancelled:
+                        self.ready[self.key(item)] = item
+                        while len(self.ready) > self.max_ready:
+                            self.ready.popitem(last=False)
+                    continue
+            self.play(item.audio, item.visemes)
+
+    def stats(self):
+        """ Return how many items were prepared, cancelled, and ready (or
+        not) when asked to play them.
+        """
+        with self.condition:
+            return {"hits": self.hits, "partial": self.partial,
+                    "misses": self.misses, "prepared": self.prepared,
+                    "cancelled": self.cancelled,
+                    "visemes_read": self.visemes_read,
+                    "viseme_errors": self.viseme_errors,
+                    "viseme_ms": 1000.0 * self.viseme_time}
+
+    def print_stats(self):
+        """ Print the stand-in's counters. """
+        print("Entrainer: {hits} ready when asked, {partial} still "
+                "processing, {misses} not prepared; {prepared} prepared, "
+                "{cancelled} cancelled; {visemes_read} viseme files read "
+                "({viseme_errors} unreadable) in {viseme_ms:.1f} "
+                "ms".format(**self.stats()))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='''Stand in for the audio entrainer. Takes EntrainAudio
+            messages on "rr/entrain_audio" (play) and "rr/entrain_prepare"
+            (process ahead of time), and cancellations on "rr/entrain_cancel";
+            processing each piece of speech takes a while, and then the node
+            sends the audio to the robot as a TegaAction on "tega" (e.g., to
+            tega_sim.py). Use it to try out the entrainer pipeline without
+            the real entrainer.
+            ''')
+    parser.add_argument("-p", "--processing-time", type=float, default=2.0,
+            help="Seconds to process each piece of speech.")
+    args = parser.parse_args()
+
+    # only import ROS once we know we're running the node
+    import rospy # ROS
+    from r1d1_msgs.msg import TegaAction # ROS msgs to talk to Tega
+    from rr_msgs.msg import EntrainAudio # ROS msgs to get speech
+    from std_msgs.msg import String # cancellations
+    from std_msgs.msg import Header # standard ROS msg header
+
+    rospy.init_node('tega_entrainer_sim', anonymous=True)
+    tega_pub = rospy.Publisher('tega', TegaAction, queue_size = 10)
+
+    def play(audio, visemes):
+        msg = TegaAction()
+        msg.header = Header()
+        msg.header.stamp = rospy.Time.now()
+        msg.wav_filename = audio
+        tega_pub.publish(msg)
+
+    entrainer = tega_entrainer_sim(play, args.processing_time)
+    rospy.Subscriber('rr/entrain_audio', EntrainAudio,
+            lambda msg: entrainer.entrain_audio(msg.audio, msg.viseme_file,
+                msg.age, msg.entrain))
+    rospy.Subscriber('rr/entrain_prepare', EntrainAudio,
+            lambda msg: entrainer.prepare(msg.audio, msg.viseme_file,
+                msg.age, msg.entrain))
+    rospy.Subscriber('rr/entrain_cancel', String,
+            lambda msg: entrainer.cancel(msg.data))
+    entrainer.start()
+    rospy.spin()
+    entrainer.stop()
+    entrainer.print_stats()
+    sys.exit(0)
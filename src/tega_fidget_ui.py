@@ -62,4 +62,4 @@ class tega_fidget_ui(QtGui.QWidget):
         """ When the fidget set is changed in the combo box, send a message
         to the robot to tell it what set should now be in use.
         """
-        self.ros_node.send_fidget_message(self.fidget_sets[fidget_set])
+        self.ros_node.set_fidgets(self.fidget_sets[fidget_set])
@@ -0,0 +1,97 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os # file modification times
+import json # the manifest is a json file
+import threading # manifests are filled in from thread pools
+
+class tega_file_manifest(object):
+    """ A json file remembering something we worked out about each of a set
+    of files (e.g., whether it's a valid wav file, or how long it plays),
+    keyed by path and checked against the file's modification time and size,
+    so we only redo the work for files that changed.
+    """
+
+    def __init__(self, filename, version=1):
+        """ Load the manifest from filename, if it exists. If the manifest was
+        written with a different version (i.e., by code that worked out
+        something different), start over.
+        """
+        self.filename = filename
+        self.version = version
+        self.lock = threading.Lock()
+        # path -> [mtime, size, value]
+        self.entries = {}
+        self.changed = False
+        try:
+            with open(filename) as manifest_file:
+                data = json.load(manifest_file)
+            if data.get("version") == version:
+                self.entries = data.get("files", {})
+        except (IOError, OSError, ValueError):
+            # no manifest yet, or not one we can read; start a new one
+            pass
+
+    def get(self, path, stat):
+        """ Return (True, value) if we have a value for path that is still
+        current for the file's os.stat() result, or (False, None).
+        """
+        with self.lock:
+            entry = self.entries.get(path)
+        if (entry is not None and entry[0] == stat.st_mtime
+                and entry[1] == stat.st_size):
+            return True, entry[2]
+        return False, None
+
+    def put(self, path, stat, value):
+        """ Remember a value for path as of the file's os.stat() result. """
+        with self.lock:
+            self.entries[path] = [stat.st_mtime, stat.st_size, value]
+            self.changed = True
+
+    def lookup(self, path, work_out):
+        """ Return the value for path, calling work_out(path) to work it out
+        if we don't have a current one. Raises OSError if the file is gone.
+        """
+        stat = os.stat(path)
+        found, value = self.get(path, stat)
+        if not found:
+            value = work_out(path)
+            self.put(path, stat, value)
+        return value
+
+    def save(self):
+        """ Write the manifest out, if anything changed. """
+        with self.lock:
+            if not self.changed:
+                return
+            data = {"version": self.version, "files": self.entries}
+            # write to a temporary file first so we never leave a half
+            # written manifest behind
+            temp_filename = self.filename + ".tmp"
+            with open(temp_filename, "w") as manifest_file:
+                json.dump(data, manifest_file)
+            os.rename(temp_filename, self.filename)
+            self.changed = False
@@ -0,0 +1,164 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math # log-spaced histogram buckets
+import threading # commands are sent and states received on different threads
+from collections import deque # commands waiting for the robot to react
+from tega_teleop_clock import monotonic
+
+class latency_histogram(object):
+    """ Histogram of latencies with log-spaced buckets, each about 5% wider
+    than the last, from 0.1 ms up to a couple of minutes. Adding a sample is
+    O(1) and memory doesn't grow with the number of samples.
+    """
+
+    smallest = 0.0001 # seconds
+    growth = 1.05
+    num_buckets = 300
+
+    def __init__(self):
+        self.counts = [0] * self.num_buckets
+        self.count = 0
+        self.total = 0.0
+        self.largest = 0.0
+
+    def add(self, latency):
+        """ Add a latency, in seconds. """
+        if latency <= self.smallest:
+            bucket = 0
+        else:
+            bucket = min(self.num_buckets - 1, int(math.log(
+                latency / self.smallest, self.growth)) + 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += latency
+        self.largest = max(self.largest, latency)
+
+    def percentile(self, p):
+        """ Return the latency below which p percent of samples fall (to
+        within a bucket), or None if there are no samples.
+        """
+        if self.count == 0:
+            return None
+        target = self.count * p / 100.0
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                # report the top of the bucket, but never more than the
+                # largest latency we actually saw
+                return min(self.largest,
+                        self.smallest * self.growth ** bucket)
+        return self.largest
+
+
+class tega_latency_tracker(object):
+    """ Measures how long it takes from sending a command to the robot
+    reporting that it started doing it: for speech and entrained speech, the
+    next time TegaState.is_playing_sound turns true; for motions, the next
+    time TegaState.doing_motion turns true. Keeps a histogram per kind of
+    command.
+    """
+
+    # what each kind of command waits for
+    SOUND = "sound"
+    MOTION = "motion"
+
+    # forget commands the robot never reacted to after this long (seconds)
+    stale_after = 30.0
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # commands sent that are waiting for the robot, oldest first
+        self.pending = {self.SOUND: deque(), self.MOTION: deque()}
+        # latency histogram for each kind of command
+        self.histograms = {}
+        # commands the robot never reacted to
+        self.unmatched = 0
+        # last state we got from the robot
+        self.playing_sound = False
+        self.doing_motion = False
+
+    def command_sent(self, kind, waits_for):
+        """ Stamp a command of some kind (e.g., "speech") that was just sent,
+        and that waits for SOUND or MOTION.
+        """
+        now = monotonic()
+        with self.lock:
+            pending = self.pending[waits_for]
+            self.drop_stale(pending, now)
+            pending.append((kind, now))
+
+    def state_received(self, playing_sound, doing_motion):
+        """ Match a new robot state against the commands waiting for it. """
+        now = monotonic()
+        with self.lock:
+            if playing_sound and not self.playing_sound:
+                self.match(self.pending[self.SOUND], now)
+            if doing_motion and not self.doing_motion:
+                self.match(self.pending[self.MOTION], now)
+            self.playing_sound = playing_sound
+            self.doing_motion = doing_motion
+
+    def match(self, pending, now):
+        """ The robot started something: the oldest command waiting for it is
+        what it started.
+        """
+        self.drop_stale(pending, now)
+        if pending:
+            kind, sent = pending.popleft()
+            histogram = self.histograms.get(kind)
+            if histogram is None:
+                histogram = self.histograms[kind] = latency_histogram()
+            histogram.add(now - sent)
+
+    def drop_stale(self, pending, now):
+        """ Forget commands that have been waiting too long. """
+        while pending and now - pending[0][1] > self.stale_after:
+            pending.popleft()
+            self.unmatched += 1
+
+    def summary(self):
+        """ Return (kind, count, p50, p95, p99) for each kind of command,
+        with latencies in seconds.
+        """
+        with self.lock:
+            return [(kind, h.count, h.percentile(50), h.percentile(95),
+                h.percentile(99)) for kind, h in sorted(
+                    self.histograms.items())]
+
+    def report(self):
+        """ Return a printable report of the latencies so far. """
+        lines = ["Command latency (send -> robot starts), ms:"]
+        for kind, count, p50, p95, p99 in self.summary():
+            lines.append("  {:<14} n={:<5} p50={:7.1f} p95={:7.1f} "
+                    "p99={:7.1f}".format(kind, count, p50 * 1000,
+                        p95 * 1000, p99 * 1000))
+        lines.append("  never started: {}".format(self.unmatched))
+        return "\n".join(lines)
+
+    def print_report(self):
+        """ Print the latencies so far (e.g., on exit). """
+        print(self.report())
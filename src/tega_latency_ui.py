@@ -0,0 +1,82 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from PySide import QtGui, QtCore # basic GUI stuff
+
+class tega_latency_ui(QtGui.QWidget):
+    """ Shows how long it takes the robot to start doing the commands we send
+    it, per kind of command, and how long commands wait in the command queue,
+    per priority.
+    """
+
+    def __init__(self, latency_tracker, ui_state, scheduler=None,
+            refresh_interval=1000):
+        """ Make a small table of latency percentiles, refreshed every
+        refresh_interval milliseconds. Headings are grayed out through
+        ui_state (see tega_ui_state.py).
+        """
+        super(tega_latency_ui, self).__init__()
+        self.latency_tracker = latency_tracker
+        self.scheduler = scheduler
+
+        # put labels in a box
+        self.latency_box = QtGui.QGroupBox(self)
+        self.latency_layout = QtGui.QGridLayout(self.latency_box)
+        self.latency_box.setTitle("Latency (ms)")
+        for col, heading in enumerate(["command", "n", "p50", "p95", "p99"]):
+            label = QtGui.QLabel(heading, self.latency_box)
+            ui_state.set(label, "minor")
+            self.latency_layout.addWidget(label, 0, col)
+        # one row of labels per kind of command, added as kinds show up
+        self.rows = {}
+        # how many commands are waiting in the queue
+        if self.scheduler is not None:
+            self.depth_label = QtGui.QLabel("queue: -", self.latency_box)
+            self.latency_layout.addWidget(self.depth_label, 0, 5)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(refresh_interval)
+
+    def refresh(self):
+        """ Update the table with the latest latencies. """
+        summary = self.latency_tracker.summary()
+        if self.scheduler is not None:
+            # queue waits go in the same table, e.g., "wait script"
+            summary += [("wait " + name, count, p50, p95, p99) for
+                    name, count, p50, p95, p99 in self.scheduler.summary()]
+            self.depth_label.setText("queue: {depth}".format(
+                **self.scheduler.stats()))
+        for kind, count, p50, p95, p99 in summary:
+            if kind not in self.rows:
+                row = len(self.rows) + 1
+                self.rows[kind] = [QtGui.QLabel(self.latency_box)
+                        for col in range(5)]
+                for col, label in enumerate(self.rows[kind]):
+                    self.latency_layout.addWidget(label, row, col)
+            texts = [kind, str(count), "{:.0f}".format(p50 * 1000),
+                    "{:.0f}".format(p95 * 1000), "{:.0f}".format(p99 * 1000)]
+            for label, text in zip(self.rows[kind], texts):
+                label.setText(text)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys # exit
+import time # stamps
+import argparse # command line args
+from io import BytesIO # serialize into memory
+import rospy # ROS time
+from r1d1_msgs.msg import TegaAction # ROS msgs to talk to Tega
+from sar_opal_msgs.msg import OpalCommand # ROS msgs to talk to tablet
+from std_msgs.msg import Header # standard ROS msg header
+from geometry_msgs.msg import Vector3 # lookat coordinates
+from tega_message_factory import tega_message_factory
+from tega_teleop_clock import monotonic
+
+def fresh_motion(motion, stamp):
+    """ Build a motion message the way tega_teleop_ros used to. """
+    msg = TegaAction()
+    msg.header = Header()
+    msg.header.stamp = stamp
+    msg.motion = motion
+    return msg
+
+def fresh_lookat(lookat, stamp):
+    """ Build a lookat message the way tega_teleop_ros used to. """
+    msg = TegaAction()
+    msg.header = Header()
+    msg.header.stamp = stamp
+    msg.do_look_at = True
+    msg.look_at = lookat
+    return msg
+
+def fresh_opal(command, stamp):
+    """ Build a tablet command message the way tega_teleop_ros used to. """
+    msg = OpalCommand()
+    msg.header = Header()
+    msg.header.stamp = stamp
+    msg.command = command
+    return msg
+
+def time_per_message(build, commands, repeat, serialize):
+    """ Return the average time, in microseconds, to build (and optionally
+    serialize) a message for each command, repeat times over.
+    """
+    stamp = rospy.Time.from_sec(time.time())
+    started = monotonic()
+    for i in range(repeat):
+        for command in commands:
+            msg = build(command, stamp)
+            if serialize:
+                msg.serialize(BytesIO())
+    return (monotonic() - started) / (repeat * len(commands)) * 1e6
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='''Compare building each motion, lookat, and tablet
+            command message from scratch against patching the stamp of a
+            prebuilt template (see tega_message_factory.py), with and without
+            serializing it. Needs the ROS msgs, but not roscore.
+            ''')
+    parser.add_argument("-r", "--repeat", type=int, default=2000,
+            help="Build each message this many times over.")
+    args = parser.parse_args()
+
+    factory = tega_message_factory()
+    motions = [getattr(TegaAction, attr) for attr in dir(TegaAction)
+            if attr.startswith("MOTION_")]
+    # the lookats from the lookat panel
+    lookats = [Vector3(-15, 20, 40), Vector3(0, 20, 40), Vector3(15, 20, 40),
+            Vector3(0, 40, 40), Vector3(0, 10, 40)]
+    opal_commands = [OpalCommand.NEXT_PAGE, OpalCommand.PREV_PAGE,
+            OpalCommand.ENABLE_TOUCH, OpalCommand.DISABLE_TOUCH,
+            OpalCommand.FADE_SCREEN, OpalCommand.UNFADE_SCREEN,
+            OpalCommand.REQUEST_KEYFRAME]
+
+    # microseconds per message
+    print("{:<8} {:>5} {:>10} {:>10} {:>12} {:>12}".format("message", "n",
+        "fresh", "template", "fresh+ser", "template+ser"))
+    for name, commands, fresh, template in (
+            ("motion", motions, fresh_motion, factory.motion),
+            ("lookat", lookats, fresh_lookat, factory.lookat),
+            ("opal", opal_commands, fresh_opal, factory.opal)):
+        print("{:<8} {:>5} {:>8.2f}us {:>8.2f}us {:>10.2f}us {:>10.2f}us"
+                .format(name, len(commands),
+                    time_per_message(fresh, commands, args.repeat, False),
+                    time_per_message(template, commands, args.repeat, False),
+                    time_per_message(fresh, commands, args.repeat, True),
+                    time_per_message(template, commands, args.repeat, True)))
+    sys.exit(0)
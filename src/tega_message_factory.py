@@ -0,0 +1,105 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from r1d1_msgs.msg import TegaAction # ROS msgs to talk to Tega
+from sar_opal_msgs.msg import OpalCommand # ROS msgs to talk to tablet
+from std_msgs.msg import Header # standard ROS msg header
+
+class tega_message_factory(object):
+    """ Keeps one prebuilt message per fixed command (each motion, lookat,
+    and tablet command), so sending one of them only patches the stamp
+    instead of building a new message and header every click.
+
+    A template is handed out again the next time the same command is sent,
+    so messages must be published before the next one of the same kind is
+    asked for, and nothing may hold on to one afterwards. tega_teleop_ros
+    only asks for and publishes them on the command scheduler's worker
+    thread; the session recorder serializes them, and the log formats them,
+    before returning, so neither keeps a reference.
+    """
+
+    # The lookat panel only has a handful of points, but headless clients
+    # can look anywhere, so we only keep templates for this many points and
+    # build messages for any others from scratch.
+    max_lookats = 32
+
+    def __init__(self):
+        # (kind, command) -> prebuilt message
+        self.templates = {}
+        # how many of the templates are lookats
+        self.lookats = 0
+        # counters, so we can see how often templates are reused
+        self.built = 0
+        self.reused = 0
+
+    def template(self, key, build):
+        """ Return the template for a command, building it the first time. """
+        msg = self.templates.get(key)
+        if msg is None:
+            msg = build()
+            msg.header = Header()
+            self.templates[key] = msg
+            self.built += 1
+        else:
+            self.reused += 1
+        return msg
+
+    def motion(self, motion, stamp):
+        """ Return a TegaAction message doing a motion, with the given stamp. """
+        msg = self.template(("motion", motion), lambda: TegaAction(
+            motion=motion))
+        msg.header.stamp = stamp
+        return msg
+
+    def lookat(self, lookat, stamp):
+        """ Return a TegaAction message looking at a point, with the given
+        stamp.
+        """
+        key = ("lookat", lookat.x, lookat.y, lookat.z)
+        build = lambda: TegaAction(do_look_at=True, look_at=lookat)
+        if key in self.templates:
+            msg = self.template(key, build)
+        elif self.lookats < self.max_lookats:
+            self.lookats += 1
+            msg = self.template(key, build)
+        else:
+            # we have kept enough points already
+            msg = build()
+            msg.header = Header()
+            self.built += 1
+        msg.header.stamp = stamp
+        return msg
+
+    def opal(self, command, stamp):
+        """ Return an OpalCommand message, with the given stamp. """
+        msg = self.template(("opal", command), lambda: OpalCommand(
+            command=command))
+        msg.header.stamp = stamp
+        return msg
+
+    def stats(self):
+        """ Return how many templates were built and how often reused. """
+        return {"templates": len(self.templates), "built": self.built,
+                "reused": self.reused}
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os # file checks
+import sys # exit code
+import glob # find scripts
+import wave # check audio files
+import difflib # suggest motion names
+import argparse # command line args
+from multiprocessing.pool import ThreadPool # check files in parallel
+from tega_script_compiler import tega_script_compiler, motion_constants, \
+    ACTION_SPEECH, ACTION_MOTION, VISEME_URI
+from tega_file_manifest import tega_file_manifest
+from tega_teleop_config import load_config
+
+class preflight_problem(object):
+    """ Something wrong with one option of one line of a script. """
+    __slots__ = ("filename", "line", "option", "message")
+
+    def __init__(self, filename, line, option, message):
+        self.filename = filename
+        # line index in the script, and the compiled option (for its label)
+        self.line = line
+        self.option = option
+        self.message = message
+
+    def __str__(self):
+        return "{}:{}: {}: {}".format(self.filename, self.line + 1,
+                self.option.label, self.message)
+
+
+class tega_preflight(object):
+    """ Checks compiled scripts before a session, so a missing audio or viseme
+    file or a misspelled motion shows up now rather than live, when the robot
+    sits through the speaking timeout instead of playing it.
+
+    Files are checked in parallel with a thread pool (so large audio corpora
+    on slow disks or network mounts go quickly), and the results are kept in a
+    manifest keyed by file modification time, so the next run only checks
+    files that changed.
+    """
+
+    # bump this when the checks change, so old manifests are ignored
+    manifest_version = 1
+
+    def __init__(self, check_files=True, check_motions=True,
+            manifest_filename="tega_preflight_manifest.json", threads=8):
+        """ Set up the checks. Only check audio and viseme files if they are
+        read on this machine (i.e., with the audio entrainer; otherwise the
+        robot reads audio from its own disk). Only check motions if the
+        scripts were compiled against the real TegaAction constants.
+        """
+        self.check_files = check_files
+        self.check_motions = check_motions
+        self.manifest = tega_file_manifest(manifest_filename,
+                self.manifest_version)
+        self.threads = threads
+
+    def check(self, scripts, motions=None):
+        """ Check a list of compiled scripts. motions maps the known motion
+        names to constants, for suggesting what a misspelled motion should
+        be. Returns a list of problems, in script order.
+        """
+        # check every distinct file once, in parallel
+        file_problems = {}
+        if self.check_files:
+            paths = set()
+            for script in scripts:
+                for line in script.lines:
+                    for option in line:
+                        for action in option.actions:
+                            if action.kind == ACTION_SPEECH:
+                                paths.add(action.audio)
+                                paths.add(action.visemes)
+            paths = sorted(paths)
+            pool = ThreadPool(self.threads)
+            try:
+                file_problems = dict(zip(paths,
+                    pool.map(self.check_file, paths)))
+            finally:
+                pool.close()
+                pool.join()
+            self.manifest.save()
+
+        problems = []
+        for script in scripts:
+            for i, line in enumerate(script.lines):
+                for option in line:
+                    for action in option.actions:
+                        message = None
+                        if action.kind == ACTION_SPEECH:
+                            message = (file_problems.get(action.audio)
+                                    or file_problems.get(action.visemes))
+                        elif (action.kind == ACTION_MOTION
+                                and self.check_motions
+                                and not action.known_motion):
+                            message = self.unknown_motion(action.name,
+                                    motions)
+                        if message is not None:
+                            problems.append(preflight_problem(
+                                script.filename, i, option, message))
+        return problems
+
+    def unknown_motion(self, name, motions):
+        """ Say what's wrong with a motion name we don't know. """
+        message = "unknown motion " + name
+        if motions:
+            # e.g., MOTION_PUZZLED -> PUZZLED
+            if name.startswith("MOTION_") and name[len("MOTION_"):] in motions:
+                close = [name[len("MOTION_"):]]
+            else:
+                close = difflib.get_close_matches(name, motions.keys(), 1)
+            if close:
+                message += " (did you mean {}?)".format(close[0])
+        return message
+
+    def check_file(self, path):
+        """ Check one audio or viseme file. Returns a short message saying
+        what's wrong with it, or None if it's fine.
+        """
+        if path.startswith(VISEME_URI):
+            return self.check_cached_visemes(path)
+        path = os.path.expanduser(path)
+        try:
+            if path.endswith(".wav"):
+                return self.manifest.lookup(path, self.check_wav)
+            return self.manifest.lookup(path, self.check_visemes)
+        except (IOError, OSError):
+            return "missing " + path
+
+    def check_wav(self, path):
+        """ Check that an audio file is a wav file with some audio in it. """
+        try:
+            wav = wave.open(path, "rb")
+            try:
+                if wav.getnframes() == 0:
+                    return "empty audio file " + path
+            finally:
+                wav.close()
+        except (wave.Error, EOFError) as e:
+            return "bad audio file {} ({})".format(path,
+                    str(e) or "truncated")
+        return None
+
+    def check_cached_visemes(self, uri):
+        """ Check that a viseme file is in its viseme cache. """
+        # only import the cache reader if we use it
+        from tega_viseme_cache import open_cache
+        cache_filename, name = uri[len(VISEME_URI):].split("#", 1)
+        try:
+            if name not in open_cache(os.path.expanduser(cache_filename)):
+                return "{} not in viseme cache {}".format(name,
+                        cache_filename)
+        except (IOError, OSError, ValueError) as e:
+            return "bad viseme cache {} ({})".format(cache_filename, e)
+        return None
+
+    def check_visemes(self, path):
+        """ Check that a viseme file has something in it. """
+        if os.path.getsize(path) == 0:
+            return "empty viseme file " + path
+        return None
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='''Check scripts before a session: that every audio and
+            viseme file exists and can be read, and that every motion is a
+            TegaAction motion constant. Reports one problem per line and exits
+            with status 1 if there were any.
+            ''')
+    parser.add_argument("scripts", nargs="*", help="Scripts to check "
+            "(default: everything in ../scripts and ../static_scripts).")
+    parser.add_argument("-c", "--config", default="tega_teleop_config.json",
+            help="Config file to read audio_base_dir, viseme_base_dir, and "
+            "viseme_cache from.")
+    parser.add_argument("-a", "--audio-dir", dest="audio_dir",
+            help="Directory of audio files (default: from the config). Like "
+            "audio_base_dir, it goes in front of each file name as is, so "
+            "end it with a /.")
+    parser.add_argument("-v", "--viseme-dir", dest="viseme_dir",
+            help="Directory of viseme files (default: from the config). Like "
+            "viseme_base_dir, it goes in front of each file name as is.")
+    parser.add_argument("-j", "--threads", type=int, default=8,
+            help="How many files to check at once.")
+    parser.add_argument("-m", "--manifest",
+            default="tega_preflight_manifest.json",
+            help="Where to remember files already checked.")
+    args = parser.parse_args()
+
+    # build paths exactly as the speech panel does, so we check the files
+    # it will actually send
+    config = load_config(args.config)
+    audio_dir = (args.audio_dir if args.audio_dir is not None
+            else config.get("audio_base_dir", ""))
+    viseme_dir = (args.viseme_dir if args.viseme_dir is not None
+            else config.get("viseme_base_dir", ""))
+
+    # we can only check motions against the real TegaAction constants
+    try:
+        motions = motion_constants()
+    except ImportError:
+        print("Warning: can't import r1d1_msgs, so not checking motions.")
+        motions = {}
+    # the files only live on this machine when we know where they are
+    if not audio_dir:
+        print("Warning: no audio dir, so not checking audio or viseme files.")
+
+    compiler = tega_script_compiler(audio_dir, viseme_dir, motions,
+            config.get("viseme_cache", ""))
+    preflight = tega_preflight(bool(audio_dir), bool(motions), args.manifest,
+            args.threads)
+
+    script_filenames = args.scripts or sorted(glob.glob('../scripts/*.txt')
+            + glob.glob('../static_scripts/*.txt'))
+    scripts = []
+    for script_filename in script_filenames:
+        if "static_scripts" in script_filename:
+            scripts.append(compiler.compile_static_script(script_filename))
+        else:
+            scripts.append(compiler.compile_script(script_filename))
+
+    problems = preflight.check(scripts, motions)
+    for problem in problems:
+        print(problem)
+    print("{} problems in {} scripts".format(len(problems), len(scripts)))
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,152 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading # re-checking once a debounce time has passed
+from tega_teleop_clock import monotonic
+
+class tega_redirect_advisor(object):
+    """ Watches the child's attention and decides when to suggest playing a
+    redirect, as soon as the child disengages rather than when the next line
+    is sent.
+
+    The suggestion has hysteresis, so it doesn't flicker when the child
+    glances away and back: it is raised when the child has looked away for
+    raise_after seconds straight, or attended less than raise_below of the
+    timeline's running window; and only cleared once the child has attended
+    for clear_after seconds straight and at least clear_above of the window.
+    on_change(suggest) is only called when the suggestion changes.
+    """
+
+    # how often to re-check while waiting for the attention ratio to recover
+    recheck_interval = 0.5
+    # how much sooner than the armed re-check a new one has to be for us to
+    # replace it, in seconds
+    rearm_slack = 0.05
+
+    def __init__(self, timelines, on_change, raise_below=0.4, clear_above=0.7,
+            raise_after=1.5, clear_after=1.0):
+        """ Set up the advisor. timelines returns the attention timelines of
+        the children we are sending to (with several, we go by the least
+        attentive one). on_change is called from whichever thread noticed the
+        change.
+        """
+        self.timelines = timelines
+        self.on_change = on_change
+        self.raise_below = raise_below
+        self.clear_above = clear_above
+        self.raise_after = raise_after
+        self.clear_after = clear_after
+        self.lock = threading.Lock()
+        self.suggest = False
+        # how many times the suggestion changed
+        self.changes = 0
+        # re-checks once the child has been away (or back) long enough, and
+        # when (on the monotonic clock)
+        self.timer = None
+        self.deadline = None
+
+    def watch(self, timeline):
+        """ Re-check whenever a sample is added to a timeline. """
+        timeline.listeners.append(lambda attending, when: self.update(when))
+
+    def update(self, now=None):
+        """ Re-check whether to suggest a redirect. """
+        states = []
+        ratios = []
+        for timeline in self.timelines():
+            states.append(timeline.state(now))
+            ratio = timeline.ratio(now)
+            if ratio is not None:
+                ratios.append(ratio)
+        if not states:
+            return
+        ratio = min(ratios) if ratios else None
+        # how long the least attentive child has been away, or if they are
+        # all attending, how long since the last one came back
+        away = [seconds for attending, seconds in states if not attending]
+        back = min(seconds for attending, seconds in states) if not away \
+            else None
+        with self.lock:
+            wait = None
+            if not self.suggest:
+                if away and max(away) >= self.raise_after:
+                    self.change(True)
+                elif ratio is not None and ratio < self.raise_below:
+                    self.change(True)
+                elif away:
+                    # check again once the child has been away long enough
+                    wait = self.raise_after - max(away)
+            else:
+                if back is not None and back >= self.clear_after:
+                    if ratio is None or ratio >= self.clear_above:
+                        self.change(False)
+                    else:
+                        # the ratio goes up for as long as the child keeps
+                        # attending, even if no samples come in
+                        wait = self.recheck_interval
+                elif back is not None:
+                    wait = self.clear_after - back
+            self.arm(wait)
+
+    def change(self, suggest):
+        """ Change the suggestion and say so. Call with the lock held. """
+        self.suggest = suggest
+        self.changes += 1
+        self.on_change(suggest)
+
+    def arm(self, wait):
+        """ Make sure we re-check within wait seconds (if wait isn't None).
+        Samples come in many times a second, mostly asking for the same
+        re-check, so we keep the re-check already armed unless it would be
+        too late. One that turns out to be early or unneeded just re-checks
+        and arms again if need be. Call with the lock held.
+        """
+        if wait is None:
+            return
+        deadline = monotonic() + wait
+        if self.timer is not None:
+            if self.deadline <= deadline + self.rearm_slack:
+                return
+            self.timer.cancel()
+        self.deadline = deadline
+        self.timer = threading.Timer(wait, self.recheck)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def recheck(self):
+        """ Called by the re-check timer. """
+        with self.lock:
+            if self.timer is threading.current_thread():
+                self.timer = None
+                self.deadline = None
+        self.update()
+
+    def stop(self):
+        """ Cancel any pending re-check. """
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+                self.deadline = None
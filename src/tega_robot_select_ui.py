@@ -0,0 +1,75 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from PySide import QtGui # basic GUI stuff
+
+class tega_robot_select_ui(QtGui.QWidget):
+    """ Checkboxes for picking which robots the controls send to. """
+
+    def __init__(self, group):
+        """ Make one checkbox per robot in the group, plus one for all. """
+        super(tega_robot_select_ui, self).__init__()
+        self.group = group
+
+        # put checkboxes in a box
+        self.select_box = QtGui.QGroupBox(self)
+        self.select_layout = QtGui.QHBoxLayout(self.select_box)
+        self.select_box.setTitle("Send to robots")
+
+        self.all_checkbox = QtGui.QCheckBox("all", self.select_box)
+        self.all_checkbox.setChecked(True)
+        self.all_checkbox.clicked.connect(self.on_all_clicked)
+        self.select_layout.addWidget(self.all_checkbox)
+
+        self.checkboxes = []
+        for name in self.group.names():
+            checkbox = QtGui.QCheckBox(name, self.select_box)
+            checkbox.setChecked(True)
+            checkbox.clicked.connect(self.on_robot_clicked)
+            self.select_layout.addWidget(checkbox)
+            self.checkboxes.append(checkbox)
+
+    def on_all_clicked(self, checked):
+        """ Target all robots (unchecking it goes back to the robots we are
+        sending to now, since we always send to at least one).
+        """
+        for checkbox in self.checkboxes:
+            checkbox.setChecked(checked)
+        self.on_robot_clicked()
+
+    def on_robot_clicked(self):
+        """ Send to the checked robots from now on. """
+        names = [checkbox.text() for checkbox in self.checkboxes
+                if checkbox.isChecked()]
+        if names:
+            self.group.set_targets(names)
+        else:
+            # we have to send to someone: put back the robots we're sending
+            # to now
+            targets = set(member.namespace for member in self.group.targets)
+            for checkbox in self.checkboxes:
+                checkbox.setChecked(checkbox.text() in targets)
+            names = list(targets)
+        self.all_checkbox.setChecked(len(names) == len(self.checkboxes))
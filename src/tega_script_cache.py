@@ -0,0 +1,87 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os # file modification times
+import threading # compiling scripts in the background
+
+class tega_script_cache(object):
+    """ Keeps compiled scripts around, keyed by path and checked against the
+    file's modification time and size, so switching back and forth between
+    scripts doesn't read or parse them again unless they changed on disk.
+    """
+
+    def __init__(self, compiler):
+        """ Set up the cache. Scripts are compiled with the given compiler. """
+        self.compiler = compiler
+        # (path, is static script) -> (mtime, size, compiled script)
+        self.scripts = {}
+        # only one compile at a time, since compiles share the compiler
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, static=False):
+        """ Return the compiled script at path, compiling it only if we don't
+        have it or it changed since we did. Raises IOError/OSError if the
+        file can't be read.
+        """
+        stat = os.stat(path)
+        key = (path, static)
+        with self.lock:
+            entry = self.scripts.get(key)
+            if (entry is not None and entry[0] == stat.st_mtime
+                    and entry[1] == stat.st_size):
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            if static:
+                script = self.compiler.compile_static_script(path)
+            else:
+                script = self.compiler.compile_script(path)
+            self.scripts[key] = (stat.st_mtime, stat.st_size, script)
+            return script
+
+    def forget(self, path):
+        """ Drop a script (e.g., one deleted from disk) from the cache. """
+        with self.lock:
+            self.scripts.pop((path, False), None)
+            self.scripts.pop((path, True), None)
+
+    def warm(self, paths, static=False):
+        """ Compile scripts in the background, so they're ready when picked. """
+        thread = threading.Thread(target=self.warm_now, args=(paths, static),
+                name="tega_script_cache")
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def warm_now(self, paths, static=False):
+        """ Compile scripts now, skipping ones that can't be read. """
+        for path in paths:
+            try:
+                self.get(path, static)
+            except (IOError, OSError):
+                # it will fail again, loudly, if someone picks it
+                pass
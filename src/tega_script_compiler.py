@@ -0,0 +1,182 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+""" Compiles script files into lines of options, each holding pre-classified
+actions, so clicking a speech button is just a dispatch with no string work.
+"""
+
+# kinds of actions
+ACTION_SPEECH = 0
+ACTION_MOTION = 1
+ACTION_PARTICIPANT_TURN = 2
+
+PARTICIPANT_TURN = "PARTICIPANT_TURN"
+
+# viseme files in a viseme cache are named with URIs like this (see
+# tega_viseme_cache.py)
+VISEME_URI = "tvc://"
+
+
+class script_action(object):
+    """ One item to send: a speech file, a motion, or a participant turn. """
+    __slots__ = ("kind", "name", "motion", "known_motion", "audio", "visemes")
+
+    def __init__(self, kind, name, motion=None, known_motion=False,
+            audio=None, visemes=None):
+        # what kind of action this is (ACTION_*)
+        self.kind = kind
+        # the item as written in the script
+        self.name = name
+        # for motions, the TegaAction motion constant to send, and whether we
+        # actually found a constant for it
+        self.motion = motion
+        self.known_motion = known_motion
+        # for speech, the full audio and viseme paths (used with the audio
+        # entrainer; the robot itself just gets the name)
+        self.audio = audio
+        self.visemes = visemes
+
+
+class script_option(object):
+    """ One speech button: the label to show and the actions to send. """
+    __slots__ = ("label", "actions")
+
+    def __init__(self, label, actions):
+        self.label = label
+        self.actions = actions
+
+
+class compiled_script(object):
+    """ A compiled script: a tuple of lines, each a tuple of options. """
+    __slots__ = ("filename", "lines")
+
+    def __init__(self, filename, lines):
+        self.filename = filename
+        self.lines = lines
+
+    def __len__(self):
+        return len(self.lines)
+
+
+# motion names -> TegaAction motion constants, looked up the first time we
+# compile a script
+_motion_constants = None
+
+def motion_constants():
+    """ Return a dict mapping the motion names used in scripts (e.g., LAUGH)
+    to the TegaAction motion constants (e.g., TegaAction.MOTION_LAUGH).
+    """
+    global _motion_constants
+    if _motion_constants is None:
+        from r1d1_msgs.msg import TegaAction # ROS msgs
+        _motion_constants = {}
+        for attr in dir(TegaAction):
+            if attr.startswith("MOTION_"):
+                value = getattr(TegaAction, attr)
+                # scripts may use the constant's name without the MOTION_
+                # prefix, or its value
+                _motion_constants[attr[len("MOTION_"):]] = value
+                _motion_constants[value.replace("\"", "")] = value
+    return _motion_constants
+
+
+class tega_script_compiler(object):
+    """ Compiles script files, sharing identical actions between lines. """
+
+    def __init__(self, audio_base_dir="", viseme_base_dir="", motions=None,
+            viseme_cache=""):
+        """ Set up a compiler. The base dirs are prepended to audio filenames
+        (see the README on using the audio entrainer). motions maps motion
+        names to TegaAction constants; by default we read them from TegaAction.
+        If we have a viseme cache, speech points at its visemes in the cache
+        instead of at the viseme files.
+        """
+        self.audio_base_dir = audio_base_dir
+        self.viseme_base_dir = viseme_base_dir
+        self.motions = motions
+        self.viseme_cache = viseme_cache
+        # item text -> action, so repeated items (PARTICIPANT_TURN, common
+        # motions, repeated audio) are stored once
+        self.actions = {}
+
+    def compile_action(self, item):
+        """ Classify one comma-separated item from a script. """
+        action = self.actions.get(item)
+        if action is not None:
+            return action
+        if item == PARTICIPANT_TURN:
+            action = script_action(ACTION_PARTICIPANT_TURN, PARTICIPANT_TURN)
+        # if this item is an animation (all caps), it's a motion
+        elif item.isupper():
+            if self.motions is None:
+                self.motions = motion_constants()
+            motion = self.motions.get(item)
+            action = script_action(ACTION_MOTION, item,
+                    motion if motion is not None else item, motion is not None)
+        # Otherwise, it's a speech filename. We assume that corresponding
+        # viseme files have the same name but with a .txt extension, and are
+        # located at the viseme filepath.
+        else:
+            visemes = item.replace(".wav", ".txt")
+            if self.viseme_cache:
+                visemes = "{}{}#{}".format(VISEME_URI, self.viseme_cache,
+                        visemes)
+            else:
+                visemes = self.viseme_base_dir + visemes
+            action = script_action(ACTION_SPEECH, item,
+                    audio=self.audio_base_dir + item, visemes=visemes)
+        self.actions[item] = action
+        return action
+
+    def compile_actions(self, items):
+        """ Compile a comma-separated list of items into a tuple of actions. """
+        return tuple(self.compile_action(item) for item in items.split(","))
+
+    def compile_script(self, script_filename):
+        """ Compile a script file, one line of options per line of file. """
+        lines = []
+        with open(script_filename) as script_file:
+            for line in script_file:
+                parts = line.strip().split("\t")
+                # filename1 label1 filename2 label2 ... etc.
+                lines.append(tuple(
+                        script_option(intern(parts[i+1]),
+                            self.compile_actions(parts[i]))
+                        for i in range(0, len(parts) - 1, 2)))
+        return compiled_script(script_filename, tuple(lines))
+
+    def compile_static_script(self, script_filename):
+        """ Compile a static script file. Each line has one option, with the
+        filename as the label if no label was provided. Only the first item
+        in each line is sent.
+        """
+        lines = []
+        with open(script_filename) as static_script:
+            for line in static_script:
+                parts = line.rstrip().split("\t")
+                lines.append((script_option(
+                        intern(parts[1] if len(parts) > 1 else parts[0]),
+                        (self.compile_action(parts[0].split(",")[0]),)),))
+        return compiled_script(script_filename, tuple(lines))
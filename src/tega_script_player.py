@@ -0,0 +1,200 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading # the control server calls in from several threads
+from tega_speech_sequencer import speech_job
+from tega_command_scheduler import SCRIPT, REDIRECT
+
+class tega_script_player(object):
+    """ Keeps track of where we are in a script and sends script lines to
+    the speech sequencer, with no GUI, so the speech panel and the headless
+    control server (see tega_control_server.py) play scripts the same way.
+    """
+
+    def __init__(self, sequencer, script_cache, pipeline=None):
+        """ Set up the player. Options are sent through the sequencer, and
+        scripts are loaded through the script cache. If we have an entrainer
+        pipeline (see tega_entrainer_pipeline.py), it is told what we send and
+        which line we're on, so it can prepare speech ahead of time.
+        """
+        self.sequencer = sequencer
+        self.script_cache = script_cache
+        self.pipeline = pipeline
+        self.lock = threading.RLock()
+        # compiled script: a tuple of lines, each a tuple of speech options
+        self.script = None
+        self.static_script = None
+        self.current_line = 0
+        # when paused, the script doesn't move on (or back)
+        self.paused = False
+
+    def load_script(self, script_filename):
+        """ Load a script and go to its first line. Raises IOError/OSError if
+        it can't be read.
+        """
+        with self.lock:
+            self.script = self.script_cache.get(script_filename)
+            self.current_line = 0
+            self.prepare_ahead()
+            return self.script
+
+    def load_static_script(self, script_filename):
+        """ Load a static script (the "always there" options). """
+        with self.lock:
+            self.static_script = self.script_cache.get(script_filename,
+                    static=True)
+            return self.static_script
+
+    def toggle_pause(self):
+        """ Pause or unpause moving through the script. Returns whether we're
+        paused now.
+        """
+        with self.lock:
+            self.paused = not self.paused
+            return self.paused
+
+    def stop(self):
+        """ Stop sending (see tega_speech_sequencer.interrupt). Returns (jobs
+        dropped, commands cancelled).
+        """
+        with self.lock:
+            return self.sequencer.interrupt()
+
+    def beginning(self):
+        """ Go to the first line of the script. Returns why we can't, or
+        None.
+        """
+        with self.lock:
+            if self.script is None:
+                return "No script loaded."
+            self.current_line = 0
+            self.prepare_ahead()
+            return None
+
+    def end(self):
+        """ Go to the last line of the script. Returns why we can't, or
+        None.
+        """
+        with self.lock:
+            if self.script is None:
+                return "No script loaded."
+            self.current_line = len(self.script) - 1
+            self.prepare_ahead()
+            return None
+
+    def back(self):
+        """ Go to the previous line. Returns why we can't, or None. """
+        with self.lock:
+            if self.script is None:
+                return "No script loaded."
+            if self.paused:
+                return "Script paused."
+            if self.current_line <= 0:
+                return "At beginning."
+            self.current_line -= 1
+            self.prepare_ahead()
+            return None
+
+    def forward(self):
+        """ Go to the next line. Returns why we can't, or None. """
+        with self.lock:
+            if self.script is None:
+                return "No script loaded."
+            if self.paused:
+                return "Script paused."
+            if self.current_line >= len(self.script) - 1:
+                return "At end."
+            self.current_line += 1
+            self.prepare_ahead()
+            return None
+
+    def option_at(self, line, i):
+        """ Return option i of a script line, or None if the line has no
+        such option (e.g., fewer options, or a negative i).
+        """
+        options = self.script.lines[line]
+        return options[i] if 0 <= i < len(options) else None
+
+    def send(self, option, option_num, speaker_age=5, entrain=False):
+        """ Hand an option's compiled actions (speech and/or animations) to
+        the sequencer, which sends a command for each one once the robot is
+        ready. Static script options (option_num -1, e.g., redirects) go
+        ahead of any script lines still waiting.
+        """
+        with self.lock:
+            if self.pipeline is not None:
+                self.pipeline.sending(option.actions, speaker_age, entrain)
+            self.sequencer.submit(speech_job(option.actions, option_num,
+                speaker_age, entrain, REDIRECT if option_num < 0 else SCRIPT))
+            # e.g., after a redirect, we're still on the same line, so get
+            # its first option ready again
+            self.prepare_ahead()
+
+    def prepare_ahead(self):
+        """ Have the entrainer pipeline prepare the current line's first
+        option, which is most likely to be sent next.
+        """
+        if self.pipeline is not None and self.script:
+            option = self.option_at(self.current_line, 0)
+            self.pipeline.expect(option.actions if option is not None else ())
+
+    def play_option(self, i, speaker_age=5, entrain=False):
+        """ Send option i of the current line; if it's the first option and
+        we're not paused, move on to the next line (if there is one). Returns
+        why we can't send it, or None once it's sent.
+        """
+        with self.lock:
+            if self.script is None:
+                return "No script loaded."
+            option = self.option_at(self.current_line, i)
+            if option is None:
+                return "No option {} on this line.".format(i)
+            self.send(option, i, speaker_age, entrain)
+            # the option went out either way, so staying put on the last line
+            # isn't an error (state() says where we are)
+            if i == 0 and not self.paused:
+                self.forward()
+            return None
+
+    def play_static_option(self, i, speaker_age=5, entrain=False):
+        """ Send option i of the static script. Returns why we can't, or
+        None.
+        """
+        with self.lock:
+            if (self.static_script is None
+                    or not 0 <= i < len(self.static_script)):
+                return "No static option {}.".format(i)
+            self.send(self.static_script.lines[i][0], -1, speaker_age,
+                    entrain)
+            return None
+
+    def state(self):
+        """ Return where we are in the script. """
+        with self.lock:
+            return {"script": self.script.filename if self.script else None,
+                    "line": self.current_line,
+                    "lines": len(self.script) if self.script else 0,
+                    "paused": self.paused,
+                    "busy": self.sequencer.is_busy()}
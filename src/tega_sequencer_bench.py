@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys # exit and argv
+import glob # find scripts
+import argparse # command line args
+import threading # waiting for the sequencer
+from tega_teleop_flags import tega_teleop_flags
+from tega_script_compiler import tega_script_compiler
+from tega_speech_sequencer import tega_speech_sequencer, speech_job
+from tega_script_player import tega_script_player
+from tega_entrainer_pipeline import tega_entrainer_pipeline
+from tega_entrainer_sim import tega_entrainer_sim
+from tega_teleop_clock import monotonic
+from tega_sim import tega_sim_robot
+
+class stub_robot(object):
+    """ Stands in for tega_teleop_ros: takes the same send_* calls the
+    sequencer makes and passes them to a simulated robot, which plays back a
+    scripted tega state, so the sequencer can run with no roscore and no robot.
+    """
+
+    def __init__(self, flags, start_latency, speech_duration, motion_duration,
+            entrainer_time=0.0):
+        self.flags = flags
+        self.sent = 0
+        # report state straight to the flags, as on_tega_state_msg would; no
+        # need for a regular heartbeat since nothing else reads the state
+        self.robot = tega_sim_robot(flags.set_tega_state,
+                default_motion_duration=motion_duration,
+                default_speech_duration=speech_duration,
+                latency=start_latency, state_rate=0)
+        # speech for the entrainer goes through a stand-in entrainer, which
+        # takes entrainer_time to process each item
+        self.entrainer = tega_entrainer_sim(
+                lambda audio, visemes: self.robot.handle_action(audio, ""),
+                entrainer_time)
+        self.entrainer.start()
+
+    def send_speech_message(self, speech, priority=None, on_drop=None):
+        self.sent += 1
+        self.robot.handle_action(speech, "")
+
+    def send_entrain_audio_message(self, speech, visemes, age, entrain,
+            priority=None, on_drop=None):
+        self.sent += 1
+        self.entrainer.entrain_audio(speech, visemes, age, entrain)
+
+    def send_entrain_prepare_message(self, speech, visemes, age, entrain,
+            priority=None):
+        self.sent += 1
+        self.entrainer.prepare(speech, visemes, age, entrain)
+
+    def send_entrain_cancel_message(self, speech, priority=None):
+        self.sent += 1
+        self.entrainer.cancel(speech)
+
+    def send_motion_message(self, motion, priority=None, on_drop=None):
+        self.sent += 1
+        self.robot.handle_action("", motion)
+
+    def send_interaction_state_message(self, is_turn, priority=None):
+        self.sent += 1
+
+    # the rest don't change the robot's state
+
+    def cancel_commands(self, priority=None):
+        # commands go straight to the robot, so there's never any waiting
+        return 0
+
+    def set_targets(self, names):
+        # there's just the one robot, with no namespace (like a single
+        # tega_teleop_ros), so check the names as a group would
+        if "" not in names:
+            raise ValueError("no robots named {}".format(", ".join(names)
+                or "(none)"))
+
+    def send_lookat_message(self, lookat, priority=None):
+        self.sent += 1
+
+    def send_opal_message(self, command, priority=None):
+        self.sent += 1
+
+    def set_volume(self, volume):
+        self.sent += 1
+
+    def set_fidgets(self, fidget):
+        self.sent += 1
+
+
+def run_script(script, args):
+    """ Run every line of a compiled script through a fresh sequencer, as if
+    the operator clicked the first option on each line as soon as the robot
+    was ready. Returns (elapsed seconds, sequencer timings).
+    """
+    flags = tega_teleop_flags()
+    robot = stub_robot(flags, args.start_latency, args.speech_duration,
+            args.motion_duration, args.entrainer_time)
+    done = threading.Event()
+    line_done = threading.Semaphore(0)
+    def on_job_done(job):
+        if job.option_num < 0:
+            done.set()
+        line_done.release()
+    sequencer = tega_speech_sequencer(robot, flags, args.use_entrainer,
+            on_job_done=on_job_done)
+    sequencer.start()
+    # lines are sent through a player, as the speech panel does, so the
+    # entrainer pipeline (if any) gets to prepare upcoming lines
+    pipeline = None
+    if args.use_entrainer and args.pipeline > 0:
+        pipeline = tega_entrainer_pipeline(robot, args.pipeline)
+    player = tega_script_player(sequencer, None, pipeline)
+    player.script = script
+    started = monotonic()
+    for i in range(args.repeat):
+        player.beginning()
+        for line in script.lines:
+            # like the speech panel, move on to the next line right after
+            # sending one
+            if line:
+                player.send(line[0], 0)
+            player.forward()
+            if line and args.lockstep:
+                # like an operator, click the next line only once the robot
+                # has been sent this one
+                line_done.acquire()
+    # a marker job, so we know when everything before it is done
+    sequencer.submit(speech_job((), -1))
+    done.wait()
+    elapsed = monotonic() - started
+    sequencer.stop()
+    sequencer.worker.join()
+    robot.entrainer.stop()
+    if args.use_entrainer and args.verbose:
+        robot.entrainer.print_stats()
+        if pipeline is not None:
+            pipeline.print_stats()
+    return elapsed, sequencer.timings
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='''Benchmark the speech sequencer without a display,
+            roscore, or robot. Runs each script through the sequencer against
+            a stub robot that reports a scripted tega state, and reports lines
+            per second, per-item dispatch overhead, and time spent waiting on
+            the robot.
+            ''')
+    parser.add_argument("scripts", nargs="*", help="Scripts to run "
+            "(default: everything in ../scripts and ../static_scripts).")
+    parser.add_argument("-r", "--repeat", type=int, default=10,
+            help="Run each script this many times over.")
+    parser.add_argument("--start-latency", type=float, default=0.001,
+            help="Seconds the stub robot takes to start a command.")
+    parser.add_argument("--speech-duration", type=float, default=0.002,
+            help="Seconds the stub robot spends playing each audio file.")
+    parser.add_argument("--motion-duration", type=float, default=0.002,
+            help="Seconds the stub robot spends doing each motion.")
+    parser.add_argument("-e", "--use-entrainer", action='store_true',
+            default=False, dest="use_entrainer",
+            help="Send speech through the audio entrainer path.")
+    parser.add_argument("--entrainer-time", type=float, default=0.0,
+            help="Seconds the stand-in entrainer takes to process each "
+            "audio file (with -e).")
+    parser.add_argument("-p", "--pipeline", type=int, default=0,
+            help="Prepare this many upcoming audio files in the entrainer "
+            "ahead of time (with -e).")
+    parser.add_argument("-l", "--lockstep", action='store_true',
+            default=False, help="Send each line only once the one before "
+            "it has been sent, as an operator would, instead of queueing the "
+            "whole script at once.")
+    parser.add_argument("-v", "--verbose", action='store_true',
+            default=False, help="Print the entrainer's counters too.")
+    args = parser.parse_args()
+
+    scripts = args.scripts or sorted(glob.glob('../scripts/*.txt')
+            + glob.glob('../static_scripts/*.txt'))
+    # don't need the real motion constants, so don't import ROS msgs
+    compiler = tega_script_compiler(motions={})
+
+    print("{:<45} {:>6} {:>9} {:>10} {:>10} {:>10} {:>10}".format("script",
+        "items", "lines/s", "dispatch", "idle wait", "speak wait",
+        "move wait"))
+    for script_filename in scripts:
+        if "static_scripts" in script_filename:
+            script = compiler.compile_static_script(script_filename)
+        else:
+            script = compiler.compile_script(script_filename)
+        elapsed, timings = run_script(script, args)
+        items = max(timings["items"], 1)
+        print("{:<45} {:>6} {:>9.1f} {:>8.1f}us {:>9.3f}s {:>9.3f}s "
+                "{:>9.3f}s".format(script_filename[-45:], timings["items"],
+                    (timings["jobs"] - 1) / elapsed,
+                    timings["dispatch"] / items * 1e6, timings["idle_wait"],
+                    timings["speaking_wait"], timings["motion_wait"]))
+
+    # let any leftover timers finish before exiting
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread():
+            thread.join()
+    sys.exit(0)
@@ -0,0 +1,162 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import json # topic definitions
+import struct # record headers
+import threading # background writer
+import Queue # records waiting to be written
+from io import BytesIO # serialize messages into memory
+from tega_teleop_clock import monotonic
+
+# record directions
+OUT = 0 # a message we published
+IN = 1 # a message we received
+TOPIC = 2 # defines a topic id: the payload is json with the topic, its type,
+          # and the namespace of the station it belongs to
+
+# every session file starts with this
+MAGIC = b"TEGASES1"
+
+# each record: monotonic time (double), direction (byte), topic id (ushort),
+# payload length (uint), then the payload
+RECORD = struct.Struct("<dBHI")
+
+
+class tega_session_recorder(object):
+    """ Records every message we publish and receive to a compact,
+    append-only binary file, so a session can be replayed later (see
+    tega_session_replay.py). Messages are stored as ROS serializes them, with
+    a monotonic timestamp; each topic's name and type is written once, the
+    first time it shows up, and records refer to it by a small id.
+
+    Messages are serialized by the caller (so a message that is reused, like
+    the prebuilt templates, is recorded as it was sent) and written by a
+    background thread, in batches.
+    """
+
+    # the most records we write before flushing the file
+    batch_size = 256
+
+    def __init__(self, filename):
+        """ Set up the recorder. Call start() to open the file. """
+        self.filename = filename
+        self.records = Queue.Queue()
+        self.lock = threading.Lock()
+        # topic name -> id
+        self.topics = {}
+        self.recorded = 0
+        self.session_file = None
+        self.worker = threading.Thread(target=self.run,
+                name="tega_session_recorder")
+        self.worker.daemon = True
+
+    def start(self):
+        """ Open the file and start the writer thread. """
+        self.session_file = open(self.filename, "wb")
+        self.session_file.write(MAGIC)
+        self.worker.start()
+
+    def stop(self):
+        """ Write whatever is still queued and stop the writer thread. """
+        if self.worker.is_alive():
+            self.records.put(None)
+            self.worker.join()
+
+    def record(self, direction, topic, msg, namespace=""):
+        """ Record a message published (OUT) or received (IN) on a topic.
+        namespace is the namespace of the station the topic belongs to, if
+        any (the topic name includes it).
+        """
+        buff = BytesIO()
+        msg.serialize(buff)
+        data = buff.getvalue()
+        # several threads record at once; stamp and queue each record under
+        # the lock, so records are written in time order (which replay
+        # relies on) and a topic's definition always comes first
+        with self.lock:
+            now = monotonic()
+            topic_id = self.topics.get(topic)
+            if topic_id is None:
+                topic_id = self.topics[topic] = len(self.topics)
+                definition = json.dumps({"topic": topic, "type": msg._type,
+                    "namespace": namespace})
+                self.records.put(RECORD.pack(now, TOPIC, topic_id,
+                    len(definition)) + definition)
+            self.records.put(RECORD.pack(now, direction, topic_id, len(data))
+                    + data)
+            self.recorded += 1
+
+    def run(self):
+        """ Writer loop: write everything queued, then flush once. """
+        stopping = False
+        while not stopping:
+            batch = [self.records.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self.records.get_nowait())
+            except Queue.Empty:
+                pass
+            if None in batch:
+                stopping = True
+                batch = [record for record in batch if record is not None]
+            self.session_file.write(b"".join(batch))
+            self.session_file.flush()
+        self.session_file.close()
+
+    def stats(self):
+        """ Return how many messages we recorded, on how many topics. """
+        with self.lock:
+            return {"recorded": self.recorded, "topics": len(self.topics)}
+
+
+def read_session(filename, strip_namespace=False):
+    """ Yield (time, direction, topic, type, payload) for each message in a
+    session file, in order. If strip_namespace is set, topics are given
+    without the namespace of the station they were recorded for (e.g.,
+    "tega" rather than "station1/tega"). A truncated last record (e.g., from
+    a crash) is skipped.
+    """
+    topics = {}
+    with open(filename, "rb") as session_file:
+        if session_file.read(len(MAGIC)) != MAGIC:
+            raise IOError("not a tega session file: " + filename)
+        while True:
+            header = session_file.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            when, direction, topic_id, length = RECORD.unpack(header)
+            payload = session_file.read(length)
+            if len(payload) < length:
+                return
+            if direction == TOPIC:
+                topic = json.loads(payload)
+                namespace = topic.get("namespace")
+                if strip_namespace and namespace and topic["topic"].startswith(
+                        namespace + "/"):
+                    topic["topic"] = topic["topic"][len(namespace) + 1:]
+                topics[topic_id] = topic
+            else:
+                topic = topics[topic_id]
+                yield when, direction, topic["topic"], topic["type"], payload
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys # exit
+import time # sleeping until each message is due
+import argparse # command line args
+from tega_teleop_clock import monotonic
+from tega_session_recorder import read_session, OUT
+
+class tega_session_replay(object):
+    """ Replays the messages we published in a recorded session (see
+    tega_session_recorder.py), keeping their original timing, sped up or
+    slowed down by a factor. Messages are handed to publish(topic, type,
+    payload) still serialized; the caller decides where they go.
+    """
+
+    def __init__(self, publish, speed=1.0, topics=None, offset=0.0):
+        """ Set up the replay. A speed of 2 replays twice as fast; a speed of
+        0 replays as fast as we can. topics limits the replay to those topics;
+        offset skips that many seconds at the start of the session.
+        """
+        self.publish = publish
+        self.speed = speed
+        self.topics = set(topics) if topics else None
+        self.offset = offset
+        self.stopping = False
+        # how many messages we replayed and how late they were, in seconds
+        self.replayed = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    def run(self, records):
+        """ Replay (time, direction, topic, type, payload) records, e.g.,
+        from read_session(). Only messages we published are replayed.
+        """
+        first = None
+        started = None
+        for when, direction, topic, msg_type, payload in records:
+            if self.stopping:
+                break
+            if first is None:
+                first = when + self.offset
+            if (direction != OUT or when < first
+                    or (self.topics is not None and topic not in self.topics)):
+                continue
+            if started is None:
+                started = monotonic()
+            due = started
+            if self.speed > 0:
+                due += (when - first) / self.speed
+                # sleep until the message is due; we don't sleep at all if
+                # we're already late, so lag doesn't pile up
+                delay = due - monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            self.publish(topic, msg_type, payload)
+            lag = max(monotonic() - due, 0.0)
+            self.replayed += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def print_report(self):
+        """ Print how many messages we replayed and how late they went out.
+        """
+        print("Replayed {} messages; lag mean {:.1f} ms, max {:.1f} ms".format(
+            self.replayed,
+            1000.0 * self.total_lag / self.replayed if self.replayed else 0.0,
+            1000.0 * self.max_lag))
+
+
+def print_summary(records):
+    """ Print how long a session lasted and how many messages went each way
+    on each topic.
+    """
+    counts = {}
+    first = last = None
+    for when, direction, topic, msg_type, payload in records:
+        if first is None:
+            first = when
+        last = when
+        key = (topic, msg_type, "out" if direction == OUT else "in")
+        count, size = counts.get(key, (0, 0))
+        counts[key] = (count + 1, size + len(payload))
+    if first is None:
+        print("Empty session.")
+        return
+    print("Session lasted {:.1f} s".format(last - first))
+    for (topic, msg_type, direction), (count, size) in sorted(
+            counts.iteritems()):
+        print("  {:<3} {:<32} {:<28} {:>7} msgs {:>9} bytes".format(
+            direction, topic, msg_type, count, size))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='''Replay a session recorded by tega_teleop (see the
+            "session_record" config option). Re-publishes every message the
+            teleop published, with its original timing, at the original speed
+            or faster, to a real robot or to tega_sim.py. Messages the teleop
+            received (the robot's state, the child's attention) are recorded
+            too, but aren't replayed; use --summary to see them.
+            ''')
+    parser.add_argument("session", help="Session file to replay.")
+    parser.add_argument("-s", "--speed", type=float, default=1.0,
+            help="Replay this many times faster than real time (0 replays "
+            "as fast as possible).")
+    parser.add_argument("-t", "--topic", action="append", dest="topics",
+            help="Only replay this topic (may be given more than once).")
+    parser.add_argument("-o", "--offset", type=float, default=0.0,
+            help="Skip this many seconds at the start of the session.")
+    parser.add_argument("-n", "--namespace", default="",
+            help="Replay under this namespace instead of the one recorded "
+            "(e.g., to drive another station). Give -t topics without the "
+            "recorded namespace.")
+    parser.add_argument("--summary", action='store_true', default=False,
+            help="Print what the session holds instead of replaying it.")
+    args = parser.parse_args()
+
+    try:
+        if args.summary:
+            print_summary(read_session(args.session))
+            sys.exit(0)
+    except (IOError, OSError) as e:
+        print("Could not read session file: {}".format(e))
+        sys.exit(1)
+
+    # only import ROS once we know we're replaying
+    import rospy # ROS
+    import roslib.message # look up message classes by type name
+
+    rospy.init_node('tega_session_replay', anonymous=True)
+    # with a namespace, swap it in for whichever one the topics were recorded
+    # under (e.g., station1/tega becomes station2/tega, not
+    # station2/station1/tega)
+    prefix = args.namespace + "/" if args.namespace else ""
+    strip = bool(args.namespace)
+
+    # Advertise every topic we will replay up front, and give subscribers a
+    # moment to connect, so the first messages aren't lost or late.
+    publishers = {}
+    try:
+        for when, direction, topic, msg_type, payload in read_session(
+                args.session, strip):
+            if (direction == OUT and topic not in publishers
+                    and (not args.topics or topic in args.topics)):
+                msg_class = roslib.message.get_message_class(msg_type)
+                publishers[topic] = (rospy.Publisher(prefix + topic,
+                    msg_class, queue_size = 10), msg_class)
+    except (IOError, OSError) as e:
+        print("Could not read session file: {}".format(e))
+        sys.exit(1)
+    rospy.sleep(1.0)
+
+    def publish(topic, msg_type, payload):
+        pub, msg_class = publishers[topic]
+        msg = msg_class()
+        msg.deserialize(payload)
+        # stamp messages with when they are replayed, not when they were sent
+        if hasattr(msg, "header"):
+            msg.header.stamp = rospy.Time.now()
+        pub.publish(msg)
+
+    replay = tega_session_replay(publish, args.speed, args.topics, args.offset)
+    rospy.on_shutdown(lambda: setattr(replay, "stopping", True))
+    try:
+        replay.run(read_session(args.session, strip))
+    except (IOError, OSError) as e:
+        print("Could not read session file: {}".format(e))
+        sys.exit(1)
+    replay.print_report()
+    sys.exit(0)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys # exit and argv
+import json # motion durations file
+import wave # unreadable audio files
+import random # jitter and drops
+import argparse # command line args
+import threading # timers and locks
+from tega_audio_index import read_wav_duration
+
+class tega_sim_robot(object):
+    """ A stand-in for a Tega robot: given the commands a TegaAction message
+    carries, reports the state a real robot would report, i.e., playing sound
+    for as long as the wav file lasts and doing a motion for as long as the
+    motion lasts. Latency, jitter, and dropped commands can be injected.
+
+    This doesn't know about ROS, so it can also stand in for the robot in
+    headless benchmarks; it calls publish_state(is_playing_sound,
+    doing_motion) whenever the state changes and at state_rate Hz.
+    """
+
+    def __init__(self, publish_state, audio_dir="", motion_durations=None,
+            default_motion_duration=2.0, default_speech_duration=2.0,
+            latency=0.0, jitter=0.0, drop_rate=0.0, state_rate=10.0,
+            seed=None):
+        """ Set up the simulated robot. Durations, latency, and jitter are in
+        seconds; drop_rate is the chance (0-1) that a command is ignored.
+        """
+        self.publish_state = publish_state
+        self.audio_dir = audio_dir
+        self.motion_durations = motion_durations or {}
+        self.default_motion_duration = default_motion_duration
+        self.default_speech_duration = default_speech_duration
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.state_rate = state_rate
+        self.random = random.Random(seed)
+
+        # current state; a new sound or motion replaces the one in progress,
+        # so each has a counter to tell stale end timers to do nothing
+        self.lock = threading.Lock()
+        self.playing_sound = False
+        self.doing_motion = False
+        self.sound_count = 0
+        self.motion_count = 0
+        # wav filename -> duration, so we only read each header once
+        self.wav_durations = {}
+
+        # what we did, for anyone curious
+        self.received = 0
+        self.dropped = 0
+
+        self.stopping = threading.Event()
+        self.heartbeat = None
+        if state_rate > 0:
+            self.heartbeat = threading.Thread(target=self.run_heartbeat,
+                    name="tega_sim_heartbeat")
+            self.heartbeat.daemon = True
+
+    def start(self):
+        """ Start publishing state at state_rate Hz. """
+        if self.heartbeat is not None:
+            self.heartbeat.start()
+
+    def stop(self):
+        """ Stop publishing state. """
+        self.stopping.set()
+
+    def run_heartbeat(self):
+        """ Publish the current state regularly, as the real robot does. """
+        while not self.stopping.wait(1.0 / self.state_rate):
+            with self.lock:
+                self.publish_state(self.playing_sound, self.doing_motion)
+
+    def handle_action(self, wav_filename, motion):
+        """ React to a TegaAction: play a wav file and/or do a motion. """
+        self.received += 1
+        if not (wav_filename or motion):
+            # lookats, volume, fidgets, etc. don't change the state we report
+            return
+        if self.drop_rate and self.random.random() < self.drop_rate:
+            self.dropped += 1
+            return
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter,
+            self.jitter))
+        if wav_filename:
+            self.after(delay, self.start_sound,
+                    self.wav_duration(wav_filename))
+        if motion:
+            self.after(delay, self.start_motion, self.motion_durations.get(
+                motion.replace("\"", ""), self.default_motion_duration))
+
+    def after(self, delay, function, *args):
+        """ Call function(*args) after delay seconds. """
+        if delay <= 0:
+            function(*args)
+            return
+        timer = threading.Timer(delay, function, args)
+        timer.daemon = True
+        timer.start()
+
+    def start_sound(self, duration):
+        with self.lock:
+            self.sound_count += 1
+            self.playing_sound = True
+            self.publish_state(self.playing_sound, self.doing_motion)
+        self.after(duration, self.end_sound, self.sound_count)
+
+    def end_sound(self, count):
+        with self.lock:
+            if count == self.sound_count:
+                self.playing_sound = False
+                self.publish_state(self.playing_sound, self.doing_motion)
+
+    def start_motion(self, duration):
+        with self.lock:
+            self.motion_count += 1
+            self.doing_motion = True
+            self.publish_state(self.playing_sound, self.doing_motion)
+        self.after(duration, self.end_motion, self.motion_count)
+
+    def end_motion(self, count):
+        with self.lock:
+            if count == self.motion_count:
+                self.doing_motion = False
+                self.publish_state(self.playing_sound, self.doing_motion)
+
+    def wav_duration(self, wav_filename):
+        """ Return how long a wav file plays for, in seconds, reading its
+        header from the audio dir. If we can't, use the default duration.
+        """
+        duration = self.wav_durations.get(wav_filename)
+        if duration is None:
+            try:
+                duration = read_wav_duration(self.audio_dir + wav_filename)
+            except (IOError, OSError, EOFError, wave.Error):
+                duration = self.default_speech_duration
+            self.wav_durations[wav_filename] = duration
+        return duration
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='''Simulate a Tega robot. Subscribes to TegaAction messages
+            on the "tega" topic and publishes TegaState messages on the
+            "tega_state" topic: playing sound for as long as each wav file
+            lasts and doing a motion for as long as each motion lasts, with
+            optional latency, jitter, and dropped commands. Use it to test
+            tega_teleop without a robot.
+            ''')
+    parser.add_argument("-a", "--audio-dir", default="",
+            help="Directory to find the wav files sent to the robot in.")
+    parser.add_argument("-m", "--motion-durations", default=None,
+            help="JSON file mapping motion names to durations in seconds.")
+    parser.add_argument("--motion-duration", type=float, default=2.0,
+            help="Seconds to do motions not in the motion durations file.")
+    parser.add_argument("--speech-duration", type=float, default=2.0,
+            help="Seconds to play wav files we can't find or read.")
+    parser.add_argument("-l", "--latency", type=float, default=0.05,
+            help="Seconds before starting each command.")
+    parser.add_argument("-j", "--jitter", type=float, default=0.0,
+            help="Up to this many seconds are added to or taken off the "
+            "latency at random.")
+    parser.add_argument("-d", "--drop-rate", type=float, default=0.0,
+            help="Chance (0-1) of ignoring each command.")
+    parser.add_argument("-r", "--state-rate", type=float, default=10.0,
+            help="How many times a second to publish the state.")
+    args = parser.parse_args()
+
+    motion_durations = {}
+    if args.motion_durations:
+        with open(args.motion_durations) as json_file:
+            motion_durations = json.load(json_file)
+
+    # only import ROS once we know we're running the node
+    import rospy # ROS
+    from r1d1_msgs.msg import TegaAction # ROS msgs to get commands
+    from r1d1_msgs.msg import TegaState # ROS msgs to report state
+
+    rospy.init_node('tega_sim', anonymous=True)
+    state_pub = rospy.Publisher('tega_state', TegaState, queue_size = 10)
+
+    def publish_state(is_playing_sound, doing_motion):
+        msg = TegaState()
+        msg.is_playing_sound = is_playing_sound
+        msg.doing_motion = doing_motion
+        state_pub.publish(msg)
+
+    robot = tega_sim_robot(publish_state, args.audio_dir, motion_durations,
+            args.motion_duration, args.speech_duration, args.latency,
+            args.jitter, args.drop_rate, args.state_rate)
+    rospy.Subscriber('tega', TegaAction,
+            lambda msg: robot.handle_action(msg.wav_filename, msg.motion))
+    robot.start()
+    rospy.spin()
+    robot.stop()
+    print("Received {} commands, dropped {}.".format(robot.received,
+        robot.dropped))
+    sys.exit(0)
@@ -0,0 +1,402 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading # worker thread and deadline timers
+import Queue # jobs waiting to be sent
+import itertools # keep jobs of the same priority in order
+from tega_script_compiler import ACTION_MOTION, ACTION_PARTICIPANT_TURN
+from tega_teleop_clock import monotonic
+from tega_command_scheduler import SAFETY, SCRIPT, REDIRECT
+from tega_teleop_flags import sound_started, motion_started
+
+class speech_job(object):
+    """ One click on a speech button: the compiled actions to send, in order,
+    plus everything we need to know to send them that has to be read on
+    the GUI thread at the time of the click.
+    """
+    __slots__ = ("items", "option_num", "speaker_age", "entrain", "priority",
+            "generation")
+
+    def __init__(self, items, option_num, speaker_age=5, entrain=False,
+            priority=SCRIPT):
+        self.items = items
+        self.option_num = option_num
+        self.speaker_age = speaker_age
+        self.entrain = entrain
+        # how urgent the job is (see tega_command_scheduler.py): e.g., a
+        # redirect goes ahead of script lines still waiting to be sent
+        self.priority = priority
+        # set by the sequencer, so it can tell jobs that were submitted
+        # before it was interrupted (see tega_speech_sequencer.interrupt)
+        self.generation = None
+
+
+class tega_speech_sequencer(object):
+    """ Sends script items to the robot from a worker thread, one item at a
+    time, waiting for the robot to finish each item before sending the next.
+
+    Each item goes through a small state machine:
+        WAIT_FOR_IDLE -> SEND -> WAIT_FOR_START -> (next item)
+    The worker never polls: it waits on the flags' state_changed condition,
+    which the tega state callback notifies, so the next item goes out as soon
+    as the robot reports that it is idle.
+    """
+
+    # states of the per-item state machine
+    WAIT_FOR_IDLE = "waiting for robot to be idle"
+    SEND = "sending"
+    WAIT_FOR_START = "waiting for robot to start"
+    DONE = "done"
+
+    def __init__(self, ros_node, flags, use_entrainer, on_status=None,
+            on_job_done=None, durations=None):
+        """ Set up the sequencer. The callbacks are called from the worker
+        thread, so anything touching the GUI has to be marshalled back to the
+        GUI thread by the caller. durations is an audio index (see
+        tega_audio_index.py) telling us how long speech plays for, if we have
+        one.
+        """
+        # we send messages through the ros node
+        self.ros_node = ros_node
+        # shared flags telling us whether the robot is speaking or moving
+        self.flags = flags
+        # if we are using the audio entrainer, speech goes there instead of
+        # directly to the robot
+        self.use_entrainer = use_entrainer
+        # called with a short message whenever we send something
+        self.on_status = on_status
+        # called with the job when all its items have been sent
+        self.on_job_done = on_job_done
+
+        # how long to wait for the robot to start doing what we asked before
+        # giving up and moving on (see wait_for_speaking below)
+        self.speaking_timeout = 15
+        self.motion_timeout = 8
+
+        # If we know how long speech plays for, we can tell when the robot is
+        # stuck much sooner: we give it start_grace seconds plus the duration
+        # to start speaking, and if it's still busy stuck_factor times the
+        # duration plus stuck_grace seconds after it started, we say so.
+        self.durations = durations
+        self.start_grace = 5.0
+        self.stuck_factor = 1.5
+        self.stuck_grace = 2.0
+        # when the robot should be done with what we last sent, if we know
+        self.expected_done = None
+
+        # current state of the state machine, for anyone curious
+        self.state = self.DONE
+
+        # where the worker's time goes, in seconds: sending items, and waiting
+        # for the robot to be idle or to start speaking or moving
+        self.timings = {"jobs": 0, "items": 0, "dispatch": 0.0,
+                "idle_wait": 0.0, "speaking_wait": 0.0, "motion_wait": 0.0,
+                "stuck": 0, "dropped": 0}
+
+        # jobs waiting to be sent, as (priority, sequence number, job), so
+        # more urgent jobs go first and equally urgent ones go in order
+        self.jobs = Queue.PriorityQueue()
+        self.sequence = itertools.count()
+        # bumped every time we are interrupted; jobs submitted before that
+        # aren't sent (or stop being sent)
+        self.generation = 0
+        # the job we are sending, if any
+        self.job = None
+        self.stopping = False
+        self.worker = threading.Thread(target=self.run,
+                name="tega_speech_sequencer")
+        self.worker.daemon = True
+
+    def start(self):
+        """ Start the worker thread. """
+        self.worker.start()
+
+    def stop(self):
+        """ Stop the worker thread after whatever item it is working on. """
+        self.stopping = True
+        self.jobs.put((-1, next(self.sequence), None))
+        with self.flags.state_changed:
+            self.flags.state_changed.notify_all()
+
+    def submit(self, job):
+        """ Queue a job to be sent once everything before it (and anything
+        more urgent) is done.
+        """
+        job.generation = self.generation
+        self.jobs.put((job.priority, next(self.sequence), job))
+
+    def interrupt(self):
+        """ Stop sending: drop the jobs still waiting, stop sending the rest
+        of the one being sent, and cancel commands that haven't been
+        published yet. The robot finishes whatever it's already doing.
+        Returns (jobs dropped, commands cancelled).
+        """
+        with self.flags.state_changed:
+            self.generation += 1
+            # wake the worker if it's waiting on the robot
+            self.flags.state_changed.notify_all()
+        jobs = self.cancel_pending(SAFETY)
+        return jobs, self.ros_node.cancel_commands(SAFETY)
+
+    def interrupted(self):
+        """ Whether the job being sent was submitted before we were last
+        interrupted.
+        """
+        job = self.job
+        return job is not None and job.generation != self.generation
+
+    def cancel_pending(self, priority=REDIRECT):
+        """ Drop queued jobs less urgent than priority that haven't started
+        yet. Returns how many were dropped.
+        """
+        kept = []
+        dropped = 0
+        try:
+            while True:
+                entry = self.jobs.get_nowait()
+                if entry[0] > priority:
+                    dropped += 1
+                else:
+                    kept.append(entry)
+        except Queue.Empty:
+            pass
+        for entry in kept:
+            self.jobs.put(entry)
+        return dropped
+
+    def is_busy(self):
+        """ Whether there are jobs being sent or waiting to be sent. """
+        return self.state != self.DONE or not self.jobs.empty()
+
+    def run(self):
+        """ Worker loop: send each job's items in order. """
+        while not self.stopping:
+            if self.jobs.empty():
+                # nothing else to send yet, so nothing else would notice if
+                # the robot got stuck on the last thing we sent
+                self.check_stuck()
+            job = self.jobs.get()[2]
+            if job is None:
+                break
+            self.job = job
+            for action in job.items:
+                if self.stopping or self.interrupted():
+                    break
+                self.send_item(action, job)
+            self.job = None
+            self.state = self.DONE
+            self.timings["jobs"] += 1
+            if self.on_job_done is not None:
+                self.on_job_done(job)
+
+    def send_item(self, action, job):
+        """ Run one compiled action through the state machine. """
+        # wait until tega is not speaking or moving, then send the next
+        # command
+        self.state = self.WAIT_FOR_IDLE
+        started = monotonic()
+        self.check_stuck()
+        if self.interrupted():
+            return
+        self.wait_for(self.is_idle)
+        if self.interrupted():
+            # we were stopped while waiting, so don't send anything
+            return
+        sending = monotonic()
+        self.timings["idle_wait"] += sending - started
+        self.timings["items"] += 1
+
+        self.state = self.SEND
+        # note how many times each robot has started speaking or moving so
+        # far, so we can tell when they start doing what we are about to send
+        starts = self.flags.start_counts()
+        # if the command scheduler drops what we send (e.g., its queue is
+        # full, or a redirect preempted it), the robot will never start it,
+        # so we shouldn't wait for it to
+        dropped = []
+        def on_drop():
+            with self.flags.state_changed:
+                dropped.append(True)
+                self.flags.state_changed.notify_all()
+
+        kind = action.kind
+        # If this is a participant turn, set the interaction state and if we
+        # are using the audio entrainment module, send a message indicating
+        # that it is the child's turn to speak.
+        if kind == ACTION_PARTICIPANT_TURN:
+            self.ros_node.send_interaction_state_message(True, job.priority)
+            self.report("Sending child turn message.")
+            self.timings["dispatch"] += monotonic() - sending
+
+        # if this is an animation, send a motion command
+        elif kind == ACTION_MOTION:
+            self.ros_node.send_motion_message(action.motion, job.priority,
+                    on_drop)
+            self.report("Sending animation.")
+            self.timings["dispatch"] += monotonic() - sending
+            self.state = self.WAIT_FOR_START
+            self.wait_for_motion(starts, dropped)
+
+        # Otherwise, it's speech. If we are using the audio entrainment
+        # module, send the full audio and viseme paths there; otherwise, send
+        # the filename to the robot using ROS.
+        elif self.use_entrainer:
+            self.ros_node.send_entrain_audio_message(action.audio,
+                    action.visemes, job.speaker_age, job.entrain, job.priority,
+                    on_drop)
+            self.report("Sending entrain speech command.")
+            self.timings["dispatch"] += monotonic() - sending
+            self.state = self.WAIT_FOR_START
+            self.wait_for_speaking(starts, self.speech_duration(action),
+                    dropped)
+        else:
+            # Send directly to the robot.
+            self.ros_node.send_speech_message(action.name, job.priority,
+                    on_drop)
+            self.report("Sending speech command.")
+            self.timings["dispatch"] += monotonic() - sending
+            self.state = self.WAIT_FOR_START
+            self.wait_for_speaking(starts, self.speech_duration(action),
+                    dropped)
+
+    def is_idle(self):
+        """ Whether the robot is neither speaking nor moving. """
+        return not (self.flags.tega_is_playing_sound
+                or self.flags.tega_is_doing_motion)
+
+    def check_stuck(self):
+        """ If we know when the robot should be done with what we last sent,
+        wait until then for it to be idle, and say so if it isn't. We don't
+        give up on it, though: we never talk over the robot.
+        """
+        if self.expected_done is None:
+            return
+        expected_done, self.expected_done = self.expected_done, None
+        idle = self.wait_for(self.is_idle,
+                max(expected_done - monotonic(), 0))
+        if not idle and not self.interrupted() and not self.stopping:
+            self.timings["stuck"] += 1
+            self.report("Robot seems stuck! It should have finished by now.")
+            print("Warning: robot still busy long after it should have "
+                    "finished speaking. Waiting...")
+
+    def speech_duration(self, action):
+        """ Return how long a speech action plays for, or None if we don't
+        know.
+        """
+        if self.durations is None:
+            return None
+        return self.durations.duration(action.audio)
+
+    def report(self, status):
+        """ Tell whoever is listening what we just did. """
+        if self.on_status is not None:
+            self.on_status(status)
+
+    def wait_for(self, predicate, timeout=None):
+        """ Block until predicate() is true, or until the timeout (in seconds)
+        runs out. Returns whether the predicate became true.
+
+        We wake on the flags' state_changed condition. Rather than waiting on
+        the condition with a timeout (which python 2 implements by polling),
+        we arm a timer that notifies the condition when the deadline passes.
+        """
+        condition = self.flags.state_changed
+        expired = [False]
+        timer = None
+        if timeout is not None:
+            def expire():
+                with condition:
+                    expired[0] = True
+                    condition.notify_all()
+            timer = threading.Timer(timeout, expire)
+            timer.daemon = True
+            timer.start()
+        with condition:
+            while not (predicate() or expired[0] or self.stopping
+                    or self.interrupted()):
+                condition.wait()
+            ok = predicate()
+        if timer is not None:
+            timer.cancel()
+        return ok
+
+    def wait_for_speaking(self, starts, duration=None, dropped=()):
+        """ Wait until we hear the robot start playing sound before going on to
+        process the next command and wait for the robot to be done playing
+        sound. We have to wait because when streaming audio through the audio
+        entrainer, it sometimes takes a couple seconds for the audio to be
+        processed and sent to the robot. So we want to make sure we wait until
+        the robot has gotten the command to play audio before we move on to the
+        next item in the script. Otherwise, we might see that the robot isn't
+        playing any sound and send the next item in the script too soon,
+        clobbering the audio that's about to be played as it is sent from the
+        entrainer to the robot.
+
+        starts is the flags' start_counts() from before we sent the speech, so
+        we notice the robot starting even if it is already done.
+        If we know the duration of the speech, we don't wait as long, and we
+        note when the robot should be done with it. dropped becomes non-empty
+        if the speech command was dropped instead of sent.
+        """
+        timeout = self.speaking_timeout
+        if duration is not None:
+            timeout = min(timeout, self.start_grace + duration)
+        started = monotonic()
+        started_speaking = self.wait_for(
+                lambda: sound_started(starts) or dropped,
+                timeout)
+        now = monotonic()
+        self.timings["speaking_wait"] += now - started
+        if dropped:
+            self.timings["dropped"] += 1
+            print("Warning: speech command was dropped before it was sent! "
+                    "Moving on...")
+        elif started_speaking:
+            if duration is not None:
+                self.expected_done = (now + duration * self.stuck_factor
+                        + self.stuck_grace)
+        elif not self.interrupted():
+            print("Warning: timed out waiting for robot to start playing "
+                    "sound! timeout: " + str(timeout) + ". Moving on...")
+
+    def wait_for_motion(self, starts, dropped=()):
+        """ Wait until the robot has started playing an animation before going
+        on to wait for the robot to be done playing it (similar to waiting for
+        sound, above).
+        """
+        started = monotonic()
+        started_moving = self.wait_for(
+                lambda: motion_started(starts) or dropped,
+                self.motion_timeout)
+        self.timings["motion_wait"] += monotonic() - started
+        if dropped:
+            self.timings["dropped"] += 1
+            print("Warning: motion command was dropped before it was sent! "
+                    "Moving on...")
+        elif not started_moving and not self.interrupted():
+            print("Warning: timed out waiting for robot to start doing "
+                    "motion! timeout: " + str(self.motion_timeout)
+                    + ". Moving on...")
@@ -23,33 +23,41 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from PySide import QtGui # basic GUI stuff
+from PySide import QtGui, QtCore # basic GUI stuff
 from tega_teleop_ros import tega_teleop_ros
-import json
+from tega_speech_sequencer import tega_speech_sequencer
+from tega_script_player import tega_script_player
+from tega_redirect_advisor import tega_redirect_advisor
+from tega_entrainer_pipeline import tega_entrainer_pipeline
+from tega_script_compiler import tega_script_compiler
+from tega_script_cache import tega_script_cache
+from tega_audio_prefetcher import tega_audio_prefetcher
+from tega_preflight import tega_preflight
+from tega_audio_index import tega_audio_index
 import glob
+import threading
 from functools import partial
-import time
 
 class tega_speech_ui(QtGui.QWidget):
 
-
-    def __init__(self, ros_node, flags, use_entrainer):
+    def __init__(self, ros_node, flags, use_entrainer, bridge, ui_state,
+            config):
         """ Make controls to trigger speech playback """
         super(tega_speech_ui, self).__init__()
         # get reference to ros node so we can do callbacks to publish
         # messages
         self.ros_node = ros_node
 
+        # updates from the speech sequencer's worker thread come back to the
+        # GUI thread through the bridge
+        self.bridge = bridge
+        # buttons are colored by putting them in states (see tega_ui_state.py)
+        self.ui_state = ui_state
+
         # If we are using the audio entrainment module, speech will be sent
         # there instead of directly to the robot.
         self.use_entrainer = use_entrainer
 
-        # pause indicator
-        self.paused = False
-
-        # script list
-        self.script_list = []
-
         # number of speech options per line in script
         self.options = 1
 
@@ -84,43 +92,71 @@ class tega_speech_ui(QtGui.QWidget):
 
         self.sbutton = QtGui.QPushButton("[jump to start]", self.speech_box)
         self.sbutton.clicked.connect(self.trigger_script_beginning)
-        self.sbutton.setStyleSheet('QPushButton {color: gray;}')
+        self.ui_state.set(self.sbutton, "minor")
         self.speech_layout.addWidget(self.sbutton, 1, 3)
 
         self.ebutton = QtGui.QPushButton("[jump to end]", self.speech_box)
         self.ebutton.clicked.connect(self.trigger_script_end)
-        self.ebutton.setStyleSheet('QPushButton {color: gray;}')
+        self.ui_state.set(self.ebutton, "minor")
         self.speech_layout.addWidget(self.ebutton, 1, 4)
 
         self.label = QtGui.QLabel(self.speech_box)
         self.label.setText("---")
         self.speech_layout.addWidget(self.label, 2, 0, 1, 3)
 
-        json_data=[]
-
-        # read config file to get script name and number of speech options
-        # per line
-        # NOTE move config parsing to main tega_teleop.py and pass script name
-        # and number of options if we add anything not script/speech-related.
-        try:
-            with open("tega_teleop_config.json") as json_file:
-                json_data = json.load(json_file)
-            print ("Config file says: ")
-            print (json_data)
-            if ("options" in json_data):
-                self.options = json_data["options"]
-            else:
-                self.options = 1
-                print ("Could not read number of options! Set to default of 1.")
-            self.audio_base_dir = ""
-            if ("audio_base_dir" in json_data):
-                self.audio_base_dir = json_data["audio_base_dir"]
-            self.viseme_base_dir = ""
-            if ("viseme_base_dir" in json_data):
-                self.viseme_base_dir = json_data["viseme_base_dir"]
-        except:
-            print ("Could not read your json config file! Is it valid json?")
-            pass
+        # add a button to stop sending: drop whatever lines and commands are
+        # still waiting to go out (above the static script buttons)
+        self.stop_button = QtGui.QPushButton("!! stop !!", self.speech_box)
+        self.stop_button.clicked.connect(self.trigger_stop)
+        self.ui_state.set(self.stop_button, "paused")
+        self.speech_layout.addWidget(self.stop_button, 3, 3, 1, 2)
+
+        # where to find audio and viseme files (see config below)
+        self.audio_base_dir = ""
+        self.viseme_base_dir = ""
+        # a viseme cache to point the entrainer at instead of viseme files
+        # (see tega_viseme_cache.py)
+        self.viseme_cache = ""
+        self.speaker_age = 5
+        # how many script lines ahead to warm audio and viseme files for
+        self.prefetch_lines = 3
+        # whether to check scripts when they're loaded and flag ("warn") or
+        # refuse to send ("strict") options with missing files or motions
+        self.preflight_mode = "warn"
+        self.preflight_manifest = "tega_preflight_manifest.json"
+        # where to keep how long each audio file plays for
+        self.audio_index_file = "tega_audio_index.json"
+        # how many upcoming audio files to hand the audio entrainer ahead of
+        # time (see tega_entrainer_pipeline.py); 0 to not
+        self.entrainer_pipeline = 0
+        # when to suggest playing a redirect (see tega_redirect_advisor.py)
+        self.redirect_advice = {}
+
+        # get script name and number of speech options per line from the
+        # config (read in tega_teleop.py)
+        if ("options" in config):
+            self.options = config["options"]
+        else:
+            self.options = 1
+            print ("Could not read number of options! Set to default of 1.")
+        if ("audio_base_dir" in config):
+            self.audio_base_dir = config["audio_base_dir"]
+        if ("viseme_base_dir" in config):
+            self.viseme_base_dir = config["viseme_base_dir"]
+        if ("viseme_cache" in config):
+            self.viseme_cache = config["viseme_cache"]
+        if ("prefetch_lines" in config):
+            self.prefetch_lines = config["prefetch_lines"]
+        if ("preflight" in config):
+            self.preflight_mode = config["preflight"]
+        if ("preflight_manifest" in config):
+            self.preflight_manifest = config["preflight_manifest"]
+        if ("audio_index" in config):
+            self.audio_index_file = config["audio_index"]
+        if ("entrainer_pipeline" in config):
+            self.entrainer_pipeline = config["entrainer_pipeline"]
+        if ("redirect_advice" in config):
+            self.redirect_advice = config["redirect_advice"]
 
         # Add box for setting the speaker's age (used with entrainment module).
         # Also add a box to tell the entrain whether or not to entrain or to
@@ -144,6 +180,37 @@ class tega_speech_ui(QtGui.QWidget):
             self.turn_button.clicked.connect(self.send_participant_turn)
             self.speech_layout.addWidget(self.turn_button, 4, 5, 1, 1)
 
+        # scripts are compiled once when loaded, so clicking a button doesn't
+        # have to do any string work, and compiled scripts are cached until
+        # they change on disk, so switching scripts is instant
+        self.compiler = tega_script_compiler(self.audio_base_dir,
+                self.viseme_base_dir, viseme_cache=self.viseme_cache)
+        self.script_cache = tega_script_cache(self.compiler)
+
+        # Loaded scripts are checked in the background for missing audio or
+        # viseme files and unknown motions, so broken options are flagged
+        # before we get to them. Files are only checked if we read them here,
+        # i.e., with the audio entrainer.
+        self.preflight = None
+        if self.preflight_mode != "off":
+            self.preflight = tega_preflight(self.use_entrainer,
+                    manifest_filename=self.preflight_manifest)
+        # option -> what preflight found wrong with it
+        self.problems = {}
+
+        # If we have the audio files here, index how long each one plays for,
+        # so we can show how long the current line and the rest of the script
+        # will take, and so the sequencer notices a stuck robot sooner.
+        self.audio_index = None
+        if self.audio_base_dir:
+            self.audio_index = tega_audio_index(self.audio_index_file)
+        # compiled script -> how long the rest of the script plays for from
+        # each line
+        self.remaining = {}
+        self.eta_label = QtGui.QLabel(self.speech_box)
+        self.eta_label.setText("")
+        self.speech_layout.addWidget(self.eta_label, 3, 0, 1, 3)
+
         # TODO add the file paths to folders of scripts into config file!
         # make a dropdown list of available scripts to load
         # user picks one, it loads
@@ -151,23 +218,87 @@ class tega_speech_ui(QtGui.QWidget):
         script_box_label.setText("Pick a script to load: ")
         self.speech_layout.addWidget(script_box_label, 0, 0)
         self.script_list_box = QtGui.QComboBox(self)
-        script_file_list = glob.glob('../scripts/*.txt')
-        self.script_list_box.addItems(script_file_list)
         self.script_list_box.activated['QString'].connect(self.load_script)
         self.speech_layout.addWidget(self.script_list_box, 0, 1, 1, 2)
 
         # make a dropdown list of available static scripts to load
         # user picks one, it loads
         self.static_script_list_box = QtGui.QComboBox(self)
-        static_script_file_list = glob.glob('../static_scripts/*.txt')
-        self.static_script_list_box.addItems(static_script_file_list)
         self.static_script_list_box.activated['QString'].connect(
                self.load_static_script)
         self.speech_layout.addWidget(self.static_script_list_box, 0, 3, 1, 2)
 
+        # watch the script folders, so the dropdowns follow scripts being
+        # added, removed, or edited while we're running
+        self.script_dirs = {'../scripts': (self.script_list_box, False),
+                '../static_scripts': (self.static_script_list_box, True)}
+        self.script_watcher = QtCore.QFileSystemWatcher(self)
+        self.script_watcher.directoryChanged.connect(self.refresh_script_list)
+        self.script_watcher.fileChanged.connect(self.on_script_file_changed)
+        for script_dir in self.script_dirs:
+            if QtCore.QDir(script_dir).exists():
+                self.script_watcher.addPath(script_dir)
+            self.refresh_script_list(script_dir)
+
+        # set up the number of option buttons specified in config. These are
+        # made once and reused for every line of every script: each button
+        # always sends whichever option is in its slot on the current line.
+        self.buttons = [None] * self.options
+        # the label each button is showing, so we only update changed ones
+        self.button_labels = [None] * self.options
+        for i in range(0, self.options):
+            self.buttons[i] = QtGui.QPushButton("-", self.speech_box)
+            self.buttons[i].clicked.connect(partial(self.on_option_clicked, i))
+            # add button to layout, each button takes up three columns
+            self.speech_layout.addWidget(self.buttons[i], 4 + i, 0, 1, 3)
+        # make the first option green since clicking it will auto-advance
+        # the script and update the buttons
+        self.ui_state.set(self.buttons[0], "next")
+
+        # When we use the audio entrainer, it reads the audio and viseme files
+        # from this machine, so warm the files for the next few lines in the
+        # background. (Without it, the robot reads audio from its own disk.)
+        self.prefetcher = None
+        if self.use_entrainer and self.prefetch_lines > 0:
+            self.prefetcher = tega_audio_prefetcher(self.prefetch_lines)
+            self.prefetcher.start()
+            self.prefetch_label = QtGui.QLabel(self.speech_box)
+            self.prefetch_label.setText("prefetch: -")
+            self.speech_layout.addWidget(self.prefetch_label, 2, 3, 1, 2)
+
+        # the sequencer sends the items in each script line to the robot in
+        # the background, so the GUI stays responsive while the robot talks
+        self.bridge.connect_handler("speech_status", self.label.setText)
+        self.sequencer = tega_speech_sequencer(self.ros_node, self.flags,
+                self.use_entrainer,
+                on_status=partial(self.bridge.post, "speech_status"),
+                on_job_done=partial(self.bridge.call, self.on_speech_job_done),
+                durations=self.audio_index)
+        self.sequencer.start()
+        # the player keeps track of where we are in the script; with the
+        # audio entrainer, it can also have the entrainer process the lines
+        # coming up while the robot plays the current one
+        self.pipeline = None
+        if self.use_entrainer and self.entrainer_pipeline > 0:
+            self.pipeline = tega_entrainer_pipeline(self.ros_node,
+                    self.entrainer_pipeline)
+        self.player = tega_script_player(self.sequencer, self.script_cache,
+                self.pipeline)
+
+        # The redirect advisor watches every child's attention (as the
+        # samples come in, on rospy's threads) and tells us when to start or
+        # stop suggesting a redirect; the config can tune when it does.
+        self.suggest_redirect = False
+        self.redirect_advisor = tega_redirect_advisor(
+                self.flags.attention_timelines,
+                partial(self.bridge.call, self.on_redirect_advice),
+                **self.redirect_advice)
+        for timeline in self.flags.attention_timelines(targeted=False):
+            self.redirect_advisor.watch(timeline)
+
         # read in script if we can
-        if ("script" in json_data):
-            self.load_script(json_data["script"])
+        if ("script" in config):
+            self.load_script(config["script"])
 
         else:
             print("Could not load script! Is your config file correct?")
@@ -176,8 +307,8 @@ class tega_speech_ui(QtGui.QWidget):
         # set up buttons for speech options that are always available
         # using the "unchanging script" file
         # read in that script
-        if ("static_script" in json_data):
-            self.load_static_script(json_data["static_script"])
+        if ("static_script" in config):
+            self.load_static_script(config["static_script"])
         else:
             print("Should there be a static script in your config file?")
 
@@ -186,58 +317,14 @@ class tega_speech_ui(QtGui.QWidget):
         ''' load a script file '''
         print("loading script...")
         try:
-            # reset list holding the script lines
-            self.script_list = []
-            # read in script
-            script_file = open(script_filename)
-            for line in script_file:
-                self.script_list.append(line.strip().split("\t"))
-            script_file.close()
-
-            # start script line counter
-            self.current_line = 0
-
-            # set up the number of option buttons specified in config:
-            # where we are putting these buttons in the grid
-            col = 0
-            row = 4
-
-            # remove old buttons if there were any
-            try:
-                for b in self.buttons:
-                    self.speech_layout.removeWidget(b)
-                    b.deleteLater()
-                    b = None
-            except AttributeError:
-                print "No script buttons yet... let's set some up."
-
-            # make new array of buttons for the number of speech options
-            # that this new script to load has
-            self.buttons = [None] * self.options
-
-            # each script line follows the pattern:
-            # filename1 label1 filename2 label2 ... etc.
-            for i in range(0, self.options):
-                # set button text to the button label
-                self.buttons[i] = QtGui.QPushButton(self.script_list[
-                self.current_line][i*2+1] if i < len(self.script_list[
-                    self.current_line])/2 else "-", self.speech_box)
-                # when clicked, call send_speech_command with the argument
-                # that is the filename for the audio to play
-                # note: the speech option may be a comma separated list
-                # where one item is the filename and one is an animation to
-                # play back before or after the file
-                self.buttons[i].clicked.connect(partial(self.send_speech_command,
-                    self.script_list[self.current_line][i*2] if i < len(
-                        self.script_list[self.current_line])/2 else "-", i))
-                # add button to layout, each button takes up three columns
-                self.speech_layout.addWidget(self.buttons[i], row, 0, 1, 3)
-                col += 2
-                row += 1
-            # make the first option green since clicking it will auto-advance
-            # the script and update the buttons
-            self.buttons[0].setStyleSheet('QPushButton {color: green;}')
+            # get the compiled script (only read in and compiled if we don't
+            # have it already), starting at its first line, and show the
+            # first line's options on the option buttons
+            self.player.load_script(script_filename)
+            self.update_speech_options()
             self.label.setText("Script loaded!")
+            self.run_preflight(self.player.script)
+            self.index_audio(self.player.script)
         except:
             print ("Could not read script file! Is filename in config correct?")
             self.label.setText("Could not read script file!")
@@ -256,51 +343,96 @@ class tega_speech_ui(QtGui.QWidget):
 
         # make new list of buttons for the static script options
         self.static_buttons = []
+        self.static_options = []
 
         try:
             row = 4
-            static_script = open(script_filename)
-
-            for line in static_script:
-                parts = line.rstrip().split("\t")
-                # set button text to the button label if a label was provided
-                button = QtGui.QPushButton(parts[1] if len(
-                    parts) > 1 else parts[0], self.speech_box)
-                # send filename of audio to play when button is clicked
+            static_script = self.player.load_static_script(script_filename)
+
+            for line in static_script.lines:
+                option = line[0]
+                # set button text to the button label
+                button = QtGui.QPushButton(self.option_text(option),
+                        self.speech_box)
+                # send audio to play when button is clicked
                 button.clicked.connect(partial(self.send_speech_command,
-                    parts[0].split(",")[0], -1))
-                # make button text purple so they are distinct
-                button.setStyleSheet('QPushButton {color: purple;}')
+                    option, -1))
+                # make button text purple so they are distinct (or red, if
+                # we are suggesting a redirect)
+                self.ui_state.set(button, self.static_button_state())
                 self.speech_layout.addWidget(button, row, 3, 1, 2)
                 self.static_buttons.append(button)
+                self.static_options.append(option)
                 row += 1
+            self.run_preflight(static_script)
         except:
             print ("Could not read static script file! Is filename correct?")
 
 
+    def refresh_script_list(self, script_dir):
+        ''' update a script dropdown to list the scripts now in its folder,
+        keeping the current selection, and compile any new or changed ones in
+        the background '''
+        script_box, static = self.script_dirs[script_dir]
+        script_file_list = sorted(glob.glob(script_dir + '/*.txt'))
+        listed = [script_box.itemText(i) for i in range(script_box.count())]
+        # remove scripts that are gone, from the end so indexes stay valid
+        for i in reversed(range(len(listed))):
+            if listed[i] not in script_file_list:
+                script_box.removeItem(i)
+                self.script_cache.forget(listed[i])
+                self.script_watcher.removePath(listed[i])
+        # add new scripts in sorted position
+        for i, script_filename in enumerate(script_file_list):
+            if script_filename not in listed:
+                script_box.insertItem(i, script_filename)
+                self.script_watcher.addPath(script_filename)
+        self.script_cache.warm(script_file_list, static)
+
+    def on_script_file_changed(self, script_filename):
+        ''' a script was edited: compile it again in the background '''
+        for script_dir, (script_box, static) in self.script_dirs.items():
+            if script_filename.startswith(script_dir + '/'):
+                self.script_cache.warm([script_filename], static)
+        # some editors replace the file when saving, which drops the watch
+        if QtCore.QFile.exists(script_filename):
+            self.script_watcher.addPath(script_filename)
+
     def toggle_pause(self):
         ''' pause or unpause auto-advance script when speech buttons are pressed '''
-        self.paused = not self.paused
-        if (self.paused):
-            self.pbutton.setStyleSheet('QPushButton {color: red;}')
+        if (self.player.toggle_pause()):
+            self.ui_state.set(self.pbutton, "paused")
             self.pbutton.setText("-- unpause --")
             self.label.setText("Paused.")
         else:
-            self.pbutton.setStyleSheet('QPushButton {color: None;}')
+            self.ui_state.set(self.pbutton, None)
             self.pbutton.setText("-- pause --")
             self.label.setText("Un-paused.")
 
 
+    def trigger_stop(self):
+        ''' stop sending script lines, redirects, and commands that haven't
+        gone out yet '''
+        jobs, commands = self.player.stop()
+        self.label.setText("Stopped: dropped {} lines and {} commands.".format(
+            jobs, commands))
+
     def trigger_script_beginning(self):
         ''' go to beginning of script '''
-        self.current_line = 0
+        reason = self.player.beginning()
+        if reason is not None:
+            self.label.setText("Cannot go to beginning! " + reason)
+            return
         self.update_speech_options()
         self.label.setText("At beginning of script.")
 
 
     def trigger_script_end(self):
         ''' go to end of script '''
-        self.current_line = len(self.script_list) - 1
+        reason = self.player.end()
+        if reason is not None:
+            self.label.setText("Cannot go to end! " + reason)
+            return
         self.update_speech_options()
         self.label.setText("At end of script.")
 
@@ -309,15 +441,10 @@ class tega_speech_ui(QtGui.QWidget):
         ''' go to the previous line in the script '''
         # if the script isn't paused and we're not at the beginning, go back
         # and load the previous line of speech options
-        if (self.paused):
-            self.label.setText("Cannot go back! Script paused.")
-            return
-
-        if (self.current_line <= 0):
-            self.label.setText("Cannot go back! At beginning.")
+        reason = self.player.back()
+        if reason is not None:
+            self.label.setText("Cannot go back! " + reason)
             return
-
-        self.current_line -= 1
         self.update_speech_options()
 
 
@@ -325,125 +452,185 @@ class tega_speech_ui(QtGui.QWidget):
         ''' go to the next line in the script '''
         # if the script isn't paused and we're not at the end, go forward
         # and load the next line of speech options
-        if (self.paused):
-            self.label.setText("Cannot go forward! Script paused.")
-            return
-
-        if (self.current_line >= len(self.script_list) - 1):
-            self.label.setText("Cannot go forward! At end.")
+        reason = self.player.forward()
+        if reason is not None:
+            self.label.setText("Cannot go forward! " + reason)
             return
-
-        self.current_line += 1
         self.update_speech_options()
 
 
     def update_speech_options(self):
         ''' update speech option buttons to go forward or back in script '''
+        self.show_option_buttons()
+        self.show_eta()
+        self.label.setText("Next speech.")
+        # start warming the files for the upcoming lines
+        if self.prefetcher is not None:
+            self.prefetcher.prefetch_lines(self.player.script,
+                    self.player.current_line)
+
+
+    def show_option_buttons(self):
+        ''' show the current line's options on the option buttons '''
+        options = self.player.script.lines[self.player.current_line]
         for i in range(0, self.options):
             # set button text to the button label
             # if there are more buttons than speech options for this line in
             # the script, then set the text to "-"
-            self.buttons[i].setText(self.script_list[self.current_line][
-                i*2+1] if i < len(self.script_list[self.current_line])/2 else "-")
-            # disconnect previous callback function
-            try:
-                self.buttons[i].clicked.disconnect()
-            except:
-                print("oops, tried to disconnect a button that wasn't connected")
-            # when clicked, call send_speech_command with the argument
-            # that is the filename for the audio to play
-            # if there are more buttons than speech options for this line in
-            # the script, then send a "-" when clicked instead
-            self.buttons[i].clicked.connect(partial(self.send_speech_command,
-                self.script_list[self.current_line][i*2] if i < len(
-                    self.script_list[self.current_line])/2 else "-", i))
-            self.label.setText("Next speech.")
-
+            option = options[i] if i < len(options) else None
+            text = self.option_text(option) if option is not None else "-"
+            # only touch buttons whose text actually changed
+            if text != self.button_labels[i]:
+                self.buttons[i].setText(text)
+                self.buttons[i].setToolTip(self.option_tooltip(option))
+                self.button_labels[i] = text
+
+    def option_text(self, option):
+        ''' return the text to show on an option's button, marked if
+        preflight found something wrong with it '''
+        if option in self.problems:
+            return "(!) " + option.label
+        return option.label
+
+    def option_tooltip(self, option):
+        ''' return what preflight found wrong with an option, if anything '''
+        return "\n".join(self.problems.get(option, ()))
+
+    def run_preflight(self, script):
+        ''' check a compiled script in the background; the results come
+        back to on_preflight_done on the GUI thread '''
+        if self.preflight is None:
+            return
+        def check():
+            problems = self.preflight.check([script], self.compiler.motions)
+            self.bridge.call(self.on_preflight_done, script, problems)
+        thread = threading.Thread(target=check, name="tega_preflight")
+        thread.daemon = True
+        thread.start()
+
+    def on_preflight_done(self, script, problems):
+        ''' flag the options preflight found problems with '''
+        # forget what we found last time we checked this script
+        for line in script.lines:
+            for option in line:
+                self.problems.pop(option, None)
+        for problem in problems:
+            print("Preflight: {}".format(problem))
+            self.problems.setdefault(problem.option, []).append(
+                    problem.message)
+        if self.player.script is not None:
+            self.show_option_buttons()
+        if hasattr(self, "static_buttons"):
+            for button, option in zip(self.static_buttons,
+                    self.static_options):
+                button.setText(self.option_text(option))
+                button.setToolTip(self.option_tooltip(option))
+        if problems:
+            self.label.setText("Preflight: {} problems in {}".format(
+                len(problems), script.filename))
+
+    def index_audio(self, script):
+        ''' read how long the audio in a compiled script plays for in the
+        background; the results come back to on_audio_indexed on the GUI
+        thread '''
+        if self.audio_index is None or script in self.remaining:
+            return
+        def index():
+            self.audio_index.build_scripts([script])
+            self.bridge.call(self.on_audio_indexed, script,
+                    self.audio_index.script_remaining(script))
+        thread = threading.Thread(target=index, name="tega_audio_index")
+        thread.daemon = True
+        thread.start()
+
+    def on_audio_indexed(self, script, remaining):
+        ''' we know how long the rest of a script plays for from each line '''
+        self.remaining[script] = remaining
+        self.show_eta()
+
+    def show_eta(self):
+        ''' show how long the current line and the rest of the script play
+        for, if we know '''
+        remaining = self.remaining.get(self.player.script)
+        if remaining is None:
+            # e.g., a script that was just loaded and isn't indexed yet:
+            # don't leave the last script's ETA up
+            self.eta_label.setText("")
+            return
+        current_line = self.player.current_line
+        line = remaining[current_line] - remaining[current_line + 1]
+        rest = int(remaining[current_line])
+        self.eta_label.setText("This line: {:.1f}s, rest of script: "
+                "{}:{:02d}".format(line, rest // 60, rest % 60))
+
+    def on_option_clicked(self, i):
+        ''' send the option in slot i of the current script line '''
+        if self.player.script is None:
+            return
+        self.send_speech_command(
+                self.player.option_at(self.player.current_line, i), i)
 
-    def send_speech_command(self, speech, option_num):
+    def send_speech_command(self, option, option_num):
         ''' send speech command to robot and update speech options if necessary '''
-        if (speech != "-"):
-            # split command on commas, find out if there's just speech or
-            # animations listed
-            speech_parts = speech.split(",")
-
-            # send a command for each part found
-            for sp in speech_parts:
-                # wait until tega is not speaking or moving, then send the
-                # next command
-                while (self.flags.tega_is_playing_sound
-                       or self.flags.tega_is_doing_motion):
-                    time.sleep(0.1)
-
-                # If this part says "CHILD_TURN", set the interaction state and
-                # if we are using the audio entrainment module, send a message
-                # indicating that it is the child's turn to speak.
-                if sp == "PARTICIPANT_TURN":
-                    self.ros_node.send_interaction_state_message(True)
-                    self.label.setText("Sending child turn message.")
-
-                # if this part is an animation (all caps), send a motion command
-                elif (sp.isupper()):
-                    self.ros_node.send_motion_message(sp)
-                    self.label.setText("Sending animation.")
-                    self.wait_for_motion()
-
-                # Otherwise, it's a speech filename. If we are using the audio
-                # entrainment module, send the filename there; otherwise, send
-                # to the robot using ROS.
-                elif self.use_entrainer:
-                    # Send the filename to the audio entrainer. Append the
-                    # filepath to the filename before sending. Note that an
-                    # empty filepath can be provided if the full filepaths are
-                    # given in the script. We assume that corresponding viseme
-                    # files have the same name but with a .txt extension, and
-                    # are located at the viseme filepath. If full filepaths are
-                    # provided in the script, then an empty filepath should be
-                    # provided for the viseme filepath as well, and the viseme
-                    # text files should be located in the same directory as the
-                    # audio.
-                    self.ros_node.send_entrain_audio_message(
-                            self.audio_base_dir + sp,
-                            self.viseme_base_dir + sp.replace(".wav",".txt"),
-                            self.speaker_age,
-                            self.entrain_checkbox.isChecked())
-                    self.label.setText("Sending entrain speech command.")
-                    self.wait_for_speaking()
-                else:
-                    # Send directly to the robot.
-                    self.ros_node.send_speech_message(sp)
-                    self.label.setText("Sending speech command.")
-                    self.wait_for_speaking()
-
-        speech = "-"
+        # in strict mode, don't send options preflight found problems with
+        if option in self.problems and self.preflight_mode == "strict":
+            self.label.setText("Not sending broken option: "
+                    + self.option_tooltip(option))
+            return
+        if option is not None:
+            # count whether the files we're about to send were already warm
+            if self.prefetcher is not None:
+                self.prefetcher.check(option.actions)
+                self.prefetch_label.setText(
+                        "prefetch: {hits} hits, {misses} misses".format(
+                        **self.prefetcher.stats()))
+            # hand the option to the sequencer (through the player), which
+            # sends a command for each action once the robot is ready
+            self.player.send(option, option_num, self.speaker_age,
+                self.use_entrainer and self.entrain_checkbox.isChecked())
+
         # if first option and not paused, autoadvance, call trigger script forward
-        if (option_num == 0 and not self.paused):
+        if (option_num == 0 and not self.player.paused):
             self.trigger_script_forward()
 
+    def on_speech_job_done(self, job):
+        """ Called on the GUI thread when the sequencer has sent everything
+        in a line of the script.
+        """
         # TODO move project-specific stuff like the redirects and child attention
         # label to a forked version of the project OR add a project-specific
         # python file to load where you add any project-specific buttons to the
         # interface -- something to make this cleaner. Anyway:
         #
-        # if we are using redirects, and if the child is not attending,
-        # highlight the redirects so the teleoperator will know to click one
-        #
-        # NOTE there may be a better way of doing this - the coloring is
-        # dependent on the value of the flag when we send speech, and it could
-        # be that the child is not attending for a bit but comes back before
-        # it's time to send more speech, so we might want to play a redirect
-        # since they were distracted, but the color won't change for that...
-        # the point is, we could track how much the child has been attending
-        # since the last time we changed the button colors or sent speech, and
-        # use that to determine whether we should suggest playing another
-        # redirect or not.
-        print self.flags.child_is_attending
-        if self.flags.child_is_attending:
-            for sb in self.static_buttons:
-                sb.setStyleSheet('QPushButton {color: purple;}')
-        else:
-            for sb in self.static_buttons:
-                sb.setStyleSheet('QPushButton {color: red;}')
+        # The redirect advisor highlights the redirects as soon as the child
+        # disengages; here we just note how much the child attended while
+        # the line played.
+        ratios = [summary["ratio"] for summary in
+                (timeline.summary_since_mark()
+                    for timeline in self.flags.attention_timelines())
+                if summary["ratio"] is not None]
+        self.label.setText("Line sent. Child attention since last line: "
+                + ("{:.0f}%".format(min(ratios) * 100) if ratios else "-"))
+        # next time, look at the attention from now on
+        for timeline in self.flags.attention_timelines():
+            timeline.mark()
+
+    def static_button_state(self):
+        """ Return the state for the static script buttons: "redirect"
+        (purple), or "suggest" (red) if we are suggesting a redirect.
+        """
+        if self.suggest_redirect:
+            return "suggest"
+        return "redirect"
+
+    def on_redirect_advice(self, suggest):
+        """ Called on the GUI thread when the redirect advisor starts or
+        stops suggesting a redirect: highlight the redirects so the
+        teleoperator will know to click one.
+        """
+        self.suggest_redirect = suggest
+        for sb in getattr(self, "static_buttons", []):
+            self.ui_state.set(sb, self.static_button_state())
 
     def on_speaker_age_changed(self, val):
         """ When the speaker age value is changed in the spin box, update the
@@ -451,47 +638,6 @@ class tega_speech_ui(QtGui.QWidget):
         """
         self.speaker_age = val
 
-    def wait_for_speaking(self, timeout=15):
-        """ Wait until we hear the robot start playing sound before going on to
-        process the next command and wait for the robot to be done playing
-        sound. We have to wait because when streaming audio through the audio
-        entrainer, it sometimes takes a couple seconds for the audio to be
-        processed and sent to the robot. So we want to make sure we wait until
-        the robot has gotten the command to play audio before we move on to the
-        next item in the script. Otherwise, we might see that the robot isn't
-        playing any sound and send the next item in the script too soon,
-        clobbering the audio that's about to be played as it is sent from the
-        entrainer to the robot.
-        """
-        counter = 0
-        increment = 0.1
-        while (not self.flags.tega_is_playing_sound and counter < timeout):
-            counter += increment
-            time.sleep(increment)
-
-        print "Waited {} seconds".format(counter)
-        if counter >= timeout:
-            print "Warning: timed out waiting for robot to start playing " \
-                     "sound! timeout: " + str(timeout) + ". Moving on..."
-
-    def wait_for_motion(self, timeout=8):
-        """ Wait until the robot has started playing an animation before going
-        on to wait for the robot to be done playing it (similar to waiting for
-        sound, above).
-        """
-        # TODO Could possibly combine this with wait_for_speaking and pass in
-        # what to wait for.
-        counter = 0
-        increment = 0.1
-        while (not self.flags.tega_is_doing_motion and counter < timeout):
-            counter += increment
-            time.sleep(increment)
-
-        if counter >= timeout:
-            print "Warning: timed out waiting for robot to start doing " \
-                     "motion! timeout: " + str(timeout) + ". Moving on..."
-
-
     def send_participant_turn(self):
         """ On a button press, send a participant turn message. """
         self.ros_node.send_interaction_state_message(True)
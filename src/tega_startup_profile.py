@@ -0,0 +1,82 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import threading # phases run on more than one thread
+from contextlib import contextmanager # timing phases with "with"
+from tega_teleop_clock import monotonic
+
+class tega_startup_profile(object):
+    """ Records how long each phase of starting up takes, and on which thread,
+    so we can see where the time to the first usable window goes.
+    """
+
+    def __init__(self, started=None):
+        """ Start the profile. started is when startup began (defaults to
+        now), on the tega_teleop_clock monotonic clock.
+        """
+        self.started = monotonic() if started is None else started
+        self.lock = threading.Lock()
+        # (start, end, thread name, phase name), in seconds since started
+        self.phases = []
+        self.finished = None
+
+    @contextmanager
+    def phase(self, name):
+        """ Time the phase run inside this with block. """
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, start)
+
+    def add_phase(self, name, start, end=None):
+        """ Record a phase that started and ended (defaults to now) at the
+        given monotonic times, e.g., one that ran before we had a profile.
+        """
+        end = monotonic() if end is None else end
+        with self.lock:
+            self.phases.append((start - self.started, end - self.started,
+                threading.current_thread().name, name))
+
+    def finish(self):
+        """ Mark startup as done: the window is up and usable. """
+        self.finished = monotonic() - self.started
+
+    def report(self):
+        """ Return a printable breakdown of startup, in start order. """
+        lines = ["Startup profile (ms):", "  {:>8} {:>8}  {:<12} {}".format(
+            "start", "took", "thread", "phase")]
+        with self.lock:
+            for start, end, thread, name in sorted(self.phases):
+                lines.append("  {:>8.1f} {:>8.1f}  {:<12} {}".format(
+                    start * 1000, (end - start) * 1000, thread[:12], name))
+        if self.finished is not None:
+            lines.append("  first usable window after {:.1f} ms".format(
+                self.finished * 1000))
+        return "\n".join(lines)
+
+    def print_report(self):
+        """ Print the startup breakdown. """
+        print(self.report())
@@ -25,13 +25,16 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from tega_teleop_clock import monotonic
+# time startup from before we import the heavy stuff (Qt, ROS)
+startup_started = monotonic()
+
 import sys # exit and argv
 import argparse # command line args
+import time # session file names
+import threading # bring up ROS while building the GUI
 import rospy # ROS
 from PySide import QtGui, QtCore # basic GUI stuff
-from r1d1_msgs.msg import TegaAction # ROS msgs
-from r1d1_msgs.msg import TegaState # ROS msgs
-from sar_opal_msgs.msg import OpalCommand # ROS msgs
 from tega_teleop_ros import tega_teleop_ros
 from tega_animation_ui import tega_animation_ui
 from tega_lookat_ui import tega_lookat_ui
@@ -40,21 +43,35 @@ from opal_tablet_ui import opal_tablet_ui
 from tega_fidget_ui import tega_fidget_ui
 from tega_volume_ui import tega_volume_ui
 from tega_teleop_flags import tega_teleop_flags
+from tega_teleop_bridge import tega_teleop_bridge
+from tega_ui_state import tega_ui_state
+from tega_teleop_log import tega_teleop_log
+from tega_teleop_config import load_config
+from tega_session_recorder import tega_session_recorder
+from tega_command_scheduler import tega_command_scheduler, DROP_LOWEST
+from tega_teleop_group import tega_teleop_group
+from tega_robot_select_ui import tega_robot_select_ui
+from tega_attention_ui import tega_attention_ui
+from tega_script_compiler import tega_script_compiler
+from tega_script_cache import tega_script_cache
+from tega_speech_sequencer import tega_speech_sequencer
+from tega_script_player import tega_script_player
+from tega_entrainer_pipeline import tega_entrainer_pipeline
+from tega_control_server import tega_control_server, remove_stale_socket
+from tega_latency_ui import tega_latency_ui
+from tega_startup_profile import tega_startup_profile
 
 class tega_teleop(QtGui.QMainWindow):
     """ Tega teleoperation interface """
-    # set up ROS node globally
-    # TODO if running on network where DNS does not resolve local
-    # hostnames, get the public IP address of this machine and
-    # export to the environment variable $ROS_IP to set the public
-    # address of this node, so the user doesn't have to remember
-    # to do this before starting the node.
-    ros_node = rospy.init_node('tega_teleop', anonymous=True)
-
-    def __init__(self, use_entrainer):
-        """ Initialize teleop interface """
+
+    def __init__(self, use_entrainer, config, profile):
+        """ Initialize teleop interface. The ROS node is brought up on a
+        background thread while the GUI is built; each step is timed in the
+        startup profile.
+        """
         # setup GUI teleop interface
         super(tega_teleop, self).__init__()
+        self.profile = profile
         self.setGeometry(50, 50, 950, 1500)
         self.setWindowTitle("Tega Teleop")
 
@@ -63,47 +80,244 @@ class tega_teleop(QtGui.QMainWindow):
         self.central_layout = QtGui.QGridLayout(self.central_widget)
         self.setCentralWidget(self.central_widget)
 
-        # add label for ROS messages to update
-        self.ros_label = QtGui.QLabel(self)
-        self.ros_label.setText("---")
+        # One teleop instance can drive several robot and tablet stations,
+        # each with its topics under its own namespace (e.g.,
+        # "station1/tega"). With no robots listed in the config, we drive one
+        # robot on the usual topics.
+        robots = config.get("robots") or [""]
+
+        # add a label per robot for ROS messages to update
+        self.ros_label = QtGui.QWidget(self)
+        ros_label_layout = QtGui.QHBoxLayout(self.ros_label)
         self.central_layout.addWidget(self.ros_label, 3, 6, 1, 1,
             alignment=QtCore.Qt.AlignLeft)
 
-        # we have a boolean to flag whether child is attending or not based
-        # on data coming in on the /child_attention topic from ROS
-        # TODO this is a project-specific flag - need to revise how this
-        # is done so that project-specific stuff can be swapped out for
-        # new projects
-        self.flags = tega_teleop_flags()
+        # ROS callbacks and other background threads send their widget
+        # updates through this bridge, which applies them on the GUI thread
+        self.bridge = tega_teleop_bridge()
+
+        # Panels color their widgets by putting them in states, which one
+        # application style sheet styles; changes are applied once per frame.
+        self.ui_state = tega_ui_state()
+        self.ui_state.install(QtGui.QApplication.instance())
+
+        # Everything we publish is logged to a rotating log file by a
+        # background thread. The verbosity says whether to also print to the
+        # console and echo full messages to rosout.
+        self.log = tega_teleop_log(
+                config.get("log_file", "tega_teleop_log.jsonl"),
+                config.get("log_verbosity", tega_teleop_log.NORMAL))
+        self.log.start()
 
-        # setup ROS node publisher and subscriber
-        self.ros_teleop = tega_teleop_ros(self.ros_node, self.ros_label,
-               self.flags, use_entrainer)
+        # If the config says so, every message we publish or receive is also
+        # recorded in full, so the session can be replayed later.
+        self.recorder = make_recorder(config)
+
+        # set up each robot's ROS publishers and subscribers
+        ros_labels = []
+        for namespace in robots:
+            ros_label = QtGui.QLabel(self.ros_label)
+            ros_label.setText("---")
+            ros_label_layout.addWidget(ros_label)
+            ros_labels.append(ros_label)
+
+        # The controls send to the group, which sends to whichever robots the
+        # operator picked; we start bringing ROS up in the background while
+        # we build the rest of the GUI.
+        self.ros_teleop = make_robot_group(robots, config, use_entrainer,
+                self.bridge, self.log, ros_labels, self.recorder)
+        self.flags = self.ros_teleop.flags
+        self.scheduler = self.ros_teleop.scheduler
+        # next to each robot's label, a sparkline of how much its child has
+        # been attending lately
+        for i, member in enumerate(self.ros_teleop.members):
+            ros_label_layout.insertWidget(2 * i + 1, tega_attention_ui(
+                member.flags.attention, parent=self.ros_label))
+        self.ros_error = None
+        self.ros_thread = threading.Thread(target=self.start_ros,
+                name="ros_startup")
+        self.ros_thread.start()
 
         # add animation buttons
-        anim_ui = tega_animation_ui(self.ros_teleop)
-        self.central_layout.addWidget(anim_ui, 0, 0, 4, 10)
+        with profile.phase("animation panel"):
+            anim_ui = tega_animation_ui(self.ros_teleop)
+            self.central_layout.addWidget(anim_ui, 0, 0, 4, 10)
 
         # add tablet controls
-        opal_ui = opal_tablet_ui(self.ros_teleop)
-        self.central_layout.addWidget(opal_ui, 4, 0, 2, 3)
+        with profile.phase("tablet panel"):
+            opal_ui = opal_tablet_ui(self.ros_teleop)
+            self.central_layout.addWidget(opal_ui, 4, 0, 2, 3)
 
         # add lookat buttons
-        lookat_ui = tega_lookat_ui(self.ros_teleop)
-        self.central_layout.addWidget(lookat_ui, 4, 5, 2, 3)
+        with profile.phase("lookat panel"):
+            lookat_ui = tega_lookat_ui(self.ros_teleop)
+            self.central_layout.addWidget(lookat_ui, 4, 5, 2, 3)
 
         # Add fidget control buttons.
-        fidget_ui = tega_fidget_ui(self.ros_teleop)
-        self.central_layout.addWidget(fidget_ui, 4, 3, 1, 2)
+        with profile.phase("fidget panel"):
+            fidget_ui = tega_fidget_ui(self.ros_teleop)
+            self.central_layout.addWidget(fidget_ui, 4, 3, 1, 2)
 
         # Add volume controls.
-        volume_ui = tega_volume_ui(self.ros_teleop)
-        self.central_layout.addWidget(volume_ui, 5, 3, 1, 2)
+        with profile.phase("volume panel"):
+            volume_ui = tega_volume_ui(self.ros_teleop)
+            self.central_layout.addWidget(volume_ui, 5, 3, 1, 2)
 
         # Add robot script playback buttons (mostly speech, but the scripts
         # can also list animations to play before or after an audio file).
-        speech_ui = tega_speech_ui(self.ros_teleop, self.flags, use_entrainer)
-        self.central_layout.addWidget(speech_ui, 6, 0, 3, 7)
+        with profile.phase("speech panel"):
+            speech_ui = tega_speech_ui(self.ros_teleop, self.flags,
+                    use_entrainer, self.bridge, self.ui_state, config)
+            self.central_layout.addWidget(speech_ui, 6, 0, 3, 7)
+
+        # Add a panel showing how long the robot takes to react to commands.
+        with profile.phase("latency panel"):
+            latency_ui = tega_latency_ui(self.ros_teleop.latency,
+                    self.ui_state, self.scheduler)
+            self.central_layout.addWidget(latency_ui, 6, 7, 3, 3)
+
+        # With several robots, add checkboxes to pick which ones to send to.
+        if len(robots) > 1:
+            with profile.phase("robot selector"):
+                select_ui = tega_robot_select_ui(self.ros_teleop)
+                self.central_layout.addWidget(select_ui, 9, 0, 1, 10)
+
+        # the window isn't usable until we can publish, so wait for ROS
+        with profile.phase("waiting for ROS"):
+            self.ros_thread.join()
+        if self.ros_error is not None:
+            raise self.ros_error
+
+    def start_ros(self):
+        """ Bring up the ROS node, publishers, and subscribers. Runs on a
+        background thread during startup.
+        """
+        try:
+            # TODO if running on network where DNS does not resolve local
+            # hostnames, get the public IP address of this machine and
+            # export to the environment variable $ROS_IP to set the public
+            # address of this node, so the user doesn't have to remember
+            # to do this before starting the node.
+            with self.profile.phase("rospy.init_node"):
+                # rospy can only install its signal handlers on the main
+                # thread, and Qt owns that anyway
+                rospy.init_node('tega_teleop', anonymous=True,
+                        disable_signals=True)
+            with self.profile.phase("publishers and subscribers"):
+                self.ros_teleop.start()
+        except Exception as e:
+            # let the main thread deal with it
+            self.ros_error = e
+
+
+def make_recorder(config):
+    """ Start recording the session if the config names a session file (the
+    name can have strftime fields, e.g., "session_%Y%m%d_%H%M%S.tsess").
+    Returns the recorder, or None if we aren't recording.
+    """
+    if not config.get("session_record"):
+        return None
+    recorder = tega_session_recorder(
+            time.strftime(config["session_record"]))
+    recorder.start()
+    print("Recording session to " + recorder.filename)
+    return recorder
+
+
+def make_robot_group(robots, config, use_entrainer, bridge, log,
+        ros_labels=None, recorder=None):
+    """ Set up ROS publishers and subscribers for each robot namespace, and
+    return a group that sends to them. ros_labels has a label per robot to
+    show the child's attention on (or is None, running headless); recorder
+    records the session (or is None).
+    """
+    # The robots' flags share a condition, so anything waiting on the
+    # robots' state wakes when any of them changes.
+    state_changed = threading.Condition()
+    members = []
+    for i, namespace in enumerate(robots):
+        # we have a boolean to flag whether child is attending or not based
+        # on data coming in on the /child_attention topic from ROS
+        # TODO this is a project-specific flag - need to revise how this
+        # is done so that project-specific stuff can be swapped out for
+        # new projects
+        flags = tega_teleop_flags(state_changed)
+
+        # Commands to each robot and tablet are queued by priority, so urgent
+        # ones go out first; the config says how many may wait and what to
+        # drop when too many do. Each robot has its own queue, so the robots
+        # are sent to in parallel.
+        scheduler = tega_command_scheduler(
+                config.get("command_queue_depth", 32),
+                config.get("command_drop_policy", DROP_LOWEST))
+
+        members.append(tega_teleop_ros(
+            ros_labels[i] if ros_labels else None, flags, use_entrainer,
+            bridge, log, scheduler, namespace, recorder))
+    return tega_teleop_group(members)
+
+
+def run_headless(use_entrainer, config, socket_path):
+    """ Run with no GUI, taking the same commands over a local unix socket
+    (see tega_control_server.py), e.g., for automated study drivers.
+    """
+    # before starting anything, make sure we'll be able to listen
+    try:
+        remove_stale_socket(socket_path)
+    except IOError as e:
+        print("Could not listen on {}: {}".format(socket_path, e))
+        sys.exit(1)
+    log = tega_teleop_log(config.get("log_file", "tega_teleop_log.jsonl"),
+            config.get("log_verbosity", tega_teleop_log.NORMAL))
+    log.start()
+    recorder = make_recorder(config)
+    robots = make_robot_group(config.get("robots") or [""], config,
+            use_entrainer, None, log, recorder=recorder)
+    # we handle ctrl-c ourselves, below
+    rospy.init_node('tega_teleop', anonymous=True, disable_signals=True)
+    robots.start()
+
+    # scripts play the same way they do in the speech panel
+    compiler = tega_script_compiler(config.get("audio_base_dir", ""),
+            config.get("viseme_base_dir", ""),
+            viseme_cache=config.get("viseme_cache", ""))
+    sequencer = tega_speech_sequencer(robots, robots.flags, use_entrainer)
+    sequencer.start()
+    pipeline = None
+    if use_entrainer and config.get("entrainer_pipeline", 0) > 0:
+        pipeline = tega_entrainer_pipeline(robots,
+                config["entrainer_pipeline"])
+    player = tega_script_player(sequencer, tega_script_cache(compiler),
+            pipeline)
+    try:
+        if "script" in config:
+            player.load_script(config["script"])
+        if "static_script" in config:
+            player.load_static_script(config["static_script"])
+    except (IOError, OSError) as e:
+        print("Could not read script file: {}".format(e))
+
+    server = tega_control_server(socket_path, robots, player, compiler)
+    # if roscore goes away, stop serving (from another thread, since
+    # shutdown waits for serve_forever to return)
+    rospy.on_shutdown(lambda: threading.Thread(target=server.shutdown).start())
+    print("Listening on " + socket_path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        sequencer.stop()
+        robots.latency.print_report()
+        robots.print_sender_stats()
+        robots.scheduler.print_stats()
+        if pipeline is not None:
+            pipeline.print_stats()
+        log.stop()
+        if recorder is not None:
+            recorder.stop()
+
 
 if __name__ == '__main__':
 
@@ -120,18 +334,56 @@ if __name__ == '__main__':
     parser.add_argument("-e", "--use-entrainer", action='store_true',
             default=False, dest="use_entrainer",
             help="Send audio to the audio entrainer on the way to the robot.")
+    parser.add_argument("--profile-startup", action='store_true',
+            default=False, dest="profile_startup",
+            help="Print how long each part of startup took.")
+    parser.add_argument("--headless", action='store_true', default=False,
+            help="Don't show the GUI; take commands over a local socket "
+            "instead (see tega_control_client.py).")
+    parser.add_argument("--socket", default="/tmp/tega_teleop.sock",
+            help="Unix socket to take commands on when headless.")
 
     # Get arguments.
     args = parser.parse_args()
     print(args)
 
+    profile = tega_startup_profile(startup_started)
+    profile.add_phase("imports", startup_started)
+
+    # read config file to get script name, number of speech options per
+    # line, and so on
+    with profile.phase("config"):
+        config = load_config("tega_teleop_config.json", verbose=True)
+
+    if args.headless:
+        run_headless(args.use_entrainer, config, args.socket)
+        sys.exit(0)
+
     # initialize top-level GUI manager
-    app = QtGui.QApplication(sys.argv)
+    with profile.phase("QApplication"):
+        app = QtGui.QApplication(sys.argv)
 
     # start teleop interface
     try:
-        teleop_window = tega_teleop(args.use_entrainer)
-        teleop_window.show()
+        teleop_window = tega_teleop(args.use_entrainer, config, profile)
+        with profile.phase("show window"):
+            teleop_window.show()
+        # the window is usable once the event loop gets going
+        QtCore.QTimer.singleShot(0, profile.finish)
+        if args.profile_startup:
+            QtCore.QTimer.singleShot(0, profile.print_report)
+        # on exit, report how many GUI updates and setting changes were
+        # coalesced and how long the robot took to react to commands, and
+        # finish writing the log
+        app.aboutToQuit.connect(teleop_window.bridge.print_stats)
+        app.aboutToQuit.connect(teleop_window.ui_state.print_stats)
+        app.aboutToQuit.connect(
+                teleop_window.ros_teleop.latency.print_report)
+        app.aboutToQuit.connect(teleop_window.ros_teleop.print_sender_stats)
+        app.aboutToQuit.connect(teleop_window.scheduler.print_stats)
+        app.aboutToQuit.connect(teleop_window.log.stop)
+        if teleop_window.recorder is not None:
+            app.aboutToQuit.connect(teleop_window.recorder.stop)
 
     # if roscore isn't running or shuts down unexpectedly
     except rospy.ROSInterruptException:
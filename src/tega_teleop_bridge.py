@@ -0,0 +1,140 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from PySide import QtCore # signals, timers
+import threading # lock around pending updates
+
+class tega_teleop_bridge(QtCore.QObject):
+    """ Carries updates from ROS callbacks (and other worker threads) over to
+    the GUI thread, where it is safe to touch widgets.
+
+    Updates are posted under a key. If several updates for the same key
+    arrive before the GUI gets around to them, only the latest is delivered,
+    and all pending updates are delivered together at most once per display
+    frame. So a 30 Hz attention camera costs at most one label update per
+    frame, no matter how bursty the messages are.
+    """
+
+    # emitted (from any thread) when the first update arrives after a flush
+    wake = QtCore.Signal()
+
+    def __init__(self, frame_interval=16):
+        """ Set up the bridge. frame_interval is the minimum time between
+        deliveries, in milliseconds (16 ms is about one 60 Hz frame).
+        """
+        super(tega_teleop_bridge, self).__init__()
+        # functions to call with the latest value posted under each key
+        self.handlers = {}
+        # latest value posted under each key, and queued calls that must
+        # each be delivered, waiting for the next flush
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.calls = []
+        self.wake_pending = False
+
+        # counters, so we can see how much work coalescing saves
+        self.posted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.flushes = 0
+
+        # the timer lives on the GUI thread and fires once per frame at most
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(frame_interval)
+        self.timer.timeout.connect(self.flush)
+        # always queue the wake-up, even when posting from the GUI thread, so
+        # posting never runs widget code in the caller's stack
+        self.wake.connect(self.schedule_flush, QtCore.Qt.QueuedConnection)
+
+    def connect_handler(self, key, handler):
+        """ Call handler(value) on the GUI thread with the latest value
+        posted under key.
+        """
+        self.handlers[key] = handler
+
+    def post(self, key, value):
+        """ Post an update from any thread. Replaces any update posted under
+        the same key that hasn't been delivered yet.
+        """
+        with self.lock:
+            self.posted += 1
+            if key in self.pending:
+                self.coalesced += 1
+            self.pending[key] = value
+            wake = not self.wake_pending
+            self.wake_pending = True
+        if wake:
+            self.wake.emit()
+
+    def call(self, function, *args):
+        """ Call function(*args) on the GUI thread from any thread. Unlike
+        post, every call is delivered, in order.
+        """
+        with self.lock:
+            self.posted += 1
+            self.calls.append((function, args))
+            wake = not self.wake_pending
+            self.wake_pending = True
+        if wake:
+            self.wake.emit()
+
+    def schedule_flush(self):
+        """ Deliver pending updates at the next frame. """
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """ Deliver everything that's pending. Runs on the GUI thread. """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            calls, self.calls = self.calls, []
+            self.wake_pending = False
+        self.flushes += 1
+        for function, args in calls:
+            function(*args)
+            self.delivered += 1
+        for key, value in pending.iteritems():
+            handler = self.handlers.get(key)
+            if handler is None:
+                # nobody is showing this update right now
+                self.dropped += 1
+                continue
+            handler(value)
+            self.delivered += 1
+
+    def stats(self):
+        """ Return the bridge's counters. """
+        with self.lock:
+            return {"posted": self.posted, "coalesced": self.coalesced,
+                    "dropped": self.dropped, "delivered": self.delivered,
+                    "flushes": self.flushes}
+
+    def print_stats(self):
+        """ Print the bridge's counters (e.g., on exit). """
+        print("GUI update bridge: {posted} posted, {coalesced} coalesced, "
+                "{dropped} dropped, {delivered} delivered in {flushes} "
+                "frames".format(**self.stats()))
@@ -0,0 +1,55 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import time # wall clock fallback
+
+try:
+    # python 3
+    monotonic = time.monotonic
+except AttributeError:
+    # python 2 has no monotonic clock, so ask for CLOCK_MONOTONIC directly
+    try:
+        import ctypes
+        import ctypes.util
+
+        class _timespec(ctypes.Structure):
+            _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+        _CLOCK_MONOTONIC = 1
+        _librt = ctypes.CDLL(ctypes.util.find_library("rt") or "libc.so.6",
+                use_errno=True)
+        _clock_gettime = _librt.clock_gettime
+        _clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(_timespec)]
+
+        def monotonic():
+            """ Seconds on a clock that never goes backwards. """
+            t = _timespec()
+            if _clock_gettime(_CLOCK_MONOTONIC, ctypes.pointer(t)) != 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, "clock_gettime failed")
+            return t.tv_sec + t.tv_nsec * 1e-9
+    except (OSError, AttributeError):
+        # not on linux: the wall clock will have to do
+        monotonic = time.time
@@ -23,7 +23,55 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-class tega_teleop_flags:
+import threading # condition for waking anything waiting on robot state
+from tega_attention_timeline import tega_attention_timeline
+
+def sound_started(counts):
+    """ Whether every robot in a start_counts() snapshot has started playing
+    sound since the snapshot was taken.
+    """
+    return all(flags.sound_starts > sounds for flags, sounds, _ in counts)
+
+def motion_started(counts):
+    """ Whether every robot in a start_counts() snapshot has started a
+    motion since the snapshot was taken.
+    """
+    return all(flags.motion_starts > motions for flags, _, motions in counts)
+
+
+class tega_teleop_flags(object):
+
+    def __init__(self, state_changed=None):
+        # anything waiting on the robot's state (e.g., the speech sequencer)
+        # waits on this condition; it is notified whenever a new tega state
+        # arrives, so waiters wake as soon as the robot changes state instead
+        # of polling the flags. With several robots, their flags share one
+        # condition, so a waiter wakes when any of them changes state.
+        if state_changed is None:
+            state_changed = threading.Condition()
+        self.state_changed = state_changed
+        # how many times tega has started playing sound or doing a motion, so
+        # a waiter can tell the robot started something even if it finished
+        # again before the waiter got to look at the flags
+        self.sound_starts = 0
+        self.motion_starts = 0
+        # every attention sample goes on a timeline too, so we can tell how
+        # much the child has been attending lately, not just right now
+        self.attention = tega_attention_timeline()
+
+    def attention_timelines(self, targeted=True):
+        """ Return the attention timelines of the children we are sending to
+        (just this one).
+        """
+        return [self.attention]
+
+    def start_counts(self):
+        """ Return (flags, sound starts, motion starts) for each robot we
+        are sending to (just this one), to note before sending something and
+        check with sound_started or motion_started.
+        """
+        with self.state_changed:
+            return ((self, self.sound_starts, self.motion_starts),)
 
     # is the child attending or not?
     _child_is_attending = True
@@ -33,6 +81,7 @@ class tega_teleop_flags:
     @child_is_attending.setter
     def child_is_attending(self,val):
         self._child_is_attending = val
+        self.attention.add(val)
 
     # is tega currently playing audio?
     # we get this info from the tega state rosmsgs
@@ -42,7 +91,11 @@ class tega_teleop_flags:
         return self._tega_is_playing_sound
     @tega_is_playing_sound.setter
     def tega_is_playing_sound(self,val):
-        self._tega_is_playing_sound = val
+        with self.state_changed:
+            if val and not self._tega_is_playing_sound:
+                self.sound_starts += 1
+            self._tega_is_playing_sound = val
+            self.state_changed.notify_all()
 
     # is tega currently doing a motion?
     # we get this info from the tega state rosmsgs
@@ -50,6 +103,23 @@ class tega_teleop_flags:
     @property
     def tega_is_doing_motion(self):
         return self._tega_is_doing_motion
-    @tega_is_playing_sound.setter
+    @tega_is_doing_motion.setter
     def tega_is_doing_motion(self,val):
-        self._tega_is_doing_motion = val
+        with self.state_changed:
+            if val and not self._tega_is_doing_motion:
+                self.motion_starts += 1
+            self._tega_is_doing_motion = val
+            self.state_changed.notify_all()
+
+    def set_tega_state(self, is_playing_sound, is_doing_motion):
+        """ Update both robot state flags at once and wake anything waiting
+        on the robot's state, so waiters never see a half-updated state.
+        """
+        with self.state_changed:
+            if is_playing_sound and not self._tega_is_playing_sound:
+                self.sound_starts += 1
+            if is_doing_motion and not self._tega_is_doing_motion:
+                self.motion_starts += 1
+            self._tega_is_playing_sound = is_playing_sound
+            self._tega_is_doing_motion = is_doing_motion
+            self.state_changed.notify_all()
@@ -0,0 +1,219 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from tega_command_scheduler import SAFETY, SCRIPT, AMBIENT
+
+class tega_teleop_group_flags(object):
+    """ The state of the robots a group is currently sending to, read through
+    the same properties as one robot's tega_teleop_flags, so the speech
+    sequencer can drive several robots as if they were one. The robots'
+    flags all share one condition, which is also this object's.
+    """
+
+    def __init__(self, group):
+        self.group = group
+        self.state_changed = group.members[0].flags.state_changed
+
+    def targets(self):
+        """ Return the flags of the robots being sent to. """
+        return [member.flags for member in self.group.targets]
+
+    @property
+    def child_is_attending(self):
+        # every targeted child has to be attending
+        return all(flags.child_is_attending for flags in self.targets())
+
+    def attention_timelines(self, targeted=True):
+        """ Return the attention timelines of the targeted children (or of
+        all of them).
+        """
+        return [member.flags.attention for member in (self.group.targets
+            if targeted else self.group.members)]
+
+    @property
+    def tega_is_playing_sound(self):
+        # busy while any targeted robot is
+        return any(flags.tega_is_playing_sound for flags in self.targets())
+
+    @property
+    def tega_is_doing_motion(self):
+        return any(flags.tega_is_doing_motion for flags in self.targets())
+
+    def start_counts(self):
+        """ Return (flags, sound starts, motion starts) for each targeted
+        robot, so a waiter noting them before sending something waits for
+        each of those robots to start it, however far apart their counts are
+        and whatever the targets are by then.
+        """
+        with self.state_changed:
+            return tuple(counts for flags in self.targets()
+                    for counts in flags.start_counts())
+
+
+class merged_stats(object):
+    """ Puts the latency trackers (or command schedulers) of several robots
+    together, for the latency panel and the reports printed on exit. Each
+    row is prefixed with the robot's namespace.
+    """
+
+    def __init__(self, sources):
+        """ sources is a list of (prefix, tracker or scheduler). """
+        self.sources = sources
+
+    def summary(self):
+        """ Return every source's summary rows, prefixed. """
+        return [(prefix + row[0],) + tuple(row[1:])
+                for prefix, source in self.sources
+                for row in source.summary()]
+
+    def stats(self):
+        """ Return every source's counters, added up. """
+        total = {}
+        for prefix, source in self.sources:
+            for key, value in source.stats().items():
+                total[key] = total.get(key, 0) + value
+        return total
+
+    def print_report(self):
+        """ Print every source's report (e.g., on exit). """
+        for prefix, source in self.sources:
+            if prefix:
+                print(prefix)
+            source.print_report()
+
+    def print_stats(self):
+        """ Print every source's counters (e.g., on exit). """
+        for prefix, source in self.sources:
+            if prefix:
+                print(prefix)
+            source.print_stats()
+
+
+class tega_teleop_group(object):
+    """ Drives several Tega/Opal stations from one GUI. Takes the same calls
+    as one robot's tega_teleop_ros and sends each of them to every robot the
+    operator has targeted. Each robot publishes from its own command
+    scheduler, so the robots get their commands in parallel.
+    """
+
+    def __init__(self, members):
+        """ members is a list of tega_teleop_ros, one per robot. All of them
+        are targeted to start with.
+        """
+        self.members = members
+        self.targets = tuple(members)
+        self.flags = tega_teleop_group_flags(self)
+        self.latency = merged_stats([(member.prefix, member.latency)
+            for member in members])
+        self.scheduler = merged_stats([(member.prefix, member.scheduler)
+            for member in members])
+
+    def names(self):
+        """ Return the robots' namespaces. """
+        return [member.namespace for member in self.members]
+
+    def set_targets(self, names):
+        """ Send to the robots with these namespaces from now on. Raises
+        ValueError if none of them are ours: with no robots to send to, the
+        controls would do nothing and script lines would wait out the full
+        timeout for a robot to start speaking.
+        """
+        targets = tuple(member for member in self.members
+                if member.namespace in names)
+        if not targets:
+            raise ValueError("no robots named {}".format(", ".join(names)
+                or "(none)"))
+        with self.flags.state_changed:
+            self.targets = targets
+            # the aggregate state may have changed
+            self.flags.state_changed.notify_all()
+
+    def start(self):
+        """ Subscribe and advertise for every robot. """
+        for member in self.members:
+            member.start()
+
+    # Each of these does what tega_teleop_ros's does, for every targeted
+    # robot.
+
+    def send_opal_message(self, command, priority=SCRIPT):
+        for member in self.targets:
+            member.send_opal_message(command, priority)
+
+    def send_motion_message(self, motion, priority=SCRIPT, on_drop=None):
+        for member in self.targets:
+            member.send_motion_message(motion, priority, on_drop)
+
+    def send_lookat_message(self, lookat, priority=SCRIPT):
+        for member in self.targets:
+            member.send_lookat_message(lookat, priority)
+
+    def send_speech_message(self, speech, priority=SCRIPT, on_drop=None):
+        for member in self.targets:
+            member.send_speech_message(speech, priority, on_drop)
+
+    def cancel_commands(self, priority=SAFETY):
+        # stop every robot, not just the targeted ones
+        return sum(member.cancel_commands(priority) for member in self.members)
+
+    def send_fidget_message(self, fidget, priority=AMBIENT):
+        for member in self.targets:
+            member.send_fidget_message(fidget, priority)
+
+    def send_volume_message(self, volume, priority=AMBIENT):
+        for member in self.targets:
+            member.send_volume_message(volume, priority)
+
+    def set_volume(self, volume):
+        for member in self.targets:
+            member.set_volume(volume)
+
+    def set_fidgets(self, fidget):
+        for member in self.targets:
+            member.set_fidgets(fidget)
+
+    def send_entrain_audio_message(self, speech, visemes, age, entrain,
+            priority=SCRIPT, on_drop=None):
+        for member in self.targets:
+            member.send_entrain_audio_message(speech, visemes, age, entrain,
+                    priority, on_drop)
+
+    def send_entrain_prepare_message(self, speech, visemes, age, entrain,
+            priority=AMBIENT):
+        for member in self.targets:
+            member.send_entrain_prepare_message(speech, visemes, age, entrain,
+                    priority)
+
+    def send_entrain_cancel_message(self, speech, priority=AMBIENT):
+        for member in self.targets:
+            member.send_entrain_cancel_message(speech, priority)
+
+    def send_interaction_state_message(self, is_turn, priority=SCRIPT):
+        for member in self.targets:
+            member.send_interaction_state_message(is_turn, priority)
+
+    def print_sender_stats(self):
+        for member in self.members:
+            member.print_sender_stats()
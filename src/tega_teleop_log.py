@@ -0,0 +1,129 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import os # rotating log files
+import json # one json record per line
+import time # timestamps
+import threading # background writer
+import Queue # records waiting to be written
+
+class tega_teleop_log(object):
+    """ Logs what we publish without slowing down the publishers: callers just
+    queue a small record, and a background thread writes records in batches to
+    a rotating log file with one json object per line. Depending on the
+    verbosity, the writer also prints a line to the console and echoes the
+    full message to rosout.
+    """
+
+    # verbosity levels
+    QUIET = "quiet" # log file only
+    NORMAL = "normal" # log file and a line on the console
+    VERBOSE = "verbose" # log file, console, and full messages to rosout
+
+    # the most records we write before flushing the file
+    batch_size = 256
+
+    def __init__(self, filename="tega_teleop_log.jsonl", verbosity=NORMAL,
+            max_bytes=5 * 1024 * 1024, backups=5):
+        """ Set up the log. When the log file gets bigger than max_bytes, it
+        is renamed to filename.1 (and so on, keeping this many backups).
+        """
+        self.filename = filename
+        self.verbosity = verbosity
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.records = Queue.Queue()
+        self.log_file = None
+        self.worker = threading.Thread(target=self.run,
+                name="tega_teleop_log")
+        self.worker.daemon = True
+
+    def start(self):
+        """ Open the log file and start the writer thread. """
+        self.log_file = open(self.filename, "a")
+        self.worker.start()
+
+    def stop(self):
+        """ Write whatever is still queued and stop the writer thread. """
+        if self.worker.is_alive():
+            self.records.put(None)
+            self.worker.join()
+
+    def log(self, kind, value, msg=None):
+        """ Queue a record saying we sent a message of some kind with some
+        value. Only pass the full ROS msg if it should be echoed to rosout.
+        We never keep a reference to it: prebuilt messages (see
+        tega_message_factory.py) are patched and sent again, maybe before
+        the writer gets to this record, so it is formatted here instead.
+        """
+        self.records.put((time.time(), kind, value,
+                str(msg) if msg is not None and self.verbosity == self.VERBOSE
+                else None))
+
+    def run(self):
+        """ Writer loop: write everything queued, then flush once. """
+        stopping = False
+        while not stopping:
+            batch = [self.records.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self.records.get_nowait())
+            except Queue.Empty:
+                pass
+            lines = []
+            for record in batch:
+                if record is None:
+                    stopping = True
+                    continue
+                stamp, kind, value, msg = record
+                lines.append(json.dumps({"time": stamp, "kind": kind,
+                    "value": value}))
+                if self.verbosity != self.QUIET:
+                    print("sent {} message: {}".format(kind, value))
+                if msg is not None:
+                    # only import rospy when we actually use it
+                    import rospy # ROS
+                    rospy.loginfo(msg)
+            if lines:
+                self.log_file.write("\n".join(lines) + "\n")
+                self.log_file.flush()
+                if self.log_file.tell() > self.max_bytes:
+                    self.rotate()
+        self.log_file.close()
+
+    def rotate(self):
+        """ Rename the log file to filename.1, filename.1 to filename.2, and
+        so on, dropping the oldest, and start a new log file.
+        """
+        self.log_file.close()
+        for i in range(self.backups - 1, 0, -1):
+            older = "{}.{}".format(self.filename, i)
+            if os.path.exists(older):
+                os.rename(older, "{}.{}".format(self.filename, i + 1))
+        if self.backups > 0:
+            os.rename(self.filename, self.filename + ".1")
+        else:
+            os.remove(self.filename)
+        self.log_file = open(self.filename, "a")
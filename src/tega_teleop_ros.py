@@ -24,168 +24,396 @@
 # SOFTWARE.
 
 from PySide import QtGui # basic GUI stuff
+import threading # rate limiting continuous settings
 import rospy # ROS
 from r1d1_msgs.msg import TegaAction # ROS msgs to talk to Tega
 from r1d1_msgs.msg import TegaState # ROS msgs to get info from Tega
 from sar_opal_msgs.msg import OpalCommand # ROS msgs to talk to tablet
 from std_msgs.msg import Bool # for child_attention topic
+from std_msgs.msg import String # for cancelling prepared entrainer audio
 from std_msgs.msg import Header # standard ROS msg header
-from rr_msgs.msg import EntrainAudio # Send audio to the audio entrainer.
-from rr_msgs.msg import InteractionState # Send state to the audio entrainer.
+from tega_latency_tracker import tega_latency_tracker
+from tega_teleop_clock import monotonic
+from tega_command_scheduler import SAFETY, REDIRECT, SCRIPT, AMBIENT
+from tega_message_factory import tega_message_factory
+from tega_session_recorder import OUT, IN
+
+class coalescing_sender(object):
+    """ Sends a continuous setting (e.g., the volume) at most once every
+    min_interval seconds, latest value wins. Holding down an arrow key on a
+    spin box changes the value many times a second; rather than publishing
+    every step (and pushing speech and motion commands out of the topic's
+    queue), we send the first change right away and then only the latest
+    value once the interval is up.
+    """
+
+    def __init__(self, send, min_interval=0.2):
+        """ Set up the sender. send(value) does the actual publishing. """
+        self.send = send
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        # the value waiting for the timer to send it, if any
+        self.timer = None
+        self.pending = None
+        self.last_sent = None
+        # counters, so we can see how much coalescing saves
+        self.updates = 0
+        self.coalesced = 0
+        self.sent = 0
+
+    def update(self, value):
+        """ Send a new value now if we haven't sent one lately, otherwise as
+        soon as we may (replacing any value still waiting to be sent).
+        """
+        with self.lock:
+            self.updates += 1
+            if self.timer is not None:
+                # the timer will send this instead of the older value
+                self.coalesced += 1
+                self.pending = value
+                return
+            now = monotonic()
+            if (self.last_sent is None
+                    or now - self.last_sent >= self.min_interval):
+                self.send_now(value, now)
+                return
+            self.pending = value
+            self.timer = threading.Timer(
+                    self.last_sent + self.min_interval - now, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """ Send the value waiting to be sent. Runs on the timer's thread. """
+        with self.lock:
+            self.timer = None
+            self.send_now(self.pending, monotonic())
+            self.pending = None
+
+    def send_now(self, value, now):
+        """ Send a value. Called with the lock held, so values go out in
+        order.
+        """
+        self.last_sent = now
+        self.sent += 1
+        self.send(value)
+
+    def stats(self):
+        """ Return the sender's counters. """
+        with self.lock:
+            return {"updates": self.updates, "coalesced": self.coalesced,
+                    "sent": self.sent}
+
 
 class tega_teleop_ros():
     # ROS node
 
-    def __init__(self, ros_node, ros_label, flags, use_entrainer):
-        """ Initialize ROS """
-        # we get a reference to the main ros node so we can do callbacks
-        # to publish messages, and subscribe to stuff
-        self.ros_node = ros_node
+    def __init__(self, ros_label, flags, use_entrainer, bridge, log,
+            scheduler, namespace="", recorder=None):
+        """ Initialize ROS. The node itself is initialized elsewhere (see
+        start() below). With several robots, each has its own namespace
+        (e.g., "station1"), and its topics live under it (e.g.,
+        "station1/tega"); with one robot, the topics aren't namespaced.
+        If we have a session recorder, every message we publish or receive
+        is recorded (see tega_session_recorder.py).
+        """
+        self.namespace = namespace
+        # prefix for this robot's topics, log records, and bridge keys
+        self.prefix = namespace + "/" if namespace else ""
         # we're going to update the ros label with info about messages coming
         # in one topics we're subscribed to
         self.ros_label = ros_label
+        # ROS callbacks run on rospy's threads, so all widget updates go
+        # through the bridge, which delivers them on the GUI thread. Running
+        # headless, there's no bridge and nothing to update.
+        self.bridge = bridge
+        if self.bridge is not None:
+            self.bridge.connect_handler(self.prefix + "child_attention",
+                    self.show_child_attention)
+        # everything we publish is logged in the background, so logging
+        # doesn't slow down publishing
+        self.log = log
+        # and, if we are recording the session, recorded in full
+        self.recorder = recorder
+        # Commands are queued with a priority and published by the
+        # scheduler's worker thread, most urgent first (see
+        # tega_command_scheduler.py).
+        self.scheduler = scheduler
+        # Motions, lookats, and tablet commands are a small fixed set, so we
+        # reuse a prebuilt message for each and only patch the stamp. This is
+        # safe because only the scheduler's worker thread publishes them.
+        self.messages = tega_message_factory()
+        # we time how long the robot takes to start doing what we send it
+        self.latency = tega_latency_tracker()
         # these are shared flags that the UI code will use to change the colors
         # of text or buttons based on what messages we're getting
         self.flags = flags
+        self.use_entrainer = use_entrainer
+
+        # We don't have publishers until start() is called; anything sent
+        # before then is dropped.
+        self.tablet_pub = None
+        self.tega_pub = None
+        self.entrain_pub = None
+        self.entrain_prepare_pub = None
+        self.entrain_cancel_pub = None
+        self.state_pub = None
+
+        # Continuous settings are sent through coalescing senders, so
+        # scrolling through values doesn't flood the tega topic.
+        self.volume_sender = coalescing_sender(self.send_volume_message)
+        self.fidget_sender = coalescing_sender(self.send_fidget_message)
+
+    def start(self):
+        """ Subscribe and advertise. Call after the ROS node is initialized.
+        This can run on a background thread while the GUI is being built.
+        """
         # subscribe to other ros nodes
         #TODO could we put list of nodes to subscribe to in config file?
         # the child attention topic gives us a boolean indicating whether or
         # not the affdex camera is recognizing a person's face looking in
         # generally the right direction
-        rospy.Subscriber('child_attention', Bool, self.on_child_attn_msg)
-        rospy.Subscriber('tega_state', TegaState, self.on_tega_state_msg)
+        rospy.Subscriber(self.prefix + 'child_attention', Bool,
+                self.on_child_attn_msg)
+        rospy.Subscriber(self.prefix + 'tega_state', TegaState,
+                self.on_tega_state_msg)
 
         # We will publish commands to the tablet and commands to the robot.
         # We might send audio to the audio entrainer on its way to the robot.
         # TODO it may be worthwhile to put the topic names in the config file.
-        self.tablet_pub = rospy.Publisher('opal_tablet_command', OpalCommand,
+        self.tablet_pub = rospy.Publisher(self.prefix + 'opal_tablet_command',
+                OpalCommand, queue_size = 10)
+        self.tega_pub = rospy.Publisher(self.prefix + 'tega', TegaAction,
                 queue_size = 10)
-        self.tega_pub = rospy.Publisher('tega', TegaAction, queue_size = 10)
 
-        self.entrain_pub = None
-        self.state_pub = None
-        if use_entrainer:
-            self.entrain_pub = rospy.Publisher('rr/entrain_audio', EntrainAudio,
+        if self.use_entrainer:
+            # only import the audio entrainer's messages if we use it
+            from rr_msgs.msg import EntrainAudio # Send audio to the entrainer.
+            from rr_msgs.msg import InteractionState # Send state to entrainer.
+            self.entrain_pub = rospy.Publisher(self.prefix + 'rr/entrain_audio',
+                    EntrainAudio, queue_size = 10)
+            self.state_pub = rospy.Publisher(self.prefix + 'rr/state',
+                    InteractionState, queue_size = 10)
+            # Speech can be handed to the entrainer ahead of time, to process
+            # while the robot plays the current line (see
+            # tega_entrainer_pipeline.py), and cancelled if we won't play it.
+            self.entrain_prepare_pub = rospy.Publisher(
+                    self.prefix + 'rr/entrain_prepare', EntrainAudio,
                     queue_size = 10)
-            self.state_pub = rospy.Publisher('rr/state', InteractionState,
+            self.entrain_cancel_pub = rospy.Publisher(
+                    self.prefix + 'rr/entrain_cancel', String,
                     queue_size = 10)
 
+        # now that we have publishers, start publishing queued commands
+        self.scheduler.start()
+
+    def submit(self, priority, kind, publish, on_drop=None):
+        """ Queue a command to be published. Redirects (and anything more
+        urgent) preempt script commands that haven't gone out yet, so the
+        robot gets to them right away.
+        """
+        self.scheduler.submit(priority, kind, publish,
+                preempt=priority <= REDIRECT, on_drop=on_drop)
+
+    def cancel_commands(self, priority=SAFETY):
+        """ Cancel commands less urgent than priority that haven't been
+        published yet (except settings). Returns how many were cancelled.
+        """
+        return self.scheduler.cancel_below(priority)
 
-    def send_opal_message(self, command):
+
+    def send_opal_message(self, command, priority=SCRIPT):
         """ Publish opal command message """
         if self.tablet_pub is not None:
-            print 'sending opal command: %s' % command
-            msg = OpalCommand()
-            # add header
-            msg.header = Header()
-            msg.header.stamp = rospy.Time.now()
-            msg.command = command
-            self.tablet_pub.publish(msg)
-            rospy.loginfo(msg)
-
-    def send_motion_message(self, motion):
+            def publish():
+                msg = self.messages.opal(command, rospy.Time.now())
+                self.tablet_pub.publish(msg)
+                self.record(OUT, self.prefix + "opal_tablet_command", msg)
+                self.log.log(self.prefix + "opal", command, msg)
+            self.submit(priority, "opal", publish)
+
+    def send_motion_message(self, motion, priority=SCRIPT, on_drop=None):
         """ Publish TegaAction do motion message """
         if self.tega_pub is not None:
-            print 'sending motion message: %s' % motion
-            msg = TegaAction()
-            # add header
-            msg.header = Header()
-            msg.header.stamp = rospy.Time.now()
-            msg.motion = motion
-            self.tega_pub.publish(msg)
-            rospy.loginfo(msg)
-
-    def send_lookat_message(self, lookat):
+            def publish():
+                msg = self.messages.motion(motion, rospy.Time.now())
+                self.tega_pub.publish(msg)
+                self.record(OUT, self.prefix + "tega", msg)
+                self.latency.command_sent("motion",
+                        tega_latency_tracker.MOTION)
+                self.log.log(self.prefix + "motion", motion, msg)
+            self.submit(priority, "motion", publish, on_drop)
+
+    def send_lookat_message(self, lookat, priority=SCRIPT):
         """ Publish TegaAction lookat message """
         if self.tega_pub is not None:
-            print 'sending lookat message: %s' % lookat
-            msg = TegaAction()
-            # add header
-            msg.header = Header()
-            msg.header.stamp = rospy.Time.now()
-            msg.do_look_at = True
-            msg.look_at = lookat
-            self.tega_pub.publish(msg)
-            rospy.loginfo(msg)
-
-    def send_speech_message(self, speech):
+            def publish():
+                msg = self.messages.lookat(lookat, rospy.Time.now())
+                self.tega_pub.publish(msg)
+                self.record(OUT, self.prefix + "tega", msg)
+                self.log.log(self.prefix + "lookat",
+                        [lookat.x, lookat.y, lookat.z], msg)
+            self.submit(priority, "lookat", publish)
+
+    def send_speech_message(self, speech, priority=SCRIPT, on_drop=None):
         """ Publish TegaAction playback audio message """
         if self.tega_pub is not None:
-            print '\nsending speech message: %s' % speech
-            msg = TegaAction()
-            # add header
-            msg.header = Header()
-            msg.header.stamp = rospy.Time.now()
-            msg.wav_filename = speech
-            self.tega_pub.publish(msg)
-            rospy.loginfo(msg)
-
-    def send_fidget_message(self, fidget):
+            def publish():
+                msg = TegaAction()
+                # add header
+                msg.header = Header()
+                msg.header.stamp = rospy.Time.now()
+                msg.wav_filename = speech
+                self.tega_pub.publish(msg)
+                self.record(OUT, self.prefix + "tega", msg)
+                self.latency.command_sent("speech",
+                        tega_latency_tracker.SOUND)
+                self.log.log(self.prefix + "speech", speech, msg)
+            self.submit(priority, "speech", publish, on_drop)
+
+    def send_fidget_message(self, fidget, priority=AMBIENT):
         """ Publish TegaAction message setting the fidget set in use. """
         if self.tega_pub is not None:
-            print '\nsending fidget message: %s' % fidget
-            msg = TegaAction()
-            # add header
-            msg.header = Header()
-            msg.header.stamp = rospy.Time.now()
-            msg.fidgets = fidget
-            self.tega_pub.publish(msg)
-            rospy.loginfo(msg)
-
-    def send_volume_message(self, volume):
+            def publish():
+                msg = TegaAction()
+                # add header
+                msg.header = Header()
+                msg.header.stamp = rospy.Time.now()
+                msg.fidgets = fidget
+                self.tega_pub.publish(msg)
+                self.record(OUT, self.prefix + "tega", msg)
+                self.log.log(self.prefix + "fidget", fidget, msg)
+            self.submit(priority, "fidget", publish)
+
+    def send_volume_message(self, volume, priority=AMBIENT):
         """ Publish TegaAction message setting the percent volume to use. """
         if self.tega_pub is not None:
-            print '\nsending volume message: %s' % volume
-            msg = TegaAction()
-            # add header
-            msg.header = Header()
-            msg.header.stamp = rospy.Time.now()
-            msg.set_volume = True
-            msg.percent_volume = volume
-            self.tega_pub.publish(msg)
-            rospy.loginfo(msg)
-
-    def send_entrain_audio_message(self, speech, visemes, age, entrain):
+            def publish():
+                msg = TegaAction()
+                # add header
+                msg.header = Header()
+                msg.header.stamp = rospy.Time.now()
+                msg.set_volume = True
+                msg.percent_volume = volume
+                self.tega_pub.publish(msg)
+                self.record(OUT, self.prefix + "tega", msg)
+                self.log.log(self.prefix + "volume", volume, msg)
+            self.submit(priority, "volume", publish)
+
+    def set_volume(self, volume):
+        """ Set the robot's volume, rate limited (see coalescing_sender). """
+        self.volume_sender.update(volume)
+
+    def set_fidgets(self, fidget):
+        """ Set the robot's fidget set, rate limited (see coalescing_sender).
+        """
+        self.fidget_sender.update(fidget)
+
+    def print_sender_stats(self):
+        """ Print how many setting changes were coalesced (e.g., on exit). """
+        for name, sender in (("volume", self.volume_sender),
+                ("fidgets", self.fidget_sender)):
+            print("{prefix}{name} setting: {updates} changes, {coalesced} "
+                    "coalesced, {sent} sent".format(prefix=self.prefix, name=name,
+                        **sender.stats()))
+
+    def send_entrain_audio_message(self, speech, visemes, age, entrain,
+            priority=SCRIPT, on_drop=None):
         """ Publish EntrainAudio message. """
         if self.entrain_pub is not None:
-            print '\nsending entrain speech message: %s' % speech
-            msg = EntrainAudio()
-            msg.header = Header()
-            msg.header.stamp = rospy.Time.now()
-            msg.audio = speech
-            msg.viseme_file = visemes
-            msg.age = age
-            msg.entrain = entrain
-            self.entrain_pub.publish(msg)
-            rospy.loginfo(msg)
-
-    def send_interaction_state_message(self, is_turn):
+            from rr_msgs.msg import EntrainAudio # already imported in start()
+            def publish():
+                msg = EntrainAudio()
+                msg.header = Header()
+                msg.header.stamp = rospy.Time.now()
+                msg.audio = speech
+                msg.viseme_file = visemes
+                msg.age = age
+                msg.entrain = entrain
+                self.entrain_pub.publish(msg)
+                self.record(OUT, self.prefix + "rr/entrain_audio", msg)
+                self.latency.command_sent("entrain_audio",
+                        tega_latency_tracker.SOUND)
+                self.log.log(self.prefix + "entrain_audio", speech, msg)
+            self.submit(priority, "entrain_audio", publish, on_drop)
+
+    def send_entrain_prepare_message(self, speech, visemes, age, entrain,
+            priority=AMBIENT):
+        """ Publish EntrainAudio message asking the entrainer to prepare
+        speech we expect to play soon.
+        """
+        if self.entrain_prepare_pub is not None:
+            from rr_msgs.msg import EntrainAudio # already imported in start()
+            def publish():
+                msg = EntrainAudio()
+                msg.header = Header()
+                msg.header.stamp = rospy.Time.now()
+                msg.audio = speech
+                msg.viseme_file = visemes
+                msg.age = age
+                msg.entrain = entrain
+                self.entrain_prepare_pub.publish(msg)
+                self.record(OUT, self.prefix + "rr/entrain_prepare", msg)
+                self.log.log(self.prefix + "entrain_prepare", speech, msg)
+            self.submit(priority, "entrain_prepare", publish)
+
+    def send_entrain_cancel_message(self, speech, priority=AMBIENT):
+        """ Publish message telling the entrainer we won't play speech it
+        was asked to prepare. Sent at the same priority as the prepare, so
+        the scheduler never publishes a cancel before its prepare.
+        """
+        if self.entrain_cancel_pub is not None:
+            def publish():
+                msg = String(speech)
+                self.entrain_cancel_pub.publish(msg)
+                self.record(OUT, self.prefix + "rr/entrain_cancel", msg)
+                self.log.log(self.prefix + "entrain_cancel", speech, msg)
+            self.submit(priority, "entrain_cancel", publish)
+
+    def send_interaction_state_message(self, is_turn, priority=SCRIPT):
         """ Publish InteractionState message. """
         if self.state_pub is not None:
-            print '\nsending interaction state message: %s' % is_turn
-            msg = InteractionState()
-            msg.header = Header()
-            msg.header.stamp = rospy.Time.now()
-            msg.is_participant_turn = is_turn
-            self.state_pub.publish(msg)
-            rospy.loginfo(msg)
+            from rr_msgs.msg import InteractionState # imported in start()
+            def publish():
+                msg = InteractionState()
+                msg.header = Header()
+                msg.header.stamp = rospy.Time.now()
+                msg.is_participant_turn = is_turn
+                self.state_pub.publish(msg)
+                self.record(OUT, self.prefix + "rr/state", msg)
+                self.log.log(self.prefix + "interaction_state", is_turn, msg)
+            self.submit(priority, "interaction_state", publish)
+
+    def record(self, direction, topic, msg):
+        """ Record a message we published or received, if we are recording
+        the session.
+        """
+        if self.recorder is not None:
+            self.recorder.record(direction, topic, msg, self.namespace)
 
     def on_child_attn_msg(self, data):
-        # when we get child attention messages, set a label to say whether the
-        # child is attending or not, and also set a flag
+        self.record(IN, self.prefix + "child_attention", data)
+        # when we get child attention messages, set a flag, and post an update
+        # to set a label to say whether the child is attending or not
         self.flags.child_is_attending = data.data
-        if data.data:
-            self.ros_label.setText("Child is ATTENDING")
+        if self.bridge is not None:
+            self.bridge.post(self.prefix + "child_attention", data.data)
+
+    def show_child_attention(self, is_attending):
+        """ Update the label to say whether the child is attending or not.
+        Called on the GUI thread with the latest attention value.
+        """
+        if is_attending:
+            self.ros_label.setText(self.prefix + "Child is ATTENDING")
         else:
-            self.ros_label.setText("Child is NOT ATTENDING")
+            self.ros_label.setText(self.prefix + "Child is NOT ATTENDING")
 
     def on_tega_state_msg(self, data):
-        # when we get tega state messages, set a flag indicating whether the
-        # robot is in motion or playing sound or not
-        self.flags.tega_is_playing_sound = data.is_playing_sound
-
-        # Instead of giving us a boolean to indicate whether tega is in motion
-        # or not, we get the name of the animation. Let's check whether it is
-        # our "idle" animation (usually, the idle animation is either
-        # MOTION_IDLESTILL or MOTION_BREATHING).
-        self.flags.tega_is_doing_motion = data.doing_motion
+        self.record(IN, self.prefix + "tega_state", data)
+        # when we get tega state messages, set flags indicating whether the
+        # robot is in motion or playing sound or not. Setting both at once
+        # also wakes the speech sequencer, which is waiting on these flags to
+        # know when it can send the next item in the script.
+        self.flags.set_tega_state(data.is_playing_sound, data.doing_motion)
+        # match the state against the commands we've sent, to time them
+        self.latency.state_received(data.is_playing_sound, data.doing_motion)
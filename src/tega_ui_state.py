@@ -0,0 +1,129 @@
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from PySide import QtCore # timers
+from tega_teleop_clock import monotonic
+
+# The look of each widget state, in one style sheet for the whole
+# application. Panels say what state a widget is in (see tega_ui_state
+# below) instead of giving each widget its own style sheet.
+STYLESHEET = """
+QPushButton[tega_state="next"] { color: green; }
+QPushButton[tega_state="redirect"] { color: purple; }
+QPushButton[tega_state="suggest"] { color: red; }
+QPushButton[tega_state="paused"] { color: red; }
+QPushButton[tega_state="minor"], QLabel[tega_state="minor"] { color: gray; }
+"""
+
+class tega_ui_state(QtCore.QObject):
+    """ Keeps track of what state each widget is in (e.g., a static script
+    button suggesting a redirect), shown through the application style sheet
+    above. Setting a widget's own style sheet makes Qt parse it and restyle
+    the widget from scratch, every time; with one style sheet, a state
+    change is a dynamic property and a re-polish.
+
+    Changes are batched: the latest state set for each widget is applied
+    once per display frame, and widgets already in that state are left
+    alone, so several changes in a row (e.g., advancing the script while a
+    redirect is suggested) cost one restyle at most.
+    """
+
+    # the dynamic property the style sheet matches on
+    PROPERTY = "tega_state"
+
+    def __init__(self, frame_interval=16):
+        """ Set up the state model. frame_interval is the minimum time
+        between applying changes, in milliseconds.
+        """
+        super(tega_ui_state, self).__init__()
+        # widget -> latest state set, waiting for the next frame
+        self.pending = {}
+        # counters, and how long applying changes took, in seconds
+        self.requested = 0
+        self.coalesced = 0
+        self.applied = 0
+        self.unchanged = 0
+        self.frames = 0
+        self.apply_time = 0.0
+        self.max_apply_time = 0.0
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(frame_interval)
+        self.timer.timeout.connect(self.flush)
+
+    def install(self, app):
+        """ Add the state style sheet to the application's. """
+        app.setStyleSheet(app.styleSheet() + STYLESHEET)
+
+    def set(self, widget, state):
+        """ Put a widget in a state (None for the default look), at the next
+        frame. Call on the GUI thread.
+        """
+        self.requested += 1
+        if widget in self.pending:
+            self.coalesced += 1
+        self.pending[widget] = state
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """ Apply every pending change. """
+        started = monotonic()
+        pending, self.pending = self.pending, {}
+        for widget, state in pending.iteritems():
+            try:
+                if widget.property(self.PROPERTY) == state:
+                    self.unchanged += 1
+                    continue
+                widget.setProperty(self.PROPERTY, state)
+                # restyle the widget for its new state
+                style = widget.style()
+                style.unpolish(widget)
+                style.polish(widget)
+                widget.update()
+                self.applied += 1
+            except RuntimeError:
+                # the widget was deleted (e.g., a static script was
+                # reloaded) before we got to it
+                pass
+        elapsed = monotonic() - started
+        self.frames += 1
+        self.apply_time += elapsed
+        self.max_apply_time = max(self.max_apply_time, elapsed)
+
+    def stats(self):
+        """ Return the state model's counters. """
+        return {"requested": self.requested, "coalesced": self.coalesced,
+                "applied": self.applied, "unchanged": self.unchanged,
+                "frames": self.frames, "apply_ms": 1000.0 * self.apply_time,
+                "max_apply_ms": 1000.0 * self.max_apply_time}
+
+    def print_stats(self):
+        """ Print the state model's counters (e.g., on exit). """
+        print("Widget states: {requested} changes, {coalesced} coalesced, "
+                "{unchanged} unchanged, {applied} applied in {frames} frames "
+                "taking {apply_ms:.1f} ms (at most {max_apply_ms:.2f} ms in "
+                "one frame)".format(**self.stats()))
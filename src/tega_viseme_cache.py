@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+
+# Personal Robots Group
+# October 2026
+#
+# The MIT License (MIT)
+#
+# Copyright (c) 2016 Personal Robots Group
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+""" Compiles viseme text files into one binary cache, so whoever plays the
+speech doesn't have to read and parse a text file for every utterance.
+
+A viseme file lists one viseme per line: the viseme and the time it starts,
+in seconds from the start of the audio, separated by whitespace (either order
+is accepted). The cache file is laid out as:
+
+    header: magic, version, number of labels, number of entries, and where
+        the index and the records start
+    labels: the distinct viseme labels, each as a length byte and the label
+    index: for each viseme file, its name (its path under the viseme dir), its
+        first record and number of records, and its audio's duration (-1 if
+        we don't know it)
+    records: every viseme of every file, as a start time (float) and a label
+        number (byte)
+
+Speech refers to a cached viseme file with a "tvc://" URI naming the cache
+and the file, e.g., "tvc:///data/tega_visemes.tvc#robot_line_01.txt".
+"""
+
+import os # walking the viseme dir
+import sys # exit code
+import mmap # reading the cache without copying it
+import struct # binary layout
+import argparse # command line args
+import threading # caches opened from several threads
+from tega_audio_index import tega_audio_index
+from tega_script_compiler import VISEME_URI
+from tega_teleop_config import load_config
+
+MAGIC = b"TVC1"
+VERSION = 1
+
+HEADER = struct.Struct("<4sIIIII")
+INDEX_ENTRY = struct.Struct("<IIf")
+RECORD = struct.Struct("<fB")
+
+# how much later than the end of the audio a viseme may start before we
+# say it doesn't belong to that audio, in seconds
+DURATION_TOLERANCE = 0.5
+
+
+def parse_visemes(path):
+    """ Read a viseme text file. Returns a list of (start time, label).
+    Raises ValueError saying which line is bad.
+    """
+    visemes = []
+    with open(path) as viseme_file:
+        for number, line in enumerate(viseme_file, 1):
+            parts = line.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+            if len(parts) != 2:
+                raise ValueError("line {}: expected a viseme and a "
+                        "time".format(number))
+            try:
+                visemes.append((float(parts[1]), parts[0]))
+            except ValueError:
+                try:
+                    visemes.append((float(parts[0]), parts[1]))
+                except ValueError:
+                    raise ValueError("line {}: no time".format(number))
+    return visemes
+
+
+def check_visemes(visemes, duration=None):
+    """ Check parsed visemes. Returns (errors, warnings): errors make the
+    visemes unusable (e.g., times going backwards); warnings say they might
+    not match their audio.
+    """
+    errors = []
+    warnings = []
+    if not visemes:
+        errors.append("no visemes")
+    last = 0.0
+    for i, (start, label) in enumerate(visemes):
+        if start < 0 or start < last:
+            errors.append("viseme {} ({}) starts at {:.3f} s, before the "
+                    "one before it".format(i + 1, label, start))
+            break
+        last = start
+    if duration is None:
+        warnings.append("no matching audio")
+    elif visemes and visemes[-1][0] > duration + DURATION_TOLERANCE:
+        warnings.append("last viseme starts at {:.3f} s, but the audio is "
+                "only {:.3f} s long".format(visemes[-1][0], duration))
+    return errors, warnings
+
+
+def encode_name(name):
+    """ Return a viseme file name as the bytes it is stored as in a cache.
+    Names read from a json config or walked from a unicode dir are unicode.
+    """
+    if isinstance(name, unicode):
+        return name.encode("utf-8")
+    return name
+
+
+def write_cache(filename, entries):
+    """ Write a cache file from a dict of name -> (visemes, duration). The
+    file is written next to its final name and then moved into place, so
+    anyone reading the old cache isn't disturbed.
+    """
+    labels = sorted(set(label for visemes, duration in entries.values()
+        for start, label in visemes))
+    if len(labels) > 255:
+        raise ValueError("too many distinct visemes")
+    label_ids = dict((label, i) for i, label in enumerate(labels))
+
+    label_table = b"".join(struct.pack("<B", len(label)) + label
+            for label in labels)
+    index = []
+    records = []
+    for name in sorted(entries):
+        visemes, duration = entries[name]
+        key = encode_name(name)
+        index.append(struct.pack("<H", len(key)) + key
+                + INDEX_ENTRY.pack(len(records), len(visemes),
+                    -1.0 if duration is None else duration))
+        records.extend(RECORD.pack(start, label_ids[label])
+                for start, label in visemes)
+    index = b"".join(index)
+    index_offset = HEADER.size + len(label_table)
+    data_offset = index_offset + len(index)
+
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, "wb") as cache_file:
+        cache_file.write(HEADER.pack(MAGIC, VERSION, len(labels),
+            len(entries), index_offset, data_offset))
+        cache_file.write(label_table)
+        cache_file.write(index)
+        cache_file.write(b"".join(records))
+    os.rename(temp_filename, filename)
+
+
+class tega_viseme_cache(object):
+    """ Reads visemes from a cache file written by write_cache. The file is
+    memory mapped, so opening it only reads the index, and the records for a
+    viseme file are only read when asked for.
+    """
+
+    def __init__(self, filename):
+        """ Open a cache file. Raises IOError if it isn't one. """
+        self.filename = filename
+        with open(filename, "rb") as cache_file:
+            try:
+                self.data = mmap.mmap(cache_file.fileno(), 0,
+                        access=mmap.ACCESS_READ)
+            except ValueError:
+                raise IOError("empty viseme cache: " + filename)
+        if len(self.data) < HEADER.size:
+            raise IOError("not a viseme cache: " + filename)
+        (magic, version, label_count, entry_count, index_offset,
+            data_offset) = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise IOError("not a viseme cache: " + filename)
+        self.data_offset = data_offset
+        # viseme labels, by number
+        self.labels = []
+        offset = HEADER.size
+        for i in range(label_count):
+            length = ord(self.data[offset])
+            self.labels.append(self.data[offset + 1:offset + 1 + length])
+            offset += 1 + length
+        # name -> (first record, number of records, duration)
+        self.index = {}
+        offset = index_offset
+        for i in range(entry_count):
+            length = struct.unpack_from("<H", self.data, offset)[0]
+            name = self.data[offset + 2:offset + 2 + length]
+            offset += 2 + length
+            self.index[name] = INDEX_ENTRY.unpack_from(self.data, offset)
+            offset += INDEX_ENTRY.size
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return encode_name(name) in self.index
+
+    def visemes(self, name):
+        """ Return a viseme file's visemes, as a list of (start time, label).
+        Raises KeyError if it isn't in the cache.
+        """
+        first, count, duration = self.index[encode_name(name)]
+        records = struct.unpack_from("<" + RECORD.format[1:] * count,
+                self.data, self.data_offset + first * RECORD.size)
+        labels = self.labels
+        return [(records[i], labels[records[i + 1]])
+                for i in range(0, 2 * count, 2)]
+
+    def duration(self, name):
+        """ Return how long a viseme file's audio plays for, or None if we
+        don't know.
+        """
+        duration = self.index[encode_name(name)][2]
+        return None if duration < 0 else duration
+
+    def close(self):
+        self.data.close()
+
+
+# cache files we have open, by filename
+_caches = {}
+_caches_lock = threading.Lock()
+
+def open_cache(filename):
+    """ Return the open cache for a file, opening it the first time. """
+    with _caches_lock:
+        cache = _caches.get(filename)
+        if cache is None:
+            cache = _caches[filename] = tega_viseme_cache(filename)
+        return cache
+
+
+def viseme_uri(cache_filename, name):
+    """ Return the URI of a viseme file in a cache. """
+    return "{}{}#{}".format(VISEME_URI, cache_filename, name)
+
+
+def read_visemes(viseme_file):
+    """ Return the visemes in a viseme file, as a list of (start time,
+    label), from the cache if viseme_file is a cache URI (see viseme_uri).
+    Raises IOError/OSError if the file can't be read, KeyError if it isn't
+    in the cache, and ValueError if it can't be parsed.
+    """
+    if viseme_file.startswith(VISEME_URI):
+        cache_filename, name = viseme_file[len(VISEME_URI):].split("#", 1)
+        return open_cache(cache_filename).visemes(name)
+    return parse_visemes(viseme_file)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description='''Compile every viseme file under the viseme dir into
+            one binary cache file. Checks along the way that each file's
+            viseme times never go backwards (files that do are left out) and
+            that each has a matching audio file that the visemes fit in
+            (files that don't are warned about). Set "viseme_cache" in the
+            config to use the cache.
+            ''')
+    parser.add_argument("-c", "--config", default="tega_teleop_config.json",
+            help="Config file to read audio_base_dir, viseme_base_dir, and "
+            "viseme_cache from.")
+    parser.add_argument("-a", "--audio-dir", dest="audio_dir",
+            help="Directory of audio files (default: from the config).")
+    parser.add_argument("-v", "--viseme-dir", dest="viseme_dir",
+            help="Directory of viseme files (default: from the config).")
+    parser.add_argument("-o", "--output",
+            help="Cache file to write (default: from the config, or "
+            "tega_visemes.tvc).")
+    parser.add_argument("-i", "--index", default="tega_audio_index.json",
+            help="Where to keep how long each audio file plays for.")
+    parser.add_argument("--show", metavar="NAME",
+            help="Print one viseme file from the cache instead.")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    audio_dir = (args.audio_dir if args.audio_dir is not None
+            else config.get("audio_base_dir", ""))
+    viseme_dir = (args.viseme_dir if args.viseme_dir is not None
+            else config.get("viseme_base_dir", "")) or audio_dir
+    output = args.output or config.get("viseme_cache") or "tega_visemes.tvc"
+    # work with byte string paths, so file names that aren't ascii are read
+    # and stored as they are on disk, whatever the locale
+    audio_dir = encode_name(audio_dir)
+    viseme_dir = encode_name(viseme_dir)
+
+    if args.show:
+        try:
+            cache = tega_viseme_cache(output)
+            for start, label in cache.visemes(args.show):
+                print("{}\t{:.3f}".format(label, start))
+        except (IOError, OSError, KeyError) as e:
+            print("Could not read {} from {}: {}".format(args.show, output, e))
+            sys.exit(1)
+        sys.exit(0)
+
+    if not viseme_dir:
+        print("No viseme dir! Give one with -v or in the config.")
+        sys.exit(1)
+
+    # find the viseme files, and the audio files they go with
+    names = []
+    for root, dirs, files in os.walk(viseme_dir):
+        for filename in files:
+            if filename.endswith(".txt"):
+                names.append(os.path.relpath(os.path.join(root, filename),
+                    viseme_dir))
+    names.sort()
+    audio_path = lambda name: os.path.join(audio_dir,
+            name.replace(".txt", ".wav"))
+    index = tega_audio_index(args.index)
+    index.build(audio_path(name) for name in names)
+
+    entries = {}
+    errors = 0
+    for name in names:
+        try:
+            visemes = parse_visemes(os.path.join(viseme_dir, name))
+        except (IOError, OSError, ValueError) as e:
+            print("{}: {}".format(name, e))
+            errors += 1
+            continue
+        duration = index.duration(audio_path(name))
+        file_errors, warnings = check_visemes(visemes, duration)
+        for message in file_errors:
+            print("{}: {}".format(name, message))
+        for message in warnings:
+            print("{}: warning: {}".format(name, message))
+        if file_errors:
+            errors += 1
+            continue
+        entries[name] = (visemes, duration)
+
+    write_cache(output, entries)
+    print("Wrote {} of {} viseme files to {} ({} bytes)".format(len(entries),
+        len(names), output, os.path.getsize(output)))
+    sys.exit(1 if errors else 0)
@@ -54,4 +54,4 @@ class tega_volume_ui(QtGui.QWidget):
         """ When the volume is changed, send a message to the robot to tell it
         what the volume should be.
         """
-        self.ros_node.send_volume_message(volume)
+        self.ros_node.set_volume(volume)